@@ -1,28 +1,100 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Response, make_response, render_template, request, redirect, url_for, flash, jsonify, session, send_file, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_migrate import Migrate
 from datetime import datetime
+import click
 import pytz
 import os
-import bcrypt
-import shlex
 from riddles import riddle_manager
 import io
-import math
 import json
+import time
+import hashlib
+import mimetypes
+from werkzeug.security import safe_join
+from markupsafe import escape
+from jinja2.utils import htmlsafe_json_dumps
 from config.flags import LEVEL_FLAGS
+from progress_store import UserProgress, create_progress_store
+from progress_journal import ProgressJournal, PROGRESS, RIDDLE
+from emulator import SessionManager
+from terminal_channel import ChannelRegistry, format_event
+from catalog import catalog
+from leaderboard import Leaderboard, Standing
+from broadcast import Broadcaster
+from identity import IdentityCache, UserSnapshot
+from passwords import PasswordHasher, PasswordHasherBusy
+from provisioning import provision, read_roster
+from write_behind import BatchAppender, WriteBehind
+from database import configure_sqlite, engine_options
+from timing import LevelTimer, LevelTimes
+from render_cache import RenderCache, slot
+from assets import build as build_assets, load_manifest
+from binary_tools import BINARY_LEVEL, analyze, analyze_file, level_binary, materialise, ndjson
+from sqlalchemy import func, insert, update
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///ctf.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///ctf.db')
+# Connection pool per worker and SQLite pragmas, see database.py
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'],
+                                                         int(os.environ.get('DB_POOL_SIZE', '10')),
+                                                         int(os.environ.get('DB_MAX_OVERFLOW', '20')))
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', str(64 * 1024 * 1024)))
+# Progress is shared by all workers; use 'memory' only for a single process
+app.config['PROGRESS_BACKEND'] = os.environ.get('PROGRESS_BACKEND', 'sqlite')
+app.config['PROGRESS_DB_PATH'] = os.environ.get('PROGRESS_DB_PATH', os.path.join(app.instance_path, 'progress.db'))
+app.config['PROGRESS_CACHE_TTL'] = float(os.environ.get('PROGRESS_CACHE_TTL', '1.0'))
+app.config['PROGRESS_JOURNAL_DIR'] = os.environ.get('PROGRESS_JOURNAL_DIR', os.path.join(app.instance_path, 'journal'))
+app.config['LEADERBOARD_PAGE_SIZE'] = int(os.environ.get('LEADERBOARD_PAGE_SIZE', '100'))
+# Seconds before a worker re-reads the ranking to pick up other workers' changes
+app.config['LEADERBOARD_MAX_AGE'] = float(os.environ.get('LEADERBOARD_MAX_AGE', '5.0'))
+# Most ranking messages per second pushed to leaderboard streams
+app.config['LEADERBOARD_PUSH_RATE'] = float(os.environ.get('LEADERBOARD_PUSH_RATE', '4.0'))
+# Seconds a worker trusts its cached copy of a logged-in user
+app.config['IDENTITY_CACHE_TTL'] = float(os.environ.get('IDENTITY_CACHE_TTL', '30.0'))
+# Seconds a worker trusts its cached copy of a team's level timers
+app.config['LEVEL_TIME_CACHE_TTL'] = float(os.environ.get('LEVEL_TIME_CACHE_TTL', '30.0'))
+# bcrypt cost factor; existing hashes are upgraded at the next login
+app.config['BCRYPT_ROUNDS'] = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+# Hashing threads (default: CPU count) and how many hashes may wait for one
+app.config['PASSWORD_WORKERS'] = int(os.environ.get('PASSWORD_WORKERS', '0')) or None
+app.config['PASSWORD_QUEUE'] = int(os.environ.get('PASSWORD_QUEUE', '32'))
+# Seconds between flushes of queued scan/submission times (lost on a crash, see write_behind.py)
+app.config['WRITE_BEHIND_INTERVAL'] = float(os.environ.get('WRITE_BEHIND_INTERVAL', '0.25'))
+# Attempts waiting to be logged before new ones are dropped
+app.config['SUBMISSION_QUEUE'] = int(os.environ.get('SUBMISSION_QUEUE', '10000'))
+# Seconds between timer events on a terminal channel stream
+app.config['TERMINAL_TIMER_INTERVAL'] = float(os.environ.get('TERMINAL_TIMER_INTERVAL', '1.0'))
+# Challenge binaries the streaming analysis tools may open
+app.config['BINARY_DIR'] = os.environ.get('BINARY_DIR', os.path.join(app.instance_path, 'binaries'))
 db = SQLAlchemy(app)
+with app.app_context():
+    configure_sqlite(db.engine, app.config['SQLITE_BUSY_TIMEOUT'], app.config['SQLITE_MMAP_SIZE'])
 migrate = Migrate(app, db)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
+class LevelTimeMixin:
+    """Level timing shared by the User model and its cached snapshot."""
+
+    def get_level_time(self, level):
+        timer = level_times.get(self.id).get(level)
+        if timer:
+            return timer.elapsed()
+        return None
+
+    def format_time_spent(self, level):
+        time_spent = self.get_level_time(level)
+        if not time_spent:
+            return "Not started"
+        
+        return format_duration(time_spent.total_seconds())
+
 # Database Models
-class User(UserMixin, db.Model):
+class User(LevelTimeMixin, UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password = db.Column(db.String(120), nullable=False)
@@ -34,28 +106,23 @@ class User(UserMixin, db.Model):
     qr_scan_time = db.Column(db.DateTime, nullable=True)
     level_times = db.relationship('LevelTime', backref='user', lazy=True)
 
-    def get_level_time(self, level):
-        level_time = LevelTime.query.filter_by(user_id=self.id, level=level).order_by(LevelTime.start_time.desc()).first()
-        if level_time:
-            return level_time.calculate_time_spent()
-        return None
+    __table_args__ = (
+        # Ranking order and the "not scanned yet" filter
+        db.Index('ix_user_first_scan_time', 'first_scan_time'),
+    )
 
-    def format_time_spent(self, level):
-        time_spent = self.get_level_time(level)
-        if not time_spent:
-            return "Not started"
-        
-        total_seconds = int(time_spent.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-        
-        if hours > 0:
-            return f"{hours}h {minutes}m {seconds}s"
-        elif minutes > 0:
-            return f"{minutes}m {seconds}s"
-        else:
-            return f"{seconds}s"
+def format_duration(total_seconds):
+    total_seconds = int(total_seconds)
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+
+    if hours > 0:
+        return f"{hours}h {minutes}m {seconds}s"
+    elif minutes > 0:
+        return f"{minutes}m {seconds}s"
+    else:
+        return f"{seconds}s"
 
 class LevelTime(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -65,6 +132,11 @@ class LevelTime(db.Model):
     end_time = db.Column(db.DateTime, nullable=True)
     time_spent = db.Column(db.Interval, nullable=True)
 
+    __table_args__ = (
+        # get_level_time (latest start of a level) and the open-timer lookup in terminal()
+        db.Index('ix_level_time_user_level_start', 'user_id', 'level', 'start_time'),
+    )
+
     def calculate_time_spent(self):
         if self.end_time and self.start_time:
             return self.end_time - self.start_time
@@ -78,6 +150,8 @@ class Submission(db.Model):
     level = db.Column(db.Integer, nullable=False)
     submitted_at = db.Column(db.DateTime, nullable=False)
     is_correct = db.Column(db.Boolean, nullable=False)
+    # 'flag', 'riddle' or 'location'
+    kind = db.Column(db.String(16), nullable=False, default='flag', server_default='flag')
 
 # Challenge answers (in production, these should be stored securely)
 ANSWERS = {
@@ -332,42 +406,155 @@ Where is the spot, both strict and bold?""",
 }
 
 # User progress tracking
-user_progress = {}
-
-class UserProgress:
-    def __init__(self):
-        self.current_level = 1
-        self.at_hint = False
-        self.completed_levels = set()
+progress_store = create_progress_store(app.config)
+progress_journal = ProgressJournal(app.config['PROGRESS_JOURNAL_DIR'])
 
 def get_user_progress(user_id='default'):
-    if user_id not in user_progress:
-        user_progress[user_id] = UserProgress()
-    return user_progress[user_id]
+    return progress_store.get(user_id)
+
+def save_user_progress(user_id, progress, event):
+    progress_store.save(user_id, progress)
+    progress_journal.append(event, PROGRESS, user_id, progress.to_dict())
+
+def journal_riddle_change(event, user_id):
+    progress_journal.append(event, RIDDLE, user_id, riddle_manager.export_state(user_id))
+
+def restore_from_journal():
+    """Reload progress and riddles recorded before the last restart."""
+    progress, riddles = progress_journal.replay()
+    if not progress_store.backend.durable:
+        for user_id, state in progress.items():
+            progress_store.backend.save(user_id, UserProgress.from_dict(state))
+    for user_id, state in riddles.items():
+        # A durable backend already holds every riddle it was sent; the
+        # journal only fills in what it lacks, such as a fresh memory backend
+        if progress_store.get_riddle(user_id) is None:
+            riddle_manager.restore_state(user_id, state)
+
+# Riddles live next to progress, so every worker sees the same assignment
+riddle_manager.store = progress_store
+restore_from_journal()
+riddle_manager.on_change = journal_riddle_change
+
+class CachedUser(LevelTimeMixin, UserSnapshot):
+    __slots__ = ()
+
+def load_snapshot(user_id):
+    # Queued writes first, or the fresh snapshot would miss them
+    user_writes.flush()
+    user = User.query.get(user_id)
+    return CachedUser.from_user(user) if user is not None else None
+
+identities = IdentityCache(load_snapshot, ttl=app.config['IDENTITY_CACHE_TTL'])
+
+def load_level_times(user_id):
+    rows = db.session.query(LevelTime.level, LevelTime.start_time, LevelTime.end_time) \
+        .filter_by(user_id=user_id).order_by(LevelTime.start_time)
+    # Ordered by start, so the latest timer of each level wins
+    return {level: LevelTimer(level, start_time, end_time) for level, start_time, end_time in rows}
+
+# All level timers of a team in one query, see timing.py
+level_times = LevelTimes(load_level_times, ttl=app.config['LEVEL_TIME_CACHE_TTL'])
+
+def update_user(user_id, **values):
+    """Write columns of a user now and drop its cached identity."""
+    query = User.query.filter_by(id=user_id)
+    query.update(values, synchronize_session=False)
+    db.session.commit()
+    identities.invalidate(user_id)
+
+def flush_user_writes(pending):
+    with app.app_context():
+        for user_id, columns in pending.items():
+            values = {column: func.coalesce(getattr(User, column), value) if set_once else value
+                      for column, (value, set_once) in columns.items()}
+            db.session.execute(update(User).where(User.id == user_id).values(**values))
+        db.session.commit()
+
+# Scan and submission times, written behind the request (see write_behind.py)
+user_writes = WriteBehind(flush_user_writes, app.config['WRITE_BEHIND_INTERVAL'])
+
+def stamp_user(user_id, set_once=None, **values):
+    """Queue a write of user columns and apply it to the cached identity; set_once columns only fill NULLs."""
+    user_writes.put(user_id, values, set_once)
+    identities.update(user_id, values, set_once)
+
+def insert_submissions(rows):
+    with app.app_context():
+        db.session.execute(insert(Submission), rows)
+        db.session.commit()
+
+# Attempt history, inserted in batches (see write_behind.py)
+submission_log = BatchAppender(insert_submissions, app.config['WRITE_BEHIND_INTERVAL'],
+                               app.config['SUBMISSION_QUEUE'], name='submission-log')
+
+def log_attempt(kind, level, is_correct):
+    submission_log.append({'user_id': current_user.id, 'level': level, 'kind': kind,
+                           'submitted_at': datetime.now(pytz.UTC), 'is_correct': is_correct})
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return identities.get(int(user_id))
 
 @app.route('/')
 def index():
     if current_user.is_authenticated:
-        progress = get_user_progress(current_user.id)
-        return redirect(url_for('level', level_number=progress.current_level))
+        return redirect(page_for(get_user_progress(current_user.id)))
     return render_template('index.html')
 
+passwords = PasswordHasher(app.config['BCRYPT_ROUNDS'], app.config['PASSWORD_WORKERS'],
+                           app.config['PASSWORD_QUEUE'])
+
+def hashing_busy(template, error):
+    flash(f'Too many logins right now, please try again in {error.retry_after} seconds.', 'warning')
+    response = make_response(render_template(template), 503)
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+@app.cli.command('provision')
+@click.argument('roster', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=500, show_default=True, help='Users per INSERT and commit.')
+@click.option('--workers', type=int, default=None, help='Hashing processes (default: CPU count).')
+@click.option('--rounds', type=int, default=None, help='bcrypt cost (default: BCRYPT_ROUNDS).')
+def provision_command(roster, batch_size, workers, rounds):
+    """Create team accounts from a CSV or NDJSON roster of usernames and passwords."""
+    def report(created, elapsed):
+        click.echo(f'  {created} created, {created / elapsed:.0f} accounts/s')
+
+    try:
+        stats = provision(db.session, User, read_roster(roster), rounds or app.config['BCRYPT_ROUNDS'],
+                          batch_size, workers, report)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Created {stats['created']} accounts ({stats['skipped']} already existed) in "
+               f"{stats['seconds']:.1f}s on {stats['workers']} processes "
+               f"({stats['created'] / max(stats['seconds'], 1e-9):.0f} accounts/s)")
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
-        user = User.query.filter_by(username=username).first()
+        user = db.session.query(User.id, User.password, User.start_time).filter_by(username=username).first()
+        # Don't hold a pooled connection while the hash runs
+        db.session.rollback()
         
-        if user and bcrypt.checkpw(password.encode('utf-8'), user.password):
-            login_user(user)
+        try:
+            valid = user is not None and passwords.verify(password, user.password)
+        except PasswordHasherBusy as e:
+            return hashing_busy('login.html', e)
+        if valid and passwords.needs_rehash(user.password):
+            # The cost factor changed since this hash was made. Rehashing can
+            # wait for a quieter login, the password is already verified
+            try:
+                update_user(user.id, password=passwords.hash(password))
+            except PasswordHasherBusy:
+                pass
+
+        if valid:
+            login_user(identities.get(user.id))
             if not user.start_time:
-                user.start_time = datetime.now(pytz.UTC)
-                db.session.commit()
+                stamp_user(user.id, set_once={'start_time': datetime.now(pytz.UTC)})
             flash('Successfully logged in!', 'success')
             progress = get_user_progress(user.id)
             return redirect(url_for('level', level_number=progress.current_level))
@@ -387,14 +574,20 @@ def register():
             flash('Passwords do not match', 'warning')
             return render_template('register.html')
         
-        if User.query.filter_by(username=username).first():
+        exists = User.query.filter_by(username=username).first() is not None
+        db.session.rollback()
+        if exists:
             flash('Username already exists', 'warning')
             return render_template('register.html')
         
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        try:
+            hashed_password = passwords.hash(password)
+        except PasswordHasherBusy as e:
+            return hashing_busy('register.html', e)
         user = User(username=username, password=hashed_password)
         db.session.add(user)
         db.session.commit()
+        ranking.update(user.id, user.username)
         
         flash('Registration successful! Please login.', 'success')
         return redirect(url_for('login'))
@@ -404,9 +597,52 @@ def register():
 @app.route('/logout')
 @login_required
 def logout():
+    # Channel tokens bypass the session cookie, so they must not outlive it
+    terminal_channels.close_user(current_user.id)
     logout_user()
     return redirect(url_for('index'))
 
+# Fingerprinted assets from `flask build-assets`, see assets.py; read once at startup
+asset_manifest = load_manifest(app.static_folder) or {}
+built_assets = set(asset_manifest.values())
+
+@app.template_global()
+def asset_url(name):
+    """URL of a built asset, or of the plain static file when none was built."""
+    built = asset_manifest.get(name)
+    if built is None:
+        return url_for('static', filename=name)
+    return url_for('asset', filename=built)
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """A built asset, precompressed if the client accepts it. Its name changes with its content, so it never expires."""
+    if filename not in built_assets:
+        return jsonify({'error': 'Not found'}), 404
+    dist = os.path.join(app.static_folder, 'dist')
+    mimetype = mimetypes.guess_type(filename)[0]
+    max_age = 365 * 24 * 3600
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        path = safe_join(dist, filename + suffix)
+        if request.accept_encodings[encoding] and path and os.path.isfile(path):
+            response = send_from_directory(dist, filename + suffix, mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(dist, filename, mimetype=mimetype, max_age=max_age)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify, fingerprint and precompress static/ into static/dist (restart the app afterwards)."""
+    def report(name, built, size, minified):
+        click.echo(f'  {name} -> {built} ({size} -> {minified} bytes)')
+
+    manifest = build_assets(app.static_folder, report)
+    click.echo(f'Built {len(manifest)} assets into {os.path.join(app.static_folder, "dist")}')
+
 @app.route('/level/<int:level_number>')
 def level(level_number):
     progress = get_user_progress(current_user.id)
@@ -426,32 +662,202 @@ def level(level_number):
         return redirect(url_for('level', level_number=progress.current_level))
     
     level_data = LEVEL_SECTIONS.get(level_number, {})
-    return render_template(f'challenges/level_{level_number}.html', 
-                         level=level_number,
-                         level_data=level_data)
+    # The page carries the player state, so it needs no follow-up requests
+    state = player_state(current_user.id, progress)
+    values = {'username': escape(current_user.username), 'state_json': htmlsafe_json_dumps(state)}
+
+    def render(user, slots):
+        return render_template(f'challenges/level_{level_number}.html', 
+                             level=level_number,
+                             level_data=level_data,
+                             current_user=user,
+                             state_json=slots['state_json'],
+                             quote_index=quote)
+
+    quote = sidebar_quote(level_number)
+    response = make_response(cached_page(('level', level_number, quote), level_number,
+                                         ('base.html', 'challenges/level_base.html',
+                                          f'challenges/level_{level_number}.html'),
+                                         values, render))
+    # The clock stays out of the page (and its ETag) so an unchanged page is a 304;
+    # the page's script reads it from Server-Timing
+    now = time.time()
+    response.headers['X-Server-Time'] = f'{now:.3f}'
+    response.headers['Server-Timing'] = f'clock;desc="{now:.3f}"'
+    return response
+
+# Level and hint pages rendered once per level, see render_cache.py
+page_cache = RenderCache()
+
+def template_stamp(names):
+    return tuple(os.stat(os.path.join(app.root_path, app.template_folder, name)).st_mtime_ns for name in names)
+
+def sidebar_quote(level):
+    # One of the five quotes in base.html's sidebar, fixed per team and level
+    # so the page can be cached and revalidated
+    return (current_user.id + level) % 5
+
+def cached_page(key, level, templates, values, render):
+    """Serve a page from page_cache with `values` (already escaped) in its slots.
+
+    render(user, slots) renders the page for the given current_user, with
+    slots[name] where each value goes. Pages with flashed messages are
+    rendered in full, those messages belong to this request only.
+    """
+    if session.get('_flashes'):
+        return render(current_user, values)
+
+    # Sidebar of a level or hint page: the player is on that level
+    placeholder = CachedUser(id=current_user.id, username=slot('username'), current_level=level)
+    page = page_cache.get(key, template_stamp(templates),
+                          lambda: render(placeholder, {name: slot(name) for name in values}))
+    gzipped = request.accept_encodings['gzip'] > 0
+    response = Response(page.gzip(values) if gzipped else page.body(values), mimetype='text/html')
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    # Strong, and different per encoding as the bytes differ
+    response.set_etag(page.etag(values) + ('-gzip' if gzipped else ''))
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def page_for(progress):
+    """URL of the page a player belongs on, without the redirects through level()."""
+    if progress.at_hint:
+        return url_for('location_hint', level=progress.current_level)
+    return url_for('level', level_number=progress.current_level)
+
+def player_state(user_id, progress=None):
+    """Everything a level page needs, from the in-memory caches only."""
+    progress = progress or get_user_progress(user_id)
+    level = progress.current_level
+    section = LEVEL_SECTIONS.get(level, {})
+    hint = LOCATION_HINTS.get(level, {})
+    riddle = riddle_manager.current_riddle(user_id, level)
+    info = catalog.level_info(level)
+    timer = level_times.get(user_id).get(level)
+    return {
+        'level': level,
+        'page': page_for(progress),
+        'at_hint': progress.at_hint,
+        'completed_levels': sorted(progress.completed_levels),
+        # Never the flag or the location code
+        'section': {key: section[key] for key in ('title', 'description', 'curl_command') if key in section},
+        'level_info': info.public if info else None,
+        'location_hint': {'title': hint.get('title', ''), 'description': hint.get('description', '')}
+                         if progress.at_hint else None,
+        'riddle': {'riddle': riddle['riddle'], 'hint': riddle['hint']} if riddle else None,
+        'timer': {'start': timer.start_time.timestamp(), 'end': timer.end_time.timestamp() if timer.end_time else None}
+                 if timer else {'start': None, 'end': None},
+    }
+
+@app.route('/api/state')
+@login_required
+def api_state():
+    """The player's state in one response, revalidated by ETag.
+
+    The clock is in the X-Server-Time header rather than the body, so the
+    body (and its ETag) only changes when the state does.
+    """
+    body = json.dumps(player_state(current_user.id), separators=(',', ':'), sort_keys=True).encode('utf-8')
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.headers['X-Server-Time'] = f'{time.time():.3f}'
+    return response.make_conditional(request)
+
+def load_standings():
+    # Queued writes first, so a re-read doesn't roll back this worker's own updates
+    user_writes.flush()
+    rows = db.session.query(User.id, User.username, User.current_level, User.submission_time,
+                            User.qr_scan_time, User.first_scan_time)
+    return [Standing(*row) for row in rows]
+
+ranking = Leaderboard(load_standings, app.config['LEADERBOARD_MAX_AGE'])
+
+def refresh_ranking():
+    with app.app_context():
+        ranking.refresh()
+
+# Live ranking changes for the leaderboard page, see broadcast.py
+ranking_updates = Broadcaster('ranking', max_rate=app.config['LEADERBOARD_PUSH_RATE'],
+                              poll=refresh_ranking, poll_interval=app.config['LEADERBOARD_MAX_AGE'])
+
+def publish_standing(standing, rank):
+    ranking_updates.publish(standing.user_id, {
+        'id': standing.user_id,
+        'username': standing.username,
+        'rank': rank,
+        'current_level': standing.current_level,
+        'submission_time': standing.formatted_submission_time,
+        'qr_scan_time': standing.formatted_qr_scan_time,
+        'first_scan_time': standing.formatted_first_scan_time
+    })
+
+ranking.on_change = publish_standing
+
+def leaderboard_page():
+    """Return the (after cursor, limit) arguments of a leaderboard request."""
+    after = request.args.get('after')
+    limit = min(request.args.get('limit', app.config['LEADERBOARD_PAGE_SIZE'], type=int), 500)
+    return after, max(limit, 1)
+
+def leaderboard_fragment(after, limit):
+    """Return (rendered rows, next cursor) of a page, cached until the ranking changes."""
+    def render_rows():
+        rows, next_cursor = ranking.page(after, limit)
+        return render_template('leaderboard_rows.html', rows=rows), next_cursor
+
+    return ranking.fragment(('rows', after, limit), render_rows)
 
 @app.route('/leaderboard')
 @login_required
 def leaderboard():
-    users = User.query.order_by(User.first_scan_time.asc()).all()
-    for user in users:
-        # Format times for display
-        if user.submission_time:
-            user.formatted_submission_time = user.submission_time.strftime('%Y-%m-%d %H:%M:%S')
-        else:
-            user.formatted_submission_time = "Not submitted"
-            
-        if user.qr_scan_time:
-            user.formatted_qr_scan_time = user.qr_scan_time.strftime('%Y-%m-%d %H:%M:%S')
-        else:
-            user.formatted_qr_scan_time = "Not scanned"
-            
-        if user.first_scan_time:
-            user.formatted_first_scan_time = user.first_scan_time.strftime('%Y-%m-%d %H:%M:%S')
-        else:
-            user.formatted_first_scan_time = "Not started"
-            
-    return render_template('leaderboard.html', users=users)
+    after, limit = leaderboard_page()
+    rows_html, next_cursor = leaderboard_fragment(after, limit)
+    return render_template('leaderboard.html', rows_html=rows_html, next_cursor=next_cursor, limit=limit,
+                           total=len(ranking), flags=ranking.flags, my_rank=ranking.rank(current_user.id))
+
+@app.route('/leaderboard/rows')
+@login_required
+def leaderboard_rows():
+    """The table rows of a leaderboard page, re-fetched by the page when teams move."""
+    return leaderboard_fragment(*leaderboard_page())[0]
+
+@app.route('/leaderboard/stream')
+@login_required
+def leaderboard_stream():
+    """Server-Sent Events stream of ranking changes, at most LEADERBOARD_PUSH_RATE messages a second."""
+    last_seq = request.headers.get('Last-Event-ID', type=int)
+    return Response(ranking_updates.subscribe(last_seq), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/leaderboard')
+@login_required
+def leaderboard_api():
+    """Keyset-paginated ranking: ?after=<cursor>&limit=<n>, the first page is the top n."""
+    after, limit = leaderboard_page()
+
+    def serialise():
+        rows, next_cursor = ranking.page(after, limit)
+        return {
+            'rows': [{
+                'rank': rank,
+                'username': standing.username,
+                'current_level': standing.current_level,
+                'submission_time': standing.formatted_submission_time,
+                'qr_scan_time': standing.formatted_qr_scan_time,
+                'first_scan_time': standing.formatted_first_scan_time
+            } for rank, standing in rows],
+            'next': next_cursor,
+            'total': len(ranking),
+            'version': ranking.version
+        }
+
+    page = ranking.fragment(('api', after, limit), serialise)
+    return jsonify(dict(page, my_rank=ranking.rank(current_user.id)))
 
 @app.route('/check_flag/<int:level>', methods=['POST'])
 def check_flag(level):
@@ -465,13 +871,16 @@ def check_flag(level):
     if level not in LEVEL_FLAGS:
         return jsonify({'success': False, 'message': 'Invalid level'})
     
+    log_attempt('flag', level, submitted_flag == LEVEL_FLAGS[level])
     if submitted_flag == LEVEL_FLAGS[level]:
         # Record submission time if not already set
         if not current_user.submission_time:
-            current_user.submission_time = datetime.now(pytz.UTC)
-            db.session.commit()
+            first_submission = {'submission_time': datetime.now(pytz.UTC)}
+            stamp_user(current_user.id, set_once=first_submission)
+            ranking.update(current_user.id, set_once=first_submission)
             
         progress.at_hint = True  # Mark that user should be at hint page
+        save_user_progress(current_user.id, progress, 'flag_accepted')
         return jsonify({
             'success': True,
             'message': 'Flag correct! Proceed to find the location.',
@@ -492,13 +901,19 @@ def level_complete(level):
         return redirect(url_for('level', level_number=get_user_progress(current_user.id).current_level))
     
     if request.method == 'POST':
+        # The riddle may have been assigned by another worker since this one cached it
+        progress_store.invalidate(current_user.id)
         answer = request.form.get('answer', '').strip()
-        if riddle_manager.check_answer(current_user.id, answer):
+        solved = riddle_manager.check_answer(current_user.id, answer)
+        log_attempt('riddle', level, solved)
+        if solved:
             # Clear the riddle and progress to next level
             riddle_manager.clear_riddle(current_user.id)
             progress = get_user_progress(current_user.id)
             progress.current_level = level + 1
-            db.session.commit()
+            save_user_progress(current_user.id, progress, 'level_completed')
+            stamp_user(current_user.id, current_level=progress.current_level)
+            ranking.update(current_user.id, current_level=progress.current_level)
             flash('Congratulations! You\'ve completed this level!', 'success')
             
             # If user completed level 5, redirect to congratulations page
@@ -507,19 +922,17 @@ def level_complete(level):
                 
             return redirect(url_for('level', level_number=level + 1))
         else:
-            riddle = riddle_manager.user_riddles[current_user.id]['current_riddle']['riddle']
+            riddle = riddle_manager.current_riddle(current_user.id, level) \
+                or riddle_manager.assign_riddle(current_user.id, level)
+            riddle = riddle['riddle']
             flash('Incorrect answer. Try again!', 'error')
             return render_template('riddle.html', level=level, riddle=riddle, 
                                 error="Incorrect answer. Try again!")
 
-    # Check if user already has a riddle assigned
-    if current_user.id in riddle_manager.user_riddles and \
-       riddle_manager.user_riddles[current_user.id].get('level') == level:
-        riddle = riddle_manager.user_riddles[current_user.id]['current_riddle']['riddle']
-    else:
-        # Assign a new riddle for this level
-        riddle_data = riddle_manager.assign_riddle(current_user.id, level)
-        riddle = riddle_data['riddle']
+    # Keep the riddle already assigned for this level, or assign a new one
+    riddle = riddle_manager.current_riddle(current_user.id, level) \
+        or riddle_manager.assign_riddle(current_user.id, level)
+    riddle = riddle['riddle']
     
     return render_template('riddle.html', level=level, riddle=riddle)
 
@@ -532,284 +945,205 @@ def commands():
 def execute_command():
     data = request.get_json()
     command = data.get('command')
-    cwd = data.get('cwd', '/home/user')
+    cwd = data.get('cwd')
+    current_level = get_user_progress(current_user.id).current_level
+    level = int(data.get('level', current_level))
     
-    if not command:
+    if not command and not data.get('more'):
         return jsonify({'error': 'No command provided'})
 
+    if level < 1 or level > current_level:
+        return jsonify({'error': 'Level not unlocked yet'})
+
     try:
-        # Split command into parts
-        parts = shlex.split(command)
-        cmd = parts[0]
-        args = parts[1:] if len(parts) > 1 else []
-
-        # Handle built-in commands
-        if cmd == 'cd':
-            if not args:
-                new_cwd = '/home/user'
-            else:
-                new_cwd = os.path.abspath(os.path.join(cwd, args[0]))
-            return jsonify({
-                'output': '',
-                'cwd': new_cwd
-            })
-        
-        # Execute command in sandbox environment
-        result = sandbox.execute_command(cmd, args, cwd)
-        
-        return jsonify({
-            'output': result.stdout,
-            'error': result.stderr if result.returncode != 0 else None,
-            'cwd': result.cwd
-        })
+        # {"more": true} fetches the next page of the previous command's output
+        if command:
+            result = sandbox.execute_command(command, level, current_user.id, cwd)
+        else:
+            result = sandbox.more_output(level, current_user.id)
+        return jsonify(command_response(result))
 
     except Exception as e:
         return jsonify({'error': str(e)})
 
 @app.route('/tab_complete', methods=['POST'])
+@login_required
 def tab_complete():
     data = request.get_json()
     partial = data.get('partial', '')
-    cwd = data.get('cwd', '/home/user')
+    cwd = data.get('cwd')
+    current_level = get_user_progress(current_user.id).current_level
+    level = int(data.get('level', current_level))
+
+    if level < 1 or level > current_level:
+        return jsonify({'error': 'Level not unlocked yet'})
 
     try:
         # Get possible completions based on current directory and partial input
-        completions = sandbox.get_completions(partial, cwd)
+        completions = sandbox.get_completions(partial, level, current_user.id, cwd)
         return jsonify({'matches': completions})
     except Exception as e:
         return jsonify({'error': str(e)})
 
+def command_response(result):
+    return {
+        'output': result.stdout,
+        'error': result.stderr if result.returncode != 0 else None,
+        'cwd': result.cwd,
+        'more': result.more
+    }
+
+# Terminal channels: authenticate once, then commands go over the channel token
+terminal_channels = ChannelRegistry()
+
+@app.route('/terminal/<int:level>/channel', methods=['POST'])
+@login_required
+def open_terminal_channel(level):
+    if level < 1 or level > get_user_progress(current_user.id).current_level:
+        return jsonify({'error': 'Level not unlocked yet'}), 403
+
+    timer = level_times.get(current_user.id).get(level)
+    channel = terminal_channels.open(current_user.id, level, timer.start_time if timer and timer.running else None)
+    return jsonify({
+        'token': channel.token,
+        'events': url_for('terminal_events', token=channel.token),
+        'send': url_for('terminal_send', token=channel.token),
+        'cwd': sandbox.sessions.get((current_user.id, level), level).cwd
+    })
+
+def channel_time_spent(channel):
+    if channel.started_at is None:
+        return "Not started"
+    started_at = channel.started_at
+    if started_at.tzinfo is None:
+        started_at = pytz.UTC.localize(started_at)
+    return format_duration((datetime.now(pytz.UTC) - started_at).total_seconds())
+
+@app.route('/terminal/channel/<token>/events')
+def terminal_events(token):
+    """Server-Sent Events stream of command replies, completions and timer ticks."""
+    channel = terminal_channels.get(token)
+    if channel is None:
+        return jsonify({'error': 'Unknown channel'}), 404
+    interval = app.config['TERMINAL_TIMER_INTERVAL']
+
+    def stream():
+        yield 'retry: 2000\n\n'
+        next_tick = 0
+        while True:
+            now = time.monotonic()
+            if now >= next_tick:
+                yield format_event('timer', {'time_spent': channel_time_spent(channel)})
+                next_tick = now + interval
+                # A live stream keeps its channel from expiring
+                terminal_channels.get(token)
+            item = channel.next_event(next_tick - now)
+            if item is not None:
+                yield format_event(*item)
+                if item[0] == 'close':
+                    return
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/terminal/channel/<token>', methods=['POST'])
+def terminal_send(token):
+    """Run a command or completion on the channel's session.
+
+    The reply goes to the event stream, or into the response with ?sync=1
+    for clients that cannot keep a stream open.
+    """
+    channel = terminal_channels.get(token)
+    if channel is None:
+        return jsonify({'error': 'Unknown channel'}), 404
+
+    data = request.get_json(silent=True) or {}
+    kind = data.get('type', 'command')
+    message_id = data.get('id')
+    try:
+        if kind == 'command':
+            result = sandbox.execute_command(data.get('command', ''), channel.level, channel.user_id)
+            payload = command_response(result)
+        elif kind == 'more':
+            # Next page of the last command's output, delivered as a command reply
+            kind = 'command'
+            payload = command_response(sandbox.more_output(channel.level, channel.user_id))
+        elif kind == 'complete':
+            payload = {'matches': sandbox.get_completions(data.get('partial', ''), channel.level, channel.user_id)}
+        elif kind == 'close':
+            terminal_channels.close(token)
+            return jsonify({'closed': True})
+        else:
+            return jsonify({'error': f'Unknown message type: {kind}'}), 400
+    except Exception as e:
+        payload = {'error': str(e)}
+
+    if 'sync' in request.args:
+        return jsonify(dict(payload, id=message_id))
+    channel.push(kind, payload, message_id)
+    return jsonify({'queued': message_id}), 202
+
+def system_level(default):
+    """The ?level= of a process/socket poll, or None when the player hasn't reached it."""
+    level = request.args.get('level', default, type=int)
+    if level < 1 or level > get_user_progress(current_user.id).current_level:
+        return None
+    return level
+
 @app.route('/get_processes', methods=['GET'])
+@login_required
 def get_processes():
-    """Get process information for level 4"""
+    """Process table of a level (4 unless ?level= says otherwise) as the player's terminal sees it"""
+    level = system_level(4)
+    if level is None:
+        return jsonify({'error': 'Level not unlocked yet'}), 403
     try:
-        processes = sandbox.get_process_list()
-        return jsonify(processes)
+        return precomputed_response(*sandbox.get_process_list(level, current_user.id))
     except Exception as e:
         return jsonify({'error': str(e)})
 
 @app.route('/get_network_stats', methods=['GET'])
+@login_required
 def get_network_stats():
-    """Get network statistics for level 5"""
+    """Socket table of a level (5 unless ?level= says otherwise) as the player's terminal sees it"""
+    level = system_level(5)
+    if level is None:
+        return jsonify({'error': 'Level not unlocked yet'}), 403
     try:
-        stats = sandbox.get_network_stats()
-        return jsonify(stats)
+        return precomputed_response(*sandbox.get_network_stats(level, current_user.id))
     except Exception as e:
         return jsonify({'error': str(e)})
 
-class CommandResult:
-    def __init__(self, stdout="", stderr="", returncode=0):
-        self.stdout = stdout
-        self.stderr = stderr
-        self.returncode = returncode
-
 class BashCompiler:
-    def __init__(self):
-        self.command_history = []
-
-    def execute_command(self, command, level):
-        base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "challenges/bash_compiler")
-
-        # Level 1 - File Explorer
-        if level == 1:
-            # Basic file listing
-            if command == "ls":
-                return self.CommandResult(stdout="Documents/  Downloads/  Pictures/  README.txt  hello.sh")
-            elif command == "ls -a":
-                return self.CommandResult(stdout=".  ..  .bash_history  .bashrc  .hidden_flag.txt  Documents/  Downloads/  Pictures/  README.txt  hello.sh")
-            elif command == "ls -l":
-                return self.CommandResult(stdout="""total 28
-drwxr-xr-x 2 user user 4096 Jan 18 05:55 Documents
-drwxr-xr-x 2 user user 4096 Jan 18 05:55 Downloads
-drwxr-xr-x 2 user user 4096 Jan 18 05:55 Pictures
--rw-r--r-- 1 user user  158 Jan 18 05:55 README.txt
--rwxr-xr-x 1 user user  237 Jan 18 05:55 hello.sh""")
-            elif command == "ls -la":
-                return self.CommandResult(stdout="""total 48
-drwxr-xr-x 6 user user 4096 Jan 18 05:55 .
-drwxr-xr-x 3 user user 4096 Jan 18 05:55 ..
--rw------- 1 user user    0 Jan 18 05:55 .bash_history
--rw-r--r-- 1 user user  220 Jan 18 05:55 .bashrc
--rw-r--r-- 1 user user   52 Jan 18 05:55 .hidden_flag.txt
-drwxr-xr-x 2 user user 4096 Jan 18 05:55 Documents
-drwxr-xr-x 2 user user 4096 Jan 18 05:55 Downloads
-drwxr-xr-x 2 user user 4096 Jan 18 05:55 Pictures
--rw-r--r-- 1 user user  158 Jan 18 05:55 README.txt
--rwxr-xr-x 1 user user  237 Jan 18 05:55 hello.sh""")
-            
-            # Directory listings
-            elif command == "ls Documents":
-                return self.CommandResult(stdout="notes.txt  project.md")
-            elif command == "ls Downloads":
-                return self.CommandResult(stdout="archive.zip  data.csv")
-            elif command == "ls Pictures":
-                return self.CommandResult(stdout="profile.jpg  screenshot.png")
-            
-            # File contents
-            elif command == "cat README.txt":
-                return self.CommandResult(stdout="Welcome to Level 1!\nTry using different ls commands to find hidden files.\nHint: Some files might be hidden with a dot (.)")
-            elif command == "cat hello.sh":
-                return self.CommandResult(stdout="""#!/bin/bash
-# QuickSnatch Bash Challenge Level 1
-# Find the hidden flag!
+    """Terminal emulator used by the level terminals (see the emulator package)."""
 
-echo "Welcome to Level 1"
-echo "Can you find the hidden flag?"
+    def __init__(self):
+        self.sessions = SessionManager()
 
-# Hidden flag: QUICK{b4sh_c0mp1l3r_b3g1nn3r}
+    def execute_command(self, command, level, user_id, cwd=None):
+        shell = self.sessions.get((user_id, level), level)
+        if cwd:
+            shell.cwd = cwd
+        return shell.execute(command)
 
-function check_flag() {
-    echo "Checking for flag..."
-}
+    def more_output(self, level, user_id):
+        """Next page of the output of the session's last command"""
+        return self.sessions.get((user_id, level), level).more()
 
-check_flag""")
-            elif command == "cat .hidden_flag.txt":
-                return self.CommandResult(stdout="Good job finding this hidden file!\nThe flag is: QUICK{b4sh_c0mp1l3r_b3g1nn3r}")
-            elif command == "cat .bashrc":
-                return self.CommandResult(stdout=r"""# ~/.bashrc
-alias ls='ls --color=auto'
-alias grep='grep --color=auto'
-PS1='[\u@\h \W]\$ '""")
-            
-            # Navigation and info commands
-            elif command == "pwd":
-                return self.CommandResult(stdout="/home/user")
-            elif command == "whoami":
-                return self.CommandResult(stdout="user")
-            elif command == "id":
-                return self.CommandResult(stdout="uid=1000(user) gid=1000(user) groups=1000(user)")
-            elif command == "date":
-                return self.CommandResult(stdout="Sat Jan 18 05:55:53 IST 2025")
-            elif command == "help":
-                return self.CommandResult(stdout="""Available commands:
-ls          - List directory contents
-ls -a       - List all files including hidden
-ls -l       - List files in long format
-ls -la      - List all files in long format
-cat         - Display file contents
-pwd         - Print working directory
-whoami      - Print current user
-id          - Print user ID info
-date        - Show current date/time""")
-            elif command == "clear":
-                return self.CommandResult(stdout="")
-            
-            # Error cases
-            elif command.startswith("cd "):
-                return self.CommandResult(stderr="cd: Permission denied", returncode=1)
-            elif command.startswith("rm "):
-                return self.CommandResult(stderr="rm: Permission denied", returncode=1)
-            elif command.startswith("mv "):
-                return self.CommandResult(stderr="mv: Permission denied", returncode=1)
-            elif command.startswith("cp "):
-                return self.CommandResult(stderr="cp: Permission denied", returncode=1)
-            elif command.startswith("mkdir "):
-                return self.CommandResult(stderr="mkdir: Permission denied", returncode=1)
-            elif command.startswith("touch "):
-                return self.CommandResult(stderr="touch: Permission denied", returncode=1)
-            else:
-                return self.CommandResult(stderr=f"Command not found: {command}", returncode=1)
-
-        # Level 2 - Permissions
-        elif level == 2:
-            if command == "ls":
-                return self.CommandResult(stdout="instructions.txt  permissions_info.txt  secret.txt")
-            elif command == "ls -l":
-                return self.CommandResult(stdout="""total 16
--rw-r--r-- 1 user user  158 Jan 18 05:55 instructions.txt
--rw-r--r-- 1 user user  237 Jan 18 05:55 permissions_info.txt
--rw------- 1 user user   21 Jan 18 05:55 secret.txt""")
-            elif command == "cat instructions.txt":
-                return self.CommandResult(stdout="""Welcome to Level 2!
-You need to understand file permissions to proceed.
-Check permissions_info.txt for more details.""")
-            elif command == "cat permissions_info.txt":
-                return self.CommandResult(stdout="""File permissions in Linux:
-r (read) = 4
-w (write) = 2
-x (execute) = 1
-
-Example: chmod 644 file
-6 (rw-) for owner
-4 (r--) for group
-4 (r--) for others""")
-            elif command == "chmod 644 secret.txt":
-                return self.CommandResult(stdout="")
-            elif command == "cat secret.txt":
-                if "chmod 644 secret.txt" in self.command_history:
-                    return self.CommandResult(stdout="flag{chmod_master}")
-                else:
-                    return self.CommandResult(stderr="Permission denied", returncode=1)
-
-        # Level 3 - Log Explorer
-        elif level == 3:
-            if command == "ls":
-                return self.CommandResult(stdout="logs  system.log")
-            elif command == "ls logs":
-                return self.CommandResult(stdout="error.log  access.log  debug.log")
-            elif command == "cat logs/error.log":
-                return self.CommandResult(stdout="""[ERROR] 14:30:00 - Critical system failure
-[ERROR] 14:30:15 - Database connection lost
-[ERROR] 14:30:30 - flag{grep_master_123} - Authentication failed
-[ERROR] 14:30:45 - Memory allocation error""")
-            elif command == "cat logs/access.log":
-                return self.CommandResult(stdout="""192.168.1.100 - - [16/Jan/2025:14:30:00 +0530] "GET /admin HTTP/1.1" 403 287
-192.168.1.101 - - [16/Jan/2025:14:30:15 +0530] "POST /login HTTP/1.1" 401 401
-192.168.1.102 - - [16/Jan/2025:14:30:30 +0530] "GET /flag HTTP/1.1" 404 289""")
-            elif command == "cat logs/debug.log":
-                return self.CommandResult(stdout="""DEBUG: Initializing system components...
-DEBUG: Loading configuration from /etc/config.json
-DEBUG: Starting background services
-DEBUG: flag{grep_master_123} found in memory
-DEBUG: Cleanup routine started""")
-            elif command == "grep -r flag logs":
-                return self.CommandResult(stdout="""logs/error.log:[ERROR] 14:30:30 - flag{grep_master_123} - Authentication failed
-logs/debug.log:DEBUG: flag{grep_master_123} found in memory""")
-
-        # Level 4 - Process Hunter
-        elif level == 4:
-            if command == "ps aux":
-                return self.CommandResult(stdout="""USER       PID %CPU %MEM    VSZ   RSS TTY      STAT START   TIME COMMAND
-root         1  0.0  0.0   2384   668 ?        Ss   14:30   0:00 /sbin/init
-root       423  0.0  0.0   2880   712 ?        S    14:30   0:00 sshd
-user      1234  0.0  0.1   5984  1024 pts/0    S+   14:30   0:00 suspicious_process
-user      1337  0.0  0.1  10240  1024 pts/0    S+   14:30   0:00 flag_service""")
-            elif command == "cat /proc/1337/cmdline":
-                return self.CommandResult(stdout="flag_service--secret--flag=flag{process_hunter}")
-            elif command == "strings /proc/1337/environ":
-                return self.CommandResult(stdout="""SHELL=/bin/bash
-PWD=/home/user
-FLAG=flag{process_hunter}
-PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin""")
-
-        # Level 5 - Network Ninja
-        elif level == 5:
-            if command == "netstat -tuln":
-                return self.CommandResult(stdout="""Active Internet connections (only servers)
-Proto Recv-Q Send-Q Local Address           Foreign Address         State      
-tcp        0      0 0.0.0.0:22              0.0.0.0:*               LISTEN     
-tcp        0      0 0.0.0.0:1337            0.0.0.0:*               LISTEN""")
-            elif command == "nc localhost 1337" or command == "curl localhost:1337":
-                return self.CommandResult(stdout="Welcome! The flag is: flag{network_ninja}")
-
-        # Default error for unknown commands
-        return self.CommandResult(stderr=f"Command not found: {command}", returncode=1)
-
-    def get_completions(self, partial, cwd):
+    def get_completions(self, partial, level, user_id, cwd=None):
         """Get possible completions for tab completion"""
-        # Implement tab completion logic here
-        # Return list of possible completions
-        pass
+        shell = self.sessions.get((user_id, level), level)
+        if cwd:
+            shell.cwd = cwd
+        return shell.complete(partial)
 
-    def get_process_list(self):
-        """Get list of processes for level 4"""
-        # Implement process listing logic here
-        pass
+    def get_process_list(self, level, user_id):
+        """(JSON body, ETag) of the session's process table: the level's shared one until it kills something"""
+        return self.sessions.get((user_id, level), level).system.processes_json()
 
-    def get_network_stats(self):
-        """Get network statistics for level 5"""
-        # Implement network statistics logic here
-        pass
+    def get_network_stats(self, level, user_id):
+        """(JSON body, ETag) of the session's socket table"""
+        return self.sessions.get((user_id, level), level).system.sockets_json()
 
 # Initialize sandbox
 sandbox = BashCompiler()
@@ -826,8 +1160,8 @@ def get_binary_data():
     if not session.get('level') == 7:
         return jsonify({'error': 'Unauthorized'}), 403
         
-    # Generate a binary file with embedded flag
-    binary_data = generate_binary_with_flag()
+    # Binary with the embedded flag, built once per worker
+    binary_data = level_binary()
     return send_file(
         io.BytesIO(binary_data),
         mimetype='application/octet-stream'
@@ -839,110 +1173,34 @@ def analyze_binary():
         return jsonify({'error': 'Unauthorized'}), 403
         
     tool = request.json.get('tool')
-    results = []
-    
-    if tool == 'find-strings':
-        results = analyze_strings()
-    elif tool == 'check-headers':
-        results = analyze_headers()
-    elif tool == 'entropy-analysis':
-        results = analyze_entropy()
-        
-    return jsonify(results)
-
-def generate_binary_with_flag():
-    # Create a simple ELF binary structure
-    binary = bytearray()
-    
-    # ELF Header
-    binary.extend(b'\x7fELF')  # Magic number
-    binary.extend(b'\x02')     # 64-bit
-    binary.extend(b'\x01')     # Little endian
-    binary.extend(b'\x01')     # Version
-    binary.extend(b'\x00' * 9) # Padding
-    
-    # Embed the flag in a way that requires analysis
-    flag = "flag{b1n4ry_4n4ly515_pr0}"
-    encoded_flag = ''.join(chr((ord(c) + 13) % 256) for c in flag)
-    binary.extend(encoded_flag.encode())
-    
-    # Add some decoy strings
-    decoys = [
-        b"This is not the flag you're looking for",
-        b"Try harder!",
-        b"Almost there...",
-        b"Look deeper into the binary",
-        b"Remember to check the headers"
-    ]
-    
-    for decoy in decoys:
-        binary.extend(decoy)
-        binary.extend(b'\x00' * 16)
-    
-    return bytes(binary)
-
-def analyze_strings():
-    binary = generate_binary_with_flag()
-    strings = []
-    current_string = bytearray()
-    
-    for byte in binary:
-        if 32 <= byte <= 126:  # Printable ASCII
-            current_string.append(byte)
-        elif current_string:
-            if len(current_string) >= 4:  # Only include strings of 4+ chars
-                strings.append(current_string.decode())
-            current_string = bytearray()
-    
-    return [
-        {
-            'type': 'Strings Analysis',
-            'content': '\n'.join(strings)
-        }
-    ]
+    return jsonify(analyze(tool, level_binary()))
+
+def challenge_binary(name=None):
+    """Path of a binary in BINARY_DIR, the level's own binary by default; None if there is no such file."""
+    directory = app.config['BINARY_DIR']
+    if not name:
+        return materialise(BINARY_LEVEL, directory)
+    path = safe_join(directory, name)
+    return path if path and os.path.isfile(path) else None
+
+@app.route('/analyze_binary/stream', methods=['POST'])
+def analyze_binary_stream():
+    """Run a tool over a binary on disk, streaming NDJSON records (see binary_tools/stream.py)."""
+    if not session.get('level') == 7:
+        return jsonify({'error': 'Unauthorized'}), 403
 
-def analyze_headers():
-    binary = generate_binary_with_flag()
-    header_info = []
-    
-    # Basic header analysis
-    if binary.startswith(b'\x7fELF'):
-        header_info.append("File Type: ELF Binary")
-        header_info.append(f"Architecture: {'64-bit' if binary[4] == 2 else '32-bit'}")
-        header_info.append(f"Endianness: {'Little Endian' if binary[5] == 1 else 'Big Endian'}")
-    
-    return [
-        {
-            'type': 'Header Analysis',
-            'content': '\n'.join(header_info)
-        }
-    ]
+    options = request.get_json(silent=True) or {}
+    path = challenge_binary(options.get('file'))
+    if path is None:
+        return jsonify({'error': 'No such binary'}), 404
+    try:
+        window = int(options.get('window', 4096))
+        records = analyze_file(options.get('tool'), path, window, int(options.get('step', window)))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
 
-def analyze_entropy():
-    binary = generate_binary_with_flag()
-    chunk_size = 16
-    chunks = [binary[i:i+chunk_size] for i in range(0, len(binary), chunk_size)]
-    
-    entropy_data = []
-    for i, chunk in enumerate(chunks):
-        # Calculate Shannon entropy for the chunk
-        entropy = 0
-        byte_count = {}
-        for byte in chunk:
-            byte_count[byte] = byte_count.get(byte, 0) + 1
-        
-        for count in byte_count.values():
-            probability = count / len(chunk)
-            entropy -= probability * math.log2(probability)
-            
-        entropy_data.append(f"Chunk {i}: {entropy:.2f}")
-    
-    return [
-        {
-            'type': 'Entropy Analysis',
-            'content': '\n'.join(entropy_data)
-        }
-    ]
+    return Response(ndjson(records), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/terminal/<int:level>')
 @login_required
@@ -951,45 +1209,78 @@ def terminal(level):
         return redirect(url_for('level', level_number=get_user_progress(current_user.id).current_level))
     
     # Start timing for this level if not already started
-    level_time = LevelTime.query.filter_by(
-        user_id=current_user.id, 
-        level=level, 
-        end_time=None
-    ).first()
+    timer = level_times.get(current_user.id).get(level)
     
-    if not level_time:
-        level_time = LevelTime(
-            user_id=current_user.id,
-            level=level,
-            start_time=datetime.now(pytz.UTC)
-        )
-        db.session.add(level_time)
-        db.session.commit()
+    if not timer or not timer.running:
+        # This worker's cache may predate a timer another worker started, so
+        # only the database decides whether one is already running
+        open_timer = LevelTime.query.filter_by(user_id=current_user.id, level=level, end_time=None).first()
+        if open_timer is None:
+            level_time = LevelTime(
+                user_id=current_user.id,
+                level=level,
+                start_time=datetime.now(pytz.UTC)
+            )
+            db.session.add(level_time)
+            db.session.commit()
+            level_times.started(current_user.id, LevelTimer(level, level_time.start_time))
+        else:
+            level_times.invalidate(current_user.id)
     
     time_spent = current_user.format_time_spent(level)
     return render_template(f'level{level}_terminal.html', level=level, time_spent=time_spent)
 
+def timer_state(level, timer, now):
+    if timer is None:
+        return {'level': level, 'start': None, 'end': None, 'elapsed': 0, 'time_spent': "Not started"}
+    state = timer.to_dict(now)
+    state['time_spent'] = format_duration(state['elapsed'])
+    return state
+
 @app.route('/level_time/<int:level>')
 @login_required
 def level_time(level):
-    time_spent = current_user.format_time_spent(level)
-    return jsonify({'time_spent': time_spent})
+    """One level's timer; start/end are Unix epochs so the client can tick it locally."""
+    now = datetime.now(pytz.UTC)
+    state = timer_state(level, level_times.get(current_user.id).get(level), now)
+    state['server_time'] = now.timestamp()
+    return jsonify(state)
+
+@app.route('/level_times')
+@login_required
+def all_level_times():
+    """Every level's timer in one response (see static/js/level_timer.js)."""
+    now = datetime.now(pytz.UTC)
+    timers = level_times.get(current_user.id)
+    return jsonify({
+        'server_time': now.timestamp(),
+        'levels': {level: timer_state(level, timers.get(level), now) for level in range(1, 6)}
+    })
 
 @app.route('/challenges/level<int:level>/level_info.json')
 @login_required
 def level_info(level):
-    try:
-        with open(f'challenges/level{level}/level_info.json', 'r') as f:
-            return jsonify(json.load(f))
-    except FileNotFoundError:
+    entry = catalog.level_info(level)
+    if entry is None:
         return jsonify({
             'level': level,
             'title': 'Unknown Level',
             'description': 'Level information not available.',
             'prompt': 'user@quicksnatch',
-            'files': {},
             'hints': ['Level information not available']
         })
+    return catalog_response(entry)
+
+def catalog_response(entry):
+    """Serve a catalog entry's pre-serialised body, answering 304 when the ETag matches."""
+    return precomputed_response(entry.body, entry.etag)
+
+def precomputed_response(body, etag):
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/location_hint/<int:level>')
 @login_required
@@ -1005,11 +1296,18 @@ def location_hint(level):
         return redirect(url_for('level', level_number=progress.current_level))
     
     hint_data = LOCATION_HINTS.get(level, {})
-    
-    return render_template('location_hint.html', 
-                         level=level,
-                         hint_title=hint_data.get('title', ''),
-                         location_hint=hint_data.get('description', ''))
+
+    def render(user, slots):
+        return render_template('location_hint.html', 
+                             level=level,
+                             hint_title=hint_data.get('title', ''),
+                             location_hint=hint_data.get('description', ''),
+                             current_user=user,
+                             quote_index=quote)
+
+    quote = sidebar_quote(level)
+    return cached_page(('location_hint', level, quote), level, ('base.html', 'location_hint.html'),
+                       {'username': escape(current_user.username)}, render)
 
 @app.route('/verify_location/<int:level>', methods=['POST'])
 @login_required
@@ -1032,13 +1330,11 @@ def verify_location(level):
         })
     
     expected_code = hint_data['code']
+    log_attempt('location', level, submitted_code == expected_code)
     if submitted_code == expected_code:
         # Set first_scan_time and qr_scan_time if not already set
         current_time = datetime.now(pytz.UTC)
-        if not current_user.first_scan_time:
-            current_user.first_scan_time = current_time
-        current_user.qr_scan_time = current_time
-        db.session.commit()
+        first_scan = {'first_scan_time': current_time}
             
         # Mark current level as completed
         progress.completed_levels.add(level)
@@ -1046,14 +1342,22 @@ def verify_location(level):
         
         # Move to next level
         next_level = level + 1
+        if next_level <= 17:
+            progress.current_level = next_level
+        stamp_user(current_user.id, set_once=first_scan, current_level=progress.current_level,
+                   qr_scan_time=current_time)
+        ranking.update(current_user.id, set_once=first_scan, current_level=progress.current_level,
+                       qr_scan_time=current_time)
+
         if next_level > 17:
+            save_user_progress(current_user.id, progress, 'location_verified')
             return jsonify({
                 'success': True,
                 'message': 'Congratulations! You have completed all levels!',
                 'redirect': '/congratulations'
             })
             
-        progress.current_level = next_level
+        save_user_progress(current_user.id, progress, 'location_verified')
         return jsonify({
             'success': True,
             'message': f'Location verified! Moving to level {next_level}',
@@ -0,0 +1,116 @@
+"""
+Static asset build: minify, fingerprint and precompress (`flask build-assets`).
+
+Every stylesheet and script under static/ is minified, written to
+static/dist/ under a name carrying a hash of its content (css/base.1a2b3c4d5e6f.css)
+together with a .gz sibling (and a .br one when the brotli package is
+installed), and listed in static/dist/manifest.json. Templates link assets
+through `asset_url()`, which resolves names through the manifest. Because
+a changed file gets a new name, the built files can be cached forever.
+Without a build, asset_url() falls back to the plain static files.
+
+The minifiers are deliberately conservative, pure-Python passes: comments
+and indentation go, strings and line breaks that could matter stay.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # optional, only adds .br variants
+    brotli = None
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+EXTENSIONS = ('.css', '.js')
+
+# Comments before strings (an apostrophe in a comment is not a quote), then
+# strings, which are copied as they are; the rest only applies between them
+CSS_TOKENS = re.compile(r'(/\*.*?\*/)|("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')'
+                        r'|\s*;?\s*(\})\s*|\s*([{;,>])\s*|(\s+)', re.S)
+
+
+def _css_token(match) -> str:
+    comment, string, close, punctuation, space = match.groups()
+    if comment:
+        return ''
+    return string or close or punctuation or ' '
+
+
+def minify_css(source: str) -> str:
+    return CSS_TOKENS.sub(_css_token, source).strip()
+
+
+def minify_js(source: str) -> str:
+    """Drop comment-only lines, blank lines and indentation, keeping every line break.
+
+    Lines inside multi-line template literals are left exactly as they are.
+    """
+    out, in_template = [], False
+    for line in source.splitlines():
+        if in_template:
+            out.append(line)
+        else:
+            stripped = line.strip()
+            if not stripped or stripped.startswith('//'):
+                continue
+            out.append(stripped)
+        # An odd number of unescaped backticks opens or closes a template literal
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(out) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def fingerprint(name: str, content: bytes) -> str:
+    base, ext = os.path.splitext(name)
+    return f'{base}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+def write(path: str, content: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def build(static_folder: str, report=None) -> Dict[str, str]:
+    """Build every asset of `static_folder` into its dist/ folder; return the manifest."""
+    dist = os.path.join(static_folder, DIST)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist)
+        for filename in sorted(files):
+            ext = os.path.splitext(filename)[1]
+            if ext not in EXTENSIONS:
+                continue
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            with open(path, 'r', encoding='utf-8') as f:
+                content = MINIFIERS[ext](f.read()).encode('utf-8')
+            built = fingerprint(name, content)
+            target = os.path.join(dist, built)
+            write(target, content)
+            # mtime=0 keeps the .gz bytes identical between builds
+            write(target + '.gz', gzip.compress(content, 9, mtime=0))
+            if brotli is not None:
+                write(target + '.br', brotli.compress(content))
+            manifest[name] = built
+            if report:
+                report(name, built, os.path.getsize(path), len(content))
+    write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(static_folder: str) -> Optional[Dict[str, str]]:
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
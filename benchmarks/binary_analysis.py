@@ -0,0 +1,97 @@
+"""
+Binary-analysis tools: the original per-byte loops against binary_tools.
+
+Builds a multi-megabyte binary (the level's artifact padded with random
+bytes and text), checks that both implementations produce the same strings
+and entropy report, and times them. The entropy path is timed with NumPy
+when it is installed and with the pure-Python fallback either way.
+
+Usage: python benchmarks/binary_analysis.py [megabytes]
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binary_tools import analysis, level_binary  # noqa: E402
+
+
+def old_strings(binary):
+    strings = []
+    current_string = bytearray()
+    for byte in binary:
+        if 32 <= byte <= 126:
+            current_string.append(byte)
+        elif current_string:
+            if len(current_string) >= 4:
+                strings.append(current_string.decode())
+            current_string = bytearray()
+    return strings
+
+
+def old_entropy(binary, chunk_size=16):
+    chunks = [binary[i:i + chunk_size] for i in range(0, len(binary), chunk_size)]
+    entropy_data = []
+    for i, chunk in enumerate(chunks):
+        entropy = 0
+        byte_count = {}
+        for byte in chunk:
+            byte_count[byte] = byte_count.get(byte, 0) + 1
+        for count in byte_count.values():
+            probability = count / len(chunk)
+            entropy -= probability * math.log2(probability)
+        entropy_data.append(f"Chunk {i}: {entropy:.2f}")
+    return entropy_data
+
+
+def sample(megabytes):
+    rng = random.Random(7)
+    words = [b'flag', b'password', b'/bin/sh', b'GLIBC_2.2.5', b'Try harder!']
+    parts, size = [level_binary()], 0
+    while size < megabytes * 1024 * 1024:
+        part = rng.randbytes(rng.randint(16, 512)) + rng.choice(words) * rng.randint(1, 4)
+        parts.append(part)
+        size += len(part)
+    # Ends in a non-printable byte, as the original loop drops a trailing string
+    return b''.join(parts) + b'\x00'
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    data = sample(megabytes)
+    path = 'numpy' if analysis.numpy else 'pure Python (NumPy not installed, see requirements.txt)'
+    print(f'{len(data) / 1024 / 1024:.1f} MiB, the app computes entropy with {path}\n')
+
+    old, old_ms = timed(old_strings, data)
+    new, new_ms = timed(analysis.find_strings, data)
+    assert old == new
+    print(f'strings     loop {old_ms:9.1f} ms   regex {new_ms:7.1f} ms   ({len(new)} strings)')
+
+    old, old_ms = timed(old_entropy, data)
+    new, new_ms = timed(analysis.chunk_entropy, data)
+    assert old == [f"Chunk {i}: {entropy:.2f}" for i, entropy in enumerate(new)]
+    numpy, analysis.numpy = analysis.numpy, None
+    fallback, fallback_ms = timed(analysis.chunk_entropy, data)
+    analysis.numpy = numpy
+    assert old == [f"Chunk {i}: {entropy:.2f}" for i, entropy in enumerate(fallback)]
+    print(f'entropy     loop {old_ms:9.1f} ms   '
+          + (f'numpy {new_ms:7.1f} ms   ' if numpy else '') + f'counter {fallback_ms:7.1f} ms')
+
+    for tool in ('find-strings', 'check-headers', 'entropy-analysis'):
+        analysis.analyze(tool, data)
+        _, ms = timed(analysis.analyze, tool, data)
+        print(f'{tool:<17} memoised {ms * 1000:7.1f} µs')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Streaming binary analysis: time and peak Python memory per tool as the
+input grows.
+
+Writes test binaries of the given sizes (random blocks alternating with
+text), runs every tool of binary_tools.stream over them through the NDJSON
+encoder and reports the time, the number of records and, from a second
+run, the peak of Python allocations (tracemalloc). The peak should stay flat from the
+smallest to the largest file; the file itself is only mapped, never read
+into memory.
+
+Usage: python benchmarks/binary_stream.py [megabytes ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binary_tools import TOOLS, analyze_file, ndjson  # noqa: E402
+
+BLOCK = 256 * 1024
+
+
+def write_sample(path, megabytes):
+    text = (b'GLIBC_2.2.5 /lib64/ld-linux-x86-64.so.2 ' * (BLOCK // 40 + 1))[:BLOCK]
+    with open(path, 'wb') as f:
+        for i in range(megabytes * 1024 * 1024 // BLOCK):
+            f.write(os.urandom(BLOCK) if i % 2 else text)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100]
+    workdir = tempfile.mkdtemp()
+    for megabytes in sizes:
+        path = os.path.join(workdir, f'{megabytes}.bin')
+        write_sample(path, megabytes)
+        for tool in TOOLS:
+            start = time.perf_counter()
+            sent = records = 0
+            for chunk in ndjson(analyze_file(tool, path)):
+                sent += len(chunk)
+                records += chunk.count(b'\n')
+            elapsed = time.perf_counter() - start
+            # Second run for the memory peak, tracemalloc slows it down
+            tracemalloc.start()
+            for chunk in ndjson(analyze_file(tool, path)):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f'{megabytes:5} MiB  {tool:<17} {elapsed:6.2f} s  {records:8} records  '
+                  f'{sent / 1024 / 1024:7.1f} MiB sent  peak {peak / 1024:6.0f} KiB')
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Replay time of the progress journal against journal length.
+
+Simulates an event with 10k users, writes journals of increasing length
+(each user goes through flag -> location -> riddle transitions) and times
+ProgressJournal.replay(), both from the raw journal and after compaction.
+
+Usage: python benchmarks/journal_replay.py [users]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from progress_journal import ProgressJournal, PROGRESS, RIDDLE
+
+
+def fill(journal, users, records):
+    for i in range(records):
+        user_id = i % users
+        level = i // users + 1
+        if i % 3 == 2:
+            journal.append('riddle_assigned', RIDDLE, user_id,
+                           {'used_riddles': [level % 15], 'riddle_index': level % 15, 'level': level})
+        else:
+            journal.append('location_verified', PROGRESS, user_id,
+                           {'current_level': level, 'at_hint': i % 3 == 0,
+                            'completed_levels': list(range(1, level))})
+    journal.flush()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f'{"records":>10} {"journal MB":>11} {"replay ms":>10} {"compacted ms":>13} {"users":>7}')
+    for records in (10000, 50000, 100000, 250000):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = ProgressJournal(directory, compact_after=10 ** 9)
+            fill(journal, users, records)
+            size = os.path.getsize(journal.journal_path) / 1e6
+            (progress, _), replay_ms = timed(journal.replay)
+            journal.compact()
+            _, compacted_ms = timed(journal.replay)
+            journal.close()
+        print(f'{records:>10} {size:>11.1f} {replay_ms:>10.1f} {compacted_ms:>13.1f} {len(progress):>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Load test of the leaderboard push stream: memory per connected client and
+coalescing under a burst of scans.
+
+Connects N subscribers to a Broadcaster, each consumed by its own thread as
+a WSGI worker thread would, publishes scans from 500 teams as fast as
+possible for a few seconds and reports:
+
+* Python heap (tracemalloc) and RSS growth per subscriber
+* published updates against messages actually sent per subscriber
+
+The Flask request around each stream is not included.
+
+Usage: python benchmarks/leaderboard_stream.py [subscribers] [seconds]
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broadcast import Broadcaster  # noqa: E402
+
+TEAMS = 500
+
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def main():
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    threading.stack_size(256 * 1024)
+    broadcaster = Broadcaster('ranking', max_rate=4, keepalive=1.0)
+    received = [0] * subscribers
+    stop = threading.Event()
+
+    def consume(i):
+        for chunk in broadcaster.subscribe():
+            received[i] += chunk.count(b'event: ranking')
+            if stop.is_set():
+                break
+
+    tracemalloc.start()
+    heap_before, rss_before = tracemalloc.get_traced_memory()[0], rss_kb()
+    threads = [threading.Thread(target=consume, args=(i,), daemon=True) for i in range(subscribers)]
+    for thread in threads:
+        thread.start()
+    while broadcaster.subscribers < subscribers:
+        time.sleep(0.01)
+    heap_after, rss_after = tracemalloc.get_traced_memory()[0], rss_kb()
+
+    published = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        team = published % TEAMS
+        broadcaster.publish(team, {'id': team, 'rank': team + 1, 'qr_scan_time': '2025-01-17 14:30:00'})
+        published += 1
+        if published % 100 == 0:
+            time.sleep(0.001)
+    time.sleep(1.0)
+    stop.set()
+
+    print(f'subscribers              {subscribers}')
+    print(f'heap per subscriber      {(heap_after - heap_before) / subscribers / 1024:.1f} KiB')
+    print(f'RSS per subscriber       {(rss_after - rss_before) / subscribers:.1f} KiB (incl. thread stack)')
+    print(f'updates published        {published} ({published / seconds:.0f}/s)')
+    print(f'messages per subscriber  {min(received)}-{max(received)} ({broadcaster.seq} flushed)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Timer polling: database statements and latency per request.
+
+Logs in N teams that each have a timer on every level, then has every team
+fetch its timers R times: once per level through /level_time/<level> and
+once through the batch /level_times endpoint. Counts the SQL statements
+issued during each run (the first request of a team loads its timers, the
+rest come from the cache).
+
+Usage: python benchmarks/level_timing.py [teams] [rounds]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench.db')
+os.environ['PROGRESS_BACKEND'] = 'memory'
+os.environ['PROGRESS_JOURNAL_DIR'] = os.path.join(WORKDIR, 'journal')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from app import app, db, identities, level_times, passwords, LevelTime, User  # noqa: E402
+
+
+def main():
+    teams = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with app.app_context():
+        db.create_all()
+        hashed = passwords.hash('pw')
+        db.session.execute(insert(User), [{'username': f'team{i}', 'password': hashed} for i in range(teams)])
+        start = datetime(2025, 4, 20, 9, 0)
+        db.session.execute(insert(LevelTime), [
+            {'user_id': user_id, 'level': level, 'start_time': start + timedelta(minutes=level)}
+            for user_id in range(1, teams + 1) for level in range(1, 6)])
+        db.session.commit()
+
+        statements = [0]
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count(*args):
+            statements[0] += 1
+
+    clients = []
+    for i in range(teams):
+        client = app.test_client()
+        client.post('/login', data={'username': f'team{i}', 'password': 'pw'})
+        clients.append(client)
+
+    for name, paths in (('per level', [f'/level_time/{level}' for level in range(1, 6)]),
+                        ('batch', ['/level_times'])):
+        level_times.clear()
+        identities.clear()
+        statements[0] = 0
+        requests = 0
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for client in clients:
+                for path in paths:
+                    assert client.get(path).status_code == 200
+                    requests += 1
+        elapsed = time.perf_counter() - started
+        print(f'{name:<10} {requests:6} requests   {elapsed / requests * 1e6:7.0f} µs/request   '
+              f'{statements[0]:5} statements ({statements[0] / (teams * rounds):.2f} per team refresh)')
+
+
+if __name__ == '__main__':
+    main()
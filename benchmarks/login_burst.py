@@ -0,0 +1,67 @@
+"""
+Event-start login burst: 500 teams logging in at once.
+
+Creates the teams on a throwaway database, then fires all logins from a pool
+of client threads (standing in for the request threads of the workers) and
+reports how many got in, how many were turned away with 503, and the login
+latency. Run it with different PASSWORD_WORKERS / PASSWORD_QUEUE /
+BCRYPT_ROUNDS settings to size the pool.
+
+Usage: python benchmarks/login_burst.py [teams] [concurrency]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench.db')
+os.environ['PROGRESS_BACKEND'] = 'memory'
+os.environ['PROGRESS_JOURNAL_DIR'] = os.path.join(WORKDIR, 'journal')
+
+from app import app, db, passwords, User  # noqa: E402
+
+
+def login(i):
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.post('/login', data={'username': f'team{i}', 'password': 'pw'})
+    return response.status_code, time.perf_counter() - start
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0
+
+
+def main():
+    teams = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    with app.app_context():
+        db.create_all()
+        # One hash for everybody keeps the setup fast; logins still verify it in full
+        hashed = passwords.hash('pw')
+        db.session.add_all(User(username=f'team{i}', password=hashed) for i in range(teams))
+        db.session.commit()
+
+    print(f'{teams} logins, {concurrency} concurrent, {passwords.workers} hashing threads, '
+          f'queue {passwords.max_queue}, cost {passwords.rounds}')
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(login, range(teams)))
+    elapsed = time.perf_counter() - start
+
+    ok = [latency for status, latency in results if status == 302]
+    busy = [latency for status, latency in results if status == 503]
+    print(f'logged in   {len(ok):>5}   p50 {percentile(ok, 0.5) * 1000:7.0f} ms   p95 {percentile(ok, 0.95) * 1000:7.0f} ms')
+    print(f'503 busy    {len(busy):>5}   p50 {percentile(busy, 0.5) * 1000:7.0f} ms')
+    print(f'other       {len(results) - len(ok) - len(busy):>5}')
+    print(f'total       {elapsed:.1f} s ({len(ok) / elapsed:.1f} logins/s)')
+
+
+if __name__ == '__main__':
+    main()
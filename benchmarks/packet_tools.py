@@ -0,0 +1,85 @@
+"""
+Packet and hex builtins of the terminal over a large capture: paged against
+building the whole output at once.
+
+Repeats the records of the network level's capture.pcap into an N MiB
+capture, then runs `tcpdump -r -X` and `hexdump -C` over it, once collecting
+every line into one string (what a terminal reply used to be) and once page
+by page through Shell.more(). Reports the total time and peak memory of
+each, and how long the first page takes.
+
+Usage: python benchmarks/packet_tools.py [megabytes]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulator import Shell  # noqa: E402
+from emulator.parser import parse  # noqa: E402
+from emulator.shell import Run  # noqa: E402
+from emulator.vfs import Node  # noqa: E402
+
+NETWORK_LEVEL = 4
+
+
+def capture(shell, megabytes):
+    _, node = shell.lookup('capture.pcap')
+    header, records = node.data[:24], node.data[24:]
+    return header + records * max(1, int(megabytes * 1024 * 1024 // len(records)))
+
+
+def whole(shell, command):
+    # Every line of the command joined into one reply, as before paging
+    output = '\n'.join(Run(shell, parse(command)).lines)
+    return len(output), 1
+
+
+def paged(shell, command):
+    result, pages = shell.execute(command), 1
+    size = len(result.stdout)
+    while result.more:
+        result = shell.more()
+        size += len(result.stdout)
+        pages += 1
+    return size, pages
+
+
+def first_page(shell, command):
+    start = time.perf_counter()
+    shell.execute(command)
+    shell.discard()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(function, shell, command):
+    start = time.perf_counter()
+    size, pages = function(shell, command)
+    total = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    function(shell, command)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return total, peak, size, pages
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    shell = Shell(NETWORK_LEVEL)
+    data = capture(shell, megabytes)
+    shell.create('/home/user/big.pcap', Node('big.pcap', 0o644, data=data))
+    print(f'{len(data) / 1024 / 1024:.1f} MiB capture\n')
+
+    for command in ('tcpdump -r big.pcap -X', 'hexdump -C big.pcap'):
+        for name, function in (('one string', whole), ('paged', paged)):
+            total, peak, size, pages = measure(function, shell, command)
+            print(f'{command:<24} {name:<10} all {total:8.1f} ms   peak {peak:6.1f} MiB   '
+                  f'{size / 1024 / 1024:5.1f} MiB in {pages} pages')
+        print(f'{command:<24} {"paged":<10} first page {first_page(shell, command):.1f} ms\n')
+
+
+if __name__ == '__main__':
+    main()
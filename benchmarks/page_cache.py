@@ -0,0 +1,64 @@
+"""
+Level and hint pages: full Jinja render per request against the render
+cache (render_cache.py), plain and gzipped.
+
+Logs one team in, parks it on level 1 (and then on its location hint) and
+requests the page R times per mode. "full render" defeats the cache by
+changing the template stamp on every request.
+
+Usage: python benchmarks/page_cache.py [requests]
+"""
+
+import gzip
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench.db')
+os.environ['PROGRESS_BACKEND'] = 'memory'
+os.environ['PROGRESS_JOURNAL_DIR'] = os.path.join(WORKDIR, 'journal')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+import app as quicksnatch  # noqa: E402
+
+
+def measure(client, path, requests, headers):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - start) / requests * 1000, response
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app = quicksnatch.app
+    with app.app_context():
+        quicksnatch.db.create_all()
+    client = app.test_client()
+    client.post('/register', data={'username': 'team1', 'password': 'pw', 'confirm_password': 'pw'})
+    client.post('/login', data={'username': 'team1', 'password': 'pw'})
+
+    stamp = quicksnatch.template_stamp
+    counter = itertools.count()
+    for path in ('/level/1', '/location_hint/1'):
+        if path.startswith('/location_hint'):
+            client.post('/check_flag/1', json={'flag': quicksnatch.LEVEL_SECTIONS[1]['flag']})
+        for mode in ('full render', 'cached'):
+            quicksnatch.template_stamp = (lambda names: next(counter)) if mode == 'full render' else stamp
+            for encoding in ('identity', 'gzip'):
+                ms, response = measure(client, path, requests, {'Accept-Encoding': encoding})
+                size = len(response.data)
+                if encoding == 'gzip':
+                    assert gzip.decompress(response.data)
+                print(f'{path:<18} {mode:<12} {encoding:<9} {ms:7.2f} ms/request   {size:6} bytes')
+    quicksnatch.template_stamp = stamp
+
+
+if __name__ == '__main__':
+    main()
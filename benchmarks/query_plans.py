@@ -0,0 +1,112 @@
+"""
+Query plans and timings of the hot LevelTime / User lookups, with and
+without the indexes from database migration d5a8e1f04b27.
+
+Fills a throwaway database with N teams and their level timers, prints the
+SQLite connection settings, then for each query the EXPLAIN QUERY PLAN and
+the time per call, first with the indexes and again after dropping them.
+With the indexes every plan must say "USING INDEX" and none may need a
+"TEMP B-TREE" for sorting.
+
+Usage: python benchmarks/query_plans.py [teams] [timers_per_team]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench.db')
+os.environ['PROGRESS_BACKEND'] = 'memory'
+os.environ['PROGRESS_JOURNAL_DIR'] = os.path.join(WORKDIR, 'journal')
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import app, db, LevelTime, User  # noqa: E402
+
+INDEXES = {
+    'ix_level_time_user_level_start': 'CREATE INDEX ix_level_time_user_level_start '
+                                      'ON level_time (user_id, level, start_time)',
+    'ix_user_first_scan_time': 'CREATE INDEX ix_user_first_scan_time ON user (first_scan_time)',
+}
+
+
+def queries(user_id):
+    return {
+        'get_level_time': LevelTime.query.filter_by(user_id=user_id, level=3)
+                                         .order_by(LevelTime.start_time.desc()).limit(1),
+        'open level timer': LevelTime.query.filter_by(user_id=user_id, level=3, end_time=None).limit(1),
+        'ranking by first scan': db.session.query(User.id, User.first_scan_time)
+                                           .order_by(User.first_scan_time).limit(100),
+        'not scanned yet': db.session.query(db.func.count(User.id)).filter(User.first_scan_time.is_(None)),
+    }
+
+
+def explain(query):
+    compiled = query.statement.compile(db.engine)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params)
+    return [row[-1] for row in rows]
+
+
+def timed(make_query, users, calls=2000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        make_query(random.randint(1, users)).all()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def report(users):
+    for name in queries(1):
+        print(f'  {name}')
+        for line in explain(queries(1)[name]):
+            print(f'      {line}')
+        print(f'      {timed(lambda user_id: queries(user_id)[name], users):8.1f} µs/query')
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    timers = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    random.seed(1)
+    with app.app_context():
+        db.create_all()
+        start = datetime(2025, 4, 20, 9, 0)
+        db.session.execute(insert(User), [
+            {'username': f'team{i}', 'password': b'x',
+             'first_scan_time': start + timedelta(seconds=random.randint(0, 7200)) if i % 4 else None}
+            for i in range(users)])
+        db.session.execute(insert(LevelTime), [
+            {'user_id': user_id, 'level': 1 + n % 5, 'start_time': start + timedelta(minutes=n),
+             'end_time': start + timedelta(minutes=n + 1) if n < timers - 5 else None}
+            for user_id in range(1, users + 1) for n in range(timers)])
+        db.session.commit()
+
+        connection = db.session.connection()
+        print(' '.join(f'{pragma}={connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()}'
+                       for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size')))
+        print(f'{users} teams, {users * timers} level timers\n')
+
+        print('with indexes')
+        report(users)
+
+        for name in INDEXES:
+            db.session.execute(db.text(f'DROP INDEX {name}'))
+        db.session.commit()
+        # Fresh connections: pysqlite's statement cache would replay the old plans
+        db.session.close()
+        db.engine.dispose()
+        print('\nwithout indexes')
+        report(users)
+
+        for sql in INDEXES.values():
+            db.session.execute(db.text(sql))
+        db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
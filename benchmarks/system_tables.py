@@ -0,0 +1,75 @@
+"""
+Process and socket polling: rebuilding the table per request against the
+precomputed JSON of emulator/system.py.
+
+Logs one team in and polls /get_processes?level=1 R times per mode:
+"rebuild" turns the level's process metadata into rows and serialises them
+on every request, "precomputed" serves the shared body, "304" revalidates
+it by ETag, and "after kill" serves the session's own derived table.
+
+Usage: python benchmarks/system_tables.py [requests]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench.db')
+os.environ['PROGRESS_BACKEND'] = 'memory'
+os.environ['PROGRESS_JOURNAL_DIR'] = os.path.join(WORKDIR, 'journal')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+import app as quicksnatch  # noqa: E402
+from emulator import system  # noqa: E402
+
+
+def rebuild(level, user_id):
+    # What a per-request implementation does: metadata to rows to JSON, every poll
+    table = system.SystemTable(system.DEFAULT_PROCESSES, system.DEFAULT_SOCKETS)
+    rows = [dict(zip(system.PROCESS_FIELDS, row)) for row in table.processes]
+    body = json.dumps(rows).encode('utf-8')
+    return body, str(hash(body))
+
+
+def measure(client, requests, headers=None, status=200):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/get_processes?level=1', headers=headers or {})
+        assert response.status_code == status, response.status_code
+    return (time.perf_counter() - start) / requests * 1000, response
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = quicksnatch.app
+    with app.app_context():
+        quicksnatch.db.create_all()
+    client = app.test_client()
+    client.post('/register', data={'username': 'team1', 'password': 'pw', 'confirm_password': 'pw'})
+    client.post('/login', data={'username': 'team1', 'password': 'pw'})
+
+    sandbox = quicksnatch.sandbox
+    precomputed = sandbox.get_process_list
+    sandbox.get_process_list = rebuild
+    ms, _ = measure(client, requests)
+    print(f'rebuild       {ms:7.3f} ms/request')
+    sandbox.get_process_list = precomputed
+
+    ms, response = measure(client, requests)
+    print(f'precomputed   {ms:7.3f} ms/request')
+    ms, _ = measure(client, requests, {'If-None-Match': response.headers['ETag']}, 304)
+    print(f'304           {ms:7.3f} ms/request')
+
+    client.post('/execute_command', json={'command': 'kill 1001', 'level': 1})
+    ms, response = measure(client, requests)
+    assert all(row[1] != 1001 for row in response.get_json()['rows'])
+    print(f'after kill    {ms:7.3f} ms/request')
+
+
+if __name__ == '__main__':
+    main()
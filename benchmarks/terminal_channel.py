@@ -0,0 +1,69 @@
+"""
+Terminal command throughput of one worker: POST /execute_command against a
+terminal channel.
+
+Runs the app in-process through Flask's test client on a throwaway database,
+so the numbers are the per-request server cost (routing, cookie session,
+user lookup, emulator) without network time. The channel is measured both
+with ?sync=1 replies and with replies queued for the event stream.
+
+Usage: python benchmarks/terminal_channel.py [commands]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench.db')
+os.environ['PROGRESS_BACKEND'] = 'memory'
+os.environ['PROGRESS_JOURNAL_DIR'] = os.path.join(WORKDIR, 'journal')
+
+from app import app, db, terminal_channels  # noqa: E402
+
+COMMANDS = ['ls -al', 'cat README.txt', 'pwd', 'ls Documents', 'cat .bashrc | grep alias']
+
+
+def login(client):
+    client.post('/register', data={'username': 'bench', 'password': 'pw', 'confirm_password': 'pw'})
+    client.post('/login', data={'username': 'bench', 'password': 'pw'})
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    for i in range(count):
+        fn(COMMANDS[i % len(COMMANDS)])
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    login(client)
+
+    def endpoint(command):
+        client.post('/execute_command', json={'command': command, 'level': 1, 'cwd': '/home/user'})
+
+    info = client.post('/terminal/1/channel').get_json()
+    channel = terminal_channels.get(info['token'])
+
+    def sync(command):
+        client.post(info['send'] + '?sync=1', json={'type': 'command', 'command': command})
+
+    def streamed(command):
+        client.post(info['send'], json={'type': 'command', 'command': command})
+        channel.next_event(0)
+
+    print(f'{"path":<28} {"commands/s":>11}')
+    for name, fn in (('POST /execute_command', endpoint), ('channel ?sync=1', sync), ('channel + event stream', streamed)):
+        fn(COMMANDS[0])
+        print(f'{name:<28} {rate(count, fn):>11.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Scan/submission timestamp writes: synchronous commits against the
+write-behind buffer, plus a check of its durability guarantees.
+
+1. N request threads each stamp their user's scan time M times, once with an
+   UPDATE + commit per stamp and once through the write-behind buffer.
+   Reports request-side latency and the number of commits.
+2. A child process queues stamps and exits normally: all of them must be in
+   the database (atexit flush).
+3. A child process queues stamps and is SIGKILLed: only the writes of the
+   last flush interval may be missing.
+
+Usage: python benchmarks/write_behind.py [threads] [stamps]
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import pytz
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHILD = '''
+import os, sys, time
+from datetime import datetime
+import pytz
+sys.path.insert(0, {root!r})
+from app import app, db, User, stamp_user
+with app.app_context():
+    db.create_all()
+    db.session.add_all(User(username=f'team{{i}}', password=b'x') for i in range(100))
+    db.session.commit()
+for i in range(1, 101):
+    stamp_user(i, qr_scan_time=datetime.now(pytz.UTC))
+print('queued', flush=True)
+if {kill}:
+    time.sleep(60)
+'''
+
+
+def environment(workdir):
+    env = dict(os.environ)
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    env['PROGRESS_BACKEND'] = 'memory'
+    env['PROGRESS_JOURNAL_DIR'] = os.path.join(workdir, 'journal')
+    return env
+
+
+def stamped(workdir):
+    import sqlite3
+    with sqlite3.connect(os.path.join(workdir, 'bench.db')) as conn:
+        return conn.execute('SELECT COUNT(*) FROM user WHERE qr_scan_time IS NOT NULL').fetchone()[0]
+
+
+def durability(kill):
+    workdir = tempfile.mkdtemp()
+    child = subprocess.Popen([sys.executable, '-c', CHILD.format(root=ROOT, kill=kill)],
+                             env=environment(workdir), stdout=subprocess.PIPE, text=True)
+    child.stdout.readline()
+    if kill:
+        child.send_signal(signal.SIGKILL)
+    child.wait()
+    return stamped(workdir)
+
+
+def throughput(threads, stamps):
+    from app import app, db, User, stamp_user, update_user, user_writes
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(User(username=f'team{i}', password=b'x') for i in range(threads))
+        db.session.commit()
+
+    def run(write):
+        latencies = []
+
+        def team(user_id):
+            with app.app_context():
+                for _ in range(stamps):
+                    start = time.perf_counter()
+                    write(user_id)
+                    latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        workers = [threading.Thread(target=team, args=(i + 1,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+    commits = [0]
+    flush = user_writes._write
+
+    def counted(pending):
+        commits[0] += 1
+        flush(pending)
+
+    user_writes._write = counted
+    for name, write in (('commit per stamp', lambda i: update_user(i, qr_scan_time=datetime.now(pytz.UTC))),
+                        ('write-behind', lambda i: stamp_user(i, qr_scan_time=datetime.now(pytz.UTC)))):
+        commits[0] = 0
+        elapsed, p50, p99 = run(write)
+        user_writes.flush()
+        total = commits[0] if name == 'write-behind' else threads * stamps
+        print(f'{name:<18} {elapsed:6.2f} s   p50 {p50 * 1000:7.2f} ms   p99 {p99 * 1000:7.2f} ms   '
+              f'{total} commits')
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    stamps = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    workdir = tempfile.mkdtemp()
+    os.environ.update(environment(workdir))
+
+    throughput(threads, stamps)
+    print(f'clean exit:  {durability(False)}/100 stamps persisted (expected 100)')
+    print(f'SIGKILL:     {durability(True)}/100 stamps persisted (writes of the last interval may be lost)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""Artifact and analysis tools of the binary-analysis level."""
+
+from binary_tools.analysis import analyze, chunk_entropy, find_strings, header_summary
+from binary_tools.artifact import BINARY_LEVEL, generate_binary_with_flag, level_binary, materialise
+from binary_tools.headers import HeaderError, parse_headers
+from binary_tools.stream import TOOLS, analyze_file, ndjson
@@ -0,0 +1,70 @@
+"""
+The challenge binary handed to players of the binary-analysis level.
+
+The bytes only depend on the level and the generator version, so each
+worker builds them once; bump ARTIFACT_VERSION when the generator changes.
+The streaming tools read the binary from disk instead (see `materialise`).
+"""
+
+import functools
+import os
+
+ARTIFACT_VERSION = 1
+BINARY_LEVEL = 7
+
+
+def generate_binary_with_flag():
+    # Create a simple ELF binary structure
+    binary = bytearray()
+    
+    # ELF Header
+    binary.extend(b'\x7fELF')  # Magic number
+    binary.extend(b'\x02')     # 64-bit
+    binary.extend(b'\x01')     # Little endian
+    binary.extend(b'\x01')     # Version
+    binary.extend(b'\x00' * 9) # Padding
+    
+    # Embed the flag in a way that requires analysis
+    flag = "flag{b1n4ry_4n4ly515_pr0}"
+    encoded_flag = ''.join(chr((ord(c) + 13) % 256) for c in flag)
+    binary.extend(encoded_flag.encode())
+    
+    # Add some decoy strings
+    decoys = [
+        b"This is not the flag you're looking for",
+        b"Try harder!",
+        b"Almost there...",
+        b"Look deeper into the binary",
+        b"Remember to check the headers"
+    ]
+    
+    for decoy in decoys:
+        binary.extend(decoy)
+        binary.extend(b'\x00' * 16)
+    
+    return bytes(binary)
+
+
+GENERATORS = {BINARY_LEVEL: generate_binary_with_flag}
+
+
+def level_binary(level: int = BINARY_LEVEL) -> bytes:
+    return _level_binary(level, ARTIFACT_VERSION)
+
+
+@functools.lru_cache(maxsize=16)
+def _level_binary(level: int, version: int) -> bytes:
+    return GENERATORS[level]()
+
+
+def materialise(level: int, directory: str) -> str:
+    """Path of the level's binary under `directory`, written there if missing."""
+    path = os.path.join(directory, f'level{level}.v{ARTIFACT_VERSION}.bin')
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        temp = f'{path}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(level_binary(level))
+        # Atomic, so another worker never maps a half-written file
+        os.replace(temp, path)
+    return path
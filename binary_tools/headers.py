@@ -0,0 +1,298 @@
+"""
+ELF and PE header parser for the `check-headers` tool.
+
+Every field is read with struct.unpack_from straight out of a memoryview
+(a mapped file or the in-memory artifact), so nothing is copied but the
+names. The result is plain JSON-ready data: the file header, the program and
+section header tables and, for ELF, the symbol tables (at most MAX_SYMBOLS
+per table). Challenge binaries are often deliberately broken, so a table
+that points outside the file, or whose entries are too small for the
+structure, is reported in `errors` instead of failing the whole parse; an
+ELF header with a wrong version or size leaves only the identification.
+
+Parsed headers are cached by the SHA-256 of the content (see HeaderCache),
+so repeated checks of the same binary cost a dict lookup.
+"""
+
+import collections
+import hashlib
+import struct
+import threading
+from typing import Dict, List, Optional
+
+MAX_SYMBOLS = 2000
+MAX_ENTRIES = 4096
+
+
+class HeaderError(ValueError):
+    pass
+
+
+ELF_TYPES = {0: 'NONE', 1: 'REL', 2: 'EXEC', 3: 'DYN', 4: 'CORE'}
+ELF_MACHINES = {0: 'None', 3: 'x86', 8: 'MIPS', 20: 'PowerPC', 21: 'PowerPC64', 40: 'ARM', 62: 'x86-64',
+                183: 'AArch64', 243: 'RISC-V'}
+ELF_OSABI = {0: 'UNIX - System V', 3: 'Linux', 9: 'FreeBSD', 97: 'ARM', 255: 'Standalone'}
+SEGMENT_TYPES = {0: 'NULL', 1: 'LOAD', 2: 'DYNAMIC', 3: 'INTERP', 4: 'NOTE', 5: 'SHLIB', 6: 'PHDR', 7: 'TLS',
+                 0x6474e550: 'GNU_EH_FRAME', 0x6474e551: 'GNU_STACK', 0x6474e552: 'GNU_RELRO',
+                 0x6474e553: 'GNU_PROPERTY'}
+SECTION_TYPES = {0: 'NULL', 1: 'PROGBITS', 2: 'SYMTAB', 3: 'STRTAB', 4: 'RELA', 5: 'HASH', 6: 'DYNAMIC',
+                 7: 'NOTE', 8: 'NOBITS', 9: 'REL', 11: 'DYNSYM', 14: 'INIT_ARRAY', 15: 'FINI_ARRAY',
+                 0x6ffffff6: 'GNU_HASH', 0x6ffffffe: 'VERNEED', 0x6fffffff: 'VERSYM'}
+SYMBOL_TYPES = {0: 'NOTYPE', 1: 'OBJECT', 2: 'FUNC', 3: 'SECTION', 4: 'FILE', 6: 'TLS'}
+SYMBOL_BINDS = {0: 'LOCAL', 1: 'GLOBAL', 2: 'WEAK'}
+SYMBOL_VISIBILITY = {0: 'DEFAULT', 1: 'INTERNAL', 2: 'HIDDEN', 3: 'PROTECTED'}
+SHT_SYMTAB, SHT_DYNSYM = 2, 11
+
+PE_MACHINES = {0x14c: 'x86', 0x8664: 'x86-64', 0x1c0: 'ARM', 0xaa64: 'ARM64'}
+PE_SUBSYSTEMS = {1: 'Native', 2: 'Windows GUI', 3: 'Windows CUI', 10: 'EFI application'}
+
+
+def _name(table: Dict[int, str], value: int) -> str:
+    return table.get(value, f'0x{value:x}')
+
+
+def _cstring(view, offset: int, limit: int = 256) -> str:
+    if offset < 0 or offset >= len(view):
+        return ''
+    chunk = view[offset:offset + limit].tobytes()
+    return chunk.split(b'\x00', 1)[0].decode('latin-1')
+
+
+def _unpack(fmt: str, view, offset: int, what: str):
+    if offset < 0 or offset + struct.calcsize(fmt) > len(view):
+        raise HeaderError(f'{what} at 0x{offset:x} is outside the file ({len(view)} bytes)')
+    return struct.unpack_from(fmt, view, offset)
+
+
+def _table(view, offset: int, count: int, entsize: int, size: int, what: str):
+    """Check that `count` entries of `entsize` bytes, each holding a `size`-byte struct, fit in the file."""
+    if count > MAX_ENTRIES:
+        raise HeaderError(f'{what}: {count} entries is more than {MAX_ENTRIES}')
+    if count and entsize < size:
+        raise HeaderError(f'{what}: entry size {entsize} is smaller than {size} bytes')
+    if count and (offset <= 0 or offset + count * entsize > len(view)):
+        raise HeaderError(f'{what} at 0x{offset:x} ({count} x {entsize} bytes) is outside the file ({len(view)} bytes)')
+
+
+def parse_elf(view) -> Dict:
+    if len(view) < 16:
+        raise HeaderError('ELF identification is truncated')
+    elf_class, data, version, osabi, abiversion = struct.unpack_from('5B', view, 4)
+    if elf_class not in (1, 2) or data not in (1, 2):
+        raise HeaderError(f'Unknown ELF class {elf_class} or data encoding {data}')
+    bits = 64 if elf_class == 2 else 32
+    order = '<' if data == 1 else '>'
+    word = 'Q' if bits == 64 else 'I'
+    result = {
+        'format': 'ELF', 'class': f'ELF{bits}', 'bits': bits,
+        'endianness': 'little' if data == 1 else 'big',
+        'version': version, 'osabi': _name(ELF_OSABI, osabi), 'abi_version': abiversion,
+        'errors': [],
+    }
+
+    fmt = f'{order}HHI{word}{word}{word}IHHHHHH'
+    try:
+        (e_type, machine, e_version, entry, phoff, shoff, flags, ehsize, phentsize, phnum,
+         shentsize, shnum, shstrndx) = _unpack(fmt, view, 16, 'ELF header')
+    except (HeaderError, struct.error) as e:
+        result['errors'].append(str(e))
+        return result
+    # Valid identification bytes in front of anything else (data, text, another
+    # header) would otherwise be shown as a type, a machine and table sizes
+    expected = 16 + struct.calcsize(fmt)
+    if version != 1 or e_version != 1 or not expected <= ehsize <= len(view):
+        result['errors'].append(f'ELF header is truncated or invalid (version {e_version}, '
+                                f'header size {ehsize}, expected {expected})')
+        return result
+    result['header'] = {
+        'type': _name(ELF_TYPES, e_type), 'machine': _name(ELF_MACHINES, machine), 'entry': entry,
+        'program_header_offset': phoff, 'section_header_offset': shoff, 'flags': flags,
+        'header_size': ehsize, 'program_header_size': phentsize, 'program_headers': phnum,
+        'section_header_size': shentsize, 'section_headers': shnum, 'section_names_index': shstrndx,
+    }
+
+    segment = f'{order}IIQQQQQQ' if bits == 64 else f'{order}IIIIIIII'
+    try:
+        _table(view, phoff, phnum, phentsize, struct.calcsize(segment), 'Program header table')
+        result['program_headers'] = [_segment(struct.unpack_from(segment, view, phoff + i * phentsize), bits)
+                                     for i in range(phnum)]
+    except (HeaderError, struct.error) as e:
+        result['errors'].append(str(e))
+
+    section = f'{order}II{word}{word}{word}{word}II{word}{word}'
+    sections = []
+    try:
+        _table(view, shoff, shnum, shentsize, struct.calcsize(section), 'Section header table')
+        raw = [struct.unpack_from(section, view, shoff + i * shentsize) for i in range(shnum)]
+        names = raw[shstrndx][4] if shstrndx < len(raw) else None
+        for name, kind, flags, addr, offset, size, link, info, align, entsize in raw:
+            sections.append({
+                'name': _cstring(view, names + name) if names is not None else '', 'type': _name(SECTION_TYPES, kind),
+                'flags': flags, 'address': addr, 'offset': offset, 'size': size, 'link': link, 'info': info,
+                'align': align, 'entry_size': entsize, '_type': kind,
+            })
+    except (HeaderError, struct.error) as e:
+        result['errors'].append(str(e))
+
+    symbols = {}
+    for entry in sections:
+        if entry['_type'] in (SHT_SYMTAB, SHT_DYNSYM):
+            try:
+                symbols[entry['name'] or entry['type']] = _symbols(view, entry, sections, order, bits)
+            except (HeaderError, struct.error) as e:
+                result['errors'].append(str(e))
+    for entry in sections:
+        del entry['_type']
+    if sections:
+        result['section_headers'] = sections
+    if symbols:
+        result['symbols'] = symbols
+    return result
+
+
+def _segment(fields, bits: int) -> Dict:
+    if bits == 64:
+        kind, flags, offset, vaddr, paddr, filesz, memsz, align = fields
+    else:
+        kind, offset, vaddr, paddr, filesz, memsz, flags, align = fields
+    permissions = ''.join(letter if flags & bit else '-' for letter, bit in (('r', 4), ('w', 2), ('x', 1)))
+    return {'type': _name(SEGMENT_TYPES, kind), 'flags': permissions, 'offset': offset, 'virtual_address': vaddr,
+            'physical_address': paddr, 'file_size': filesz, 'memory_size': memsz, 'align': align}
+
+
+def _symbols(view, table: Dict, sections: List[Dict], order: str, bits: int) -> Dict:
+    fmt = f'{order}IBBHQQ' if bits == 64 else f'{order}IIIBBH'
+    size = struct.calcsize(fmt)
+    entsize = table['entry_size'] or size
+    count = table['size'] // entsize
+    shown = min(count, MAX_SYMBOLS)
+    _table(view, table['offset'], shown, entsize, size, f"Symbol table {table['name']}")
+    strings = sections[table['link']]['offset'] if table['link'] < len(sections) else None
+    entries = []
+    for i in range(shown):
+        fields = struct.unpack_from(fmt, view, table['offset'] + i * entsize)
+        if bits == 64:
+            name, info, other, shndx, value, symbol_size = fields
+        else:
+            name, value, symbol_size, info, other, shndx = fields
+        entries.append({
+            'name': _cstring(view, strings + name) if strings is not None else '', 'value': value,
+            'size': symbol_size, 'type': _name(SYMBOL_TYPES, info & 0xf), 'bind': _name(SYMBOL_BINDS, info >> 4),
+            'visibility': _name(SYMBOL_VISIBILITY, other & 0x3), 'section': shndx,
+        })
+    return {'count': count, 'truncated': count > shown, 'entries': entries}
+
+
+def parse_pe(view) -> Dict:
+    result = {'format': 'PE', 'errors': []}
+    try:
+        (pe_offset,) = _unpack('<I', view, 0x3c, 'PE header offset')
+        if _unpack('<4s', view, pe_offset, 'PE signature')[0] != b'PE\x00\x00':
+            raise HeaderError('PE signature not found')
+        machine, nsections, timestamp, _, _, optional_size, characteristics = \
+            _unpack('<HHIIIHH', view, pe_offset + 4, 'COFF header')
+    except (HeaderError, struct.error) as e:
+        result['errors'].append(str(e))
+        return result
+    result['header'] = {'machine': _name(PE_MACHINES, machine), 'sections': nsections, 'timestamp': timestamp,
+                        'characteristics': characteristics}
+
+    optional = pe_offset + 24
+    try:
+        (magic,) = _unpack('<H', view, optional, 'Optional header')
+        plus = magic == 0x20b
+        result['bits'] = 64 if plus else 32
+        (entry,) = _unpack('<I', view, optional + 16, 'Entry point')
+        image_base = _unpack('<Q' if plus else '<I', view, optional + (24 if plus else 28), 'Image base')[0]
+        (subsystem,) = _unpack('<H', view, optional + 68, 'Subsystem')
+        result['optional_header'] = {'magic': 'PE32+' if plus else 'PE32', 'entry': entry,
+                                     'image_base': image_base, 'subsystem': _name(PE_SUBSYSTEMS, subsystem)}
+    except (HeaderError, struct.error) as e:
+        result['errors'].append(str(e))
+
+    table = optional + optional_size
+    try:
+        _table(view, table, nsections, 40, 40, 'Section table')
+        result['section_headers'] = [
+            {'name': name.rstrip(b'\x00').decode('latin-1'), 'virtual_size': vsize, 'virtual_address': vaddr,
+             'raw_size': raw_size, 'raw_offset': raw_offset, 'characteristics': flags}
+            for name, vsize, vaddr, raw_size, raw_offset, _, _, _, _, flags in
+            (struct.unpack_from('<8sIIIIIIHHI', view, table + i * 40) for i in range(nsections))
+        ]
+    except (HeaderError, struct.error) as e:
+        result['errors'].append(str(e))
+    return result
+
+
+def parse_headers(view) -> Optional[Dict]:
+    """Structured headers of an ELF or PE file, None for anything else."""
+    view = memoryview(view)
+    if view[:4] == b'\x7fELF':
+        try:
+            return parse_elf(view)
+        except (HeaderError, struct.error) as e:
+            return {'format': 'ELF', 'errors': [str(e)]}
+    if view[:2] == b'MZ':
+        return parse_pe(view)
+    return None
+
+
+def describe(headers: Optional[Dict]) -> List[str]:
+    """Human-readable summary lines of parse_headers() output."""
+    if headers is None:
+        return []
+    lines = []
+    if headers['format'] == 'ELF':
+        lines.append("File Type: ELF Binary")
+        if 'bits' in headers:
+            lines.append(f"Architecture: {headers['bits']}-bit")
+            lines.append(f"Endianness: {headers['endianness'].capitalize()} Endian")
+        header = headers.get('header')
+        if header:
+            lines.append(f"Type: {header['type']}  Machine: {header['machine']}  Entry: 0x{header['entry']:x}")
+    else:
+        lines.append("File Type: PE Binary")
+        header = headers.get('header')
+        if header:
+            lines.append(f"Machine: {header['machine']}  Sections: {header['sections']}")
+        optional = headers.get('optional_header')
+        if optional:
+            lines.append(f"{optional['magic']}  Entry: 0x{optional['entry']:x}  Subsystem: {optional['subsystem']}")
+    if 'program_headers' in headers:
+        lines.append(f"Program headers: {len(headers['program_headers'])}")
+    if 'section_headers' in headers:
+        names = ', '.join(entry['name'] for entry in headers['section_headers'] if entry['name'])
+        lines.append(f"Sections: {len(headers['section_headers'])}" + (f" ({names})" if names else ''))
+    for name, table in headers.get('symbols', {}).items():
+        lines.append(f"Symbols in {name}: {table['count']}")
+    lines.extend(f"Warning: {error}" for error in headers['errors'])
+    return lines
+
+
+class HeaderCache:
+    """parse_headers() results by content hash, least recently used first."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str, view) -> Optional[Dict]:
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                return self._entries[digest]
+        headers = parse_headers(view)
+        with self._lock:
+            self._entries[digest] = headers
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return headers
+
+
+header_cache = HeaderCache()
+
+
+def content_digest(view) -> str:
+    return hashlib.sha256(view).hexdigest()
+
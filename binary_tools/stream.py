@@ -0,0 +1,165 @@
+"""
+Streaming analysis of challenge binaries on disk.
+
+A file is memory-mapped read-only and every tool walks it in fixed-size
+blocks through a memoryview, yielding records as it goes. The regex and
+NumPy work directly on the mapping without copying it, and the OS pages the
+file in and out as needed, so peak memory depends on the block size and
+not on the file size. The app sends the records as NDJSON, one line per
+record, while the walk continues.
+
+Records (dicts) by tool:
+
+* find-strings:     {'type': 'string', 'offset': o, 'value': s}
+* check-headers:    {'type': 'header', 'lines': [...], 'headers': {...}}
+  (the parsed tables, cached by the file's content hash)
+* entropy-analysis: {'type': 'entropy', 'offset': o, 'entropy': e} per
+  sliding window of `window` bytes, advancing `step` bytes
+* byte-histogram:   {'type': 'histogram', 'counts': [256 ints]}
+
+and a final {'type': 'done', 'size': bytes}. `ndjson()` groups the lines
+into chunks of about 64 KiB so a run with many records isn't one write per
+record.
+"""
+
+import collections
+import contextlib
+import functools
+import json
+import math
+import mmap
+import os
+from typing import Dict, Iterator, List
+
+from binary_tools.analysis import _strings_pattern, numpy
+from binary_tools.headers import content_digest, describe, header_cache
+
+BLOCK_SIZE = 64 * 1024
+MAX_STRING = 4096
+
+
+@contextlib.contextmanager
+def mapped(path: str):
+    """A read-only memoryview of the file at `path` (empty files can't be mapped)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b'')
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            view = memoryview(mapping)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+@functools.lru_cache(maxsize=1024)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    with mapped(path) as view:
+        return content_digest(view)
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, hashed again only when its mtime or size changes."""
+    st = os.stat(path)
+    return _file_digest(path, st.st_mtime_ns, st.st_size)
+
+
+def histogram(block) -> List[int]:
+    if numpy is not None:
+        return numpy.bincount(numpy.frombuffer(block, dtype=numpy.uint8), minlength=256).tolist()
+    counts = [0] * 256
+    for byte, count in collections.Counter(bytes(block)).items():
+        counts[byte] = count
+    return counts
+
+
+def entropy_of(counts: List[int], size: int) -> float:
+    entropy = 0.0
+    for count in counts:
+        if count:
+            probability = count / size
+            entropy -= probability * math.log2(probability)
+    return entropy
+
+
+def iter_strings(view, min_length: int = 4) -> Iterator[Dict]:
+    # re scans the mapping in place; a run longer than MAX_STRING is cut into
+    # several records so one huge run can't be pulled into memory at once
+    pattern = _strings_pattern(min_length)
+    for match in pattern.finditer(view):
+        start, end = match.span()
+        for offset in range(start, end, MAX_STRING):
+            value = view[offset:min(end, offset + MAX_STRING)].tobytes().decode('ascii')
+            yield {'type': 'string', 'offset': offset, 'value': value}
+
+
+def iter_entropy(view, window: int = 4096, step: int = 4096) -> Iterator[Dict]:
+    """Entropy of every `window` bytes, `step` bytes apart (step must divide window)."""
+    if step <= 0 or window <= 0 or window % step:
+        raise ValueError('step must be positive and divide window')
+    size = len(view)
+    if size <= window:
+        if size:
+            yield {'type': 'entropy', 'offset': 0, 'entropy': round(entropy_of(histogram(view), size), 4)}
+        return
+    # The window is a running histogram: add the step that enters, drop the one that leaves
+    steps = collections.deque()
+    counts = [0] * 256
+    for offset in range(0, size - window + 1, step):
+        while len(steps) < window // step:
+            start = offset + len(steps) * step
+            block = histogram(view[start:start + step])
+            steps.append(block)
+            counts = [a + b for a, b in zip(counts, block)]
+        yield {'type': 'entropy', 'offset': offset, 'entropy': round(entropy_of(counts, window), 4)}
+        counts = [a - b for a, b in zip(counts, steps.popleft())]
+
+
+def byte_histogram(view, block_size: int = BLOCK_SIZE) -> List[int]:
+    counts = [0] * 256
+    for start in range(0, len(view), block_size):
+        counts = [a + b for a, b in zip(counts, histogram(view[start:start + block_size]))]
+    return counts
+
+
+TOOLS = ('find-strings', 'check-headers', 'entropy-analysis', 'byte-histogram')
+
+
+def analyze_file(tool: str, path: str, window: int = 4096, step: int = 4096) -> Iterator[Dict]:
+    """Records of `tool` over the file at `path`, ending with a 'done' record.
+
+    Arguments are checked here, before anything is streamed.
+    """
+    if tool not in TOOLS:
+        raise ValueError(f'Unknown tool: {tool}')
+    if step <= 0 or window <= 0 or window % step:
+        raise ValueError('step must be positive and divide window')
+    return _records(tool, path, window, step)
+
+
+def _records(tool: str, path: str, window: int, step: int) -> Iterator[Dict]:
+    with mapped(path) as view:
+        if tool == 'find-strings':
+            yield from iter_strings(view)
+        elif tool == 'check-headers':
+            headers = header_cache.get(file_digest(path), view)
+            yield {'type': 'header', 'lines': describe(headers), 'headers': headers}
+        elif tool == 'entropy-analysis':
+            yield from iter_entropy(view, window, step)
+        else:
+            yield {'type': 'histogram', 'counts': byte_histogram(view)}
+        yield {'type': 'done', 'size': len(view)}
+
+
+def ndjson(records: Iterator[Dict], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    lines, size = [], 0
+    for record in records:
+        line = json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b''.join(lines)
+            lines, size = [], 0
+    if lines:
+        yield b''.join(lines)
@@ -0,0 +1,109 @@
+"""
+Fan-out of leaderboard changes to Server-Sent Events subscribers.
+
+Publishers hand over the latest state of a changed item, keyed by id. A
+single flusher thread collects everything published since its last run,
+at most `max_rate` times per second, so a burst of scans becomes one message
+carrying the newest state of each team. Every message is serialised once
+and kept in a short backlog; subscribers only remember the sequence number
+of the last message they sent and wait on a shared condition. A connected
+client costs a generator frame and an int, not a queue.
+
+A client that reconnects with Last-Event-ID gets the messages it missed
+from the backlog, or a `reset` event telling it to reload when it is too far
+behind.
+"""
+
+import collections
+import itertools
+import threading
+import time
+from typing import Callable, Hashable, Iterator, Optional
+
+from terminal_channel import format_event
+
+
+class Broadcaster:
+    def __init__(self, event: str, max_rate: float = 4.0, backlog: int = 256, keepalive: float = 15.0,
+                 poll: Optional[Callable[[], None]] = None, poll_interval: float = 5.0):
+        self.event = event
+        self.interval = 1.0 / max_rate
+        self.keepalive = keepalive
+        # Called every poll_interval seconds while anybody is subscribed
+        self.poll = poll
+        self.poll_interval = poll_interval
+        self.seq = 0
+        self.subscribers = 0
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._messages = collections.deque(maxlen=backlog)
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def publish(self, key: Hashable, data: dict):
+        """Queue the newest state of `key`; earlier unsent states of it are dropped."""
+        with self._pending_lock:
+            self._pending[key] = data
+        self._start()
+        self._wake.set()
+
+    def flush(self) -> bool:
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return False
+        with self._cond:
+            seq = self.seq + 1
+            body = format_event(self.event, {'changes': list(pending.values())}, seq).encode('utf-8')
+            self._messages.append((seq, body))
+            self.seq = seq
+            self._cond.notify_all()
+        return True
+
+    def subscribe(self, last_seq: Optional[int] = None) -> Iterator[bytes]:
+        """Yield the SSE bytes for every message after `last_seq` (default: from now on)."""
+        with self._cond:
+            self.subscribers += 1
+            seq = self.seq if last_seq is None or last_seq > self.seq else last_seq
+        self._start()
+        try:
+            yield b'retry: 2000\n\n'
+            while True:
+                with self._cond:
+                    if self.seq == seq:
+                        self._cond.wait(self.keepalive)
+                    missed = self.seq - seq
+                    if missed > len(self._messages):
+                        batch = [format_event('reset', {}, self.seq).encode('utf-8')]
+                    else:
+                        batch = list(itertools.islice(reversed(self._messages), missed))
+                        batch = [body for _, body in reversed(batch)]
+                    seq = self.seq
+                yield b''.join(batch) if batch else b': keepalive\n\n'
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='broadcast-' + self.event, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        polled = time.monotonic()
+        while True:
+            self._wake.wait(self.poll_interval if self.poll else None)
+            self._wake.clear()
+            if self.poll and self.subscribers and time.monotonic() - polled >= self.poll_interval:
+                polled = time.monotonic()
+                try:
+                    self.poll()
+                except Exception:
+                    # A failed poll (e.g. a locked database) is retried next interval
+                    pass
+            if self.flush():
+                # Cap the message rate; changes arriving meanwhile are coalesced
+                time.sleep(self.interval)
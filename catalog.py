@@ -0,0 +1,212 @@
+"""
+Challenge catalog: the level metadata files, loaded once and kept in memory.
+
+* challenges/level{n}/level_info.json
+* challenges/bash_compiler/level{n}/challenge.json
+
+Every file is validated when it is loaded and kept as a read-only entry
+holding the parsed data, the JSON body pre-serialised to bytes and its
+ETag, so serving a level's info is a dict lookup. The served body leaves
+out the PRIVATE_FIELDS (the flag and the emulator's files, modes, processes
+and sockets), which only the server reads from `data`. Files are re-checked by
+stat() polling at most every `poll_interval` seconds when the catalog is
+used; an entry is reloaded when its mtime or size changes, and `version`
+goes up so caches built from the catalog know to rebuild.
+"""
+
+import base64
+import binascii
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import types
+from typing import Dict, FrozenSet, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHALLENGES_DIR = os.path.join(BASE_DIR, 'challenges')
+
+LEVEL_INFO = 'level_info'
+CHALLENGE = 'challenge'
+PATTERNS = {
+    LEVEL_INFO: os.path.join('level*', 'level_info.json'),
+    CHALLENGE: os.path.join('bash_compiler', 'level*', 'challenge.json'),
+}
+
+logger = logging.getLogger(__name__)
+
+
+class ChallengeError(ValueError):
+    """A challenge file is missing required fields or has the wrong types."""
+
+
+def freeze(value):
+    """Return a read-only copy of parsed JSON: dicts become mappingproxies, lists tuples."""
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _require(data: Dict, key: str, kind, path: str, optional: bool = False):
+    if key not in data:
+        if optional:
+            return
+        raise ChallengeError(f'{path}: missing "{key}"')
+    if not isinstance(data[key], kind):
+        raise ChallengeError(f'{path}: "{key}" must be {kind.__name__}')
+
+
+def _require_strings(data: Dict, key: str, path: str):
+    _require(data, key, dict, path, optional=True)
+    for name, value in data.get(key, {}).items():
+        if not isinstance(value, str):
+            raise ChallengeError(f'{path}: {key}["{name}"] must be str')
+
+
+def validate_level_info(data: Dict, level: int, path: str):
+    _require(data, 'level', int, path)
+    if data['level'] != level:
+        raise ChallengeError(f'{path}: level is {data["level"]}, expected {level}')
+    _require(data, 'title', str, path)
+    _require(data, 'description', str, path)
+    _require(data, 'hints', list, path, optional=True)
+    _require(data, 'processes', list, path, optional=True)
+    _require(data, 'sockets', list, path, optional=True)
+    _require_strings(data, 'files', path)
+    _require_strings(data, 'modes', path)
+    for name, mode in data.get('modes', {}).items():
+        if not re.fullmatch(r'[0-7]{3,4}', mode):
+            raise ChallengeError(f'{path}: modes["{name}"] is not an octal mode')
+
+
+def validate_challenge(data: Dict, level: int, path: str):
+    _require(data, 'title', str, path)
+    _require(data, 'hints', list, path, optional=True)
+    _require_strings(data, 'initial_files', path)
+    _require_strings(data, 'binary_files', path)
+    for name, content in data.get('binary_files', {}).items():
+        try:
+            base64.b64decode(content, validate=True)
+        except binascii.Error:
+            raise ChallengeError(f'{path}: binary_files["{name}"] is not base64')
+
+
+VALIDATORS = {LEVEL_INFO: validate_level_info, CHALLENGE: validate_challenge}
+# Fields kept out of the served body: answers and emulator fixtures
+PRIVATE_FIELDS = {
+    LEVEL_INFO: frozenset(('flag', 'files', 'modes', 'processes', 'sockets')),
+    CHALLENGE: frozenset(),
+}
+
+
+class CatalogEntry:
+    __slots__ = ('path', 'stamp', 'data', 'public', 'body', 'etag')
+
+    def __init__(self, path: str, stamp: Tuple[float, int], data: Dict, private: FrozenSet[str] = frozenset()):
+        self.path = path
+        self.stamp = stamp
+        # The served fields as plain JSON types, for responses that embed them; never mutated
+        self.public = {key: value for key, value in data.items() if key not in private}
+        self.body = json.dumps(self.public, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.data = freeze(data)
+
+
+def _stamp(path: str) -> Tuple[float, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _level_of(path: str) -> int:
+    return int(re.search(r'level(\d+)', os.path.basename(os.path.dirname(path))).group(1))
+
+
+def load_entry(kind: str, path: str) -> CatalogEntry:
+    stamp = _stamp(path)
+    with open(path, 'r') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ChallengeError(f'{path}: {e}') from e
+    if not isinstance(data, dict):
+        raise ChallengeError(f'{path}: expected a JSON object')
+    VALIDATORS[kind](data, _level_of(path), path)
+    return CatalogEntry(path, stamp, data, PRIVATE_FIELDS[kind])
+
+
+class ChallengeCatalog:
+    def __init__(self, root: str = CHALLENGES_DIR, poll_interval: float = 2.0):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.version = 0
+        self._entries: Dict[Tuple[str, int], CatalogEntry] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load every challenge file, raising ChallengeError on an invalid one."""
+        entries = {}
+        for kind, path in self._scan():
+            entries[(kind, _level_of(path))] = load_entry(kind, path)
+        with self._lock:
+            self._entries = entries
+            self._checked = time.monotonic()
+            self.version += 1
+
+    def get(self, kind: str, level: int) -> Optional[CatalogEntry]:
+        self.refresh()
+        return self._entries.get((kind, level))
+
+    def level_info(self, level: int) -> Optional[CatalogEntry]:
+        return self.get(LEVEL_INFO, level)
+
+    def challenge(self, level: int) -> Optional[CatalogEntry]:
+        return self.get(CHALLENGE, level)
+
+    def refresh(self, force: bool = False):
+        """Reload files whose mtime or size changed since the last check.
+
+        An edit that fails validation is logged and the previous entry is
+        kept, so a half-saved file never takes a level offline.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.poll_interval:
+            return
+        with self._lock:
+            if not force and now - self._checked < self.poll_interval:
+                return
+            self._checked = now
+            entries = dict(self._entries)
+            seen = set()
+            for kind, path in self._scan():
+                key = (kind, _level_of(path))
+                seen.add(key)
+                entry = entries.get(key)
+                try:
+                    if entry is None or entry.stamp != _stamp(path):
+                        entries[key] = load_entry(kind, path)
+                except (OSError, ChallengeError) as e:
+                    logger.warning('Keeping previous %s for level %s: %s', kind, key[1], e)
+            for key in set(entries) - seen:
+                del entries[key]
+            if any(entries.get(key) is not entry for key, entry in self._entries.items()) \
+                    or len(entries) != len(self._entries):
+                self._entries = entries
+                self.version += 1
+
+    def _scan(self):
+        for kind, pattern in PATTERNS.items():
+            for path in sorted(glob.glob(os.path.join(self.root, pattern))):
+                if re.fullmatch(r'level\d+', os.path.basename(os.path.dirname(path))):
+                    yield kind, path
+
+
+# Global catalog instance
+catalog = ChallengeCatalog()
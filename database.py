@@ -0,0 +1,52 @@
+"""
+Connection setup for the main database.
+
+Every SQLite connection the pool opens gets the same pragmas as the progress
+store (progress_store.py): WAL so readers never wait for the writer,
+synchronous=NORMAL (a commit is durable once it is in the WAL; only a power
+loss can drop the last commits, never corrupt the file), a busy timeout so
+concurrent writers queue instead of failing with "database is locked", and
+a memory-mapped window so hot pages are read without a copy per query.
+Other databases are left alone.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(uri: str, pool_size: int = 10, max_overflow: int = 20, pool_timeout: float = 10.0) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri`; set before SQLAlchemy(app)."""
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return {}
+    # Requests hold a connection only briefly (hashing and other slow work
+    # happen after a rollback), so a small pool serves many threads
+    return {'pool_size': pool_size, 'max_overflow': max_overflow, 'pool_timeout': pool_timeout,
+            'pool_pre_ping': False}
+
+
+def sqlite_pragmas(busy_timeout_ms: int = 5000, mmap_size: int = 64 * 1024 * 1024) -> list:
+    return [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA busy_timeout={int(busy_timeout_ms)}',
+        f'PRAGMA mmap_size={int(mmap_size)}',
+    ]
+
+
+def configure_sqlite(engine, busy_timeout_ms: int = 5000, mmap_size: int = 64 * 1024 * 1024) -> bool:
+    """Run the pragmas on every new connection of `engine`; False if it isn't SQLite."""
+    if engine.dialect.name != 'sqlite':
+        return False
+    pragmas = sqlite_pragmas(busy_timeout_ms, mmap_size)
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return True
@@ -0,0 +1,6 @@
+"""Simulated Linux terminal used by the challenge levels."""
+
+from emulator.commands import COMMANDS, CommandResult
+from emulator.session import SessionManager
+from emulator.shell import Shell
+from emulator.vfs import FileSystem, load_level_fs
@@ -0,0 +1,785 @@
+"""
+Builtin commands of the terminal emulator.
+
+Every builtin is a generator taking a Process and its argument list and
+yielding output lines, so a pipeline streams line by line and a large file
+is never turned into one big string between stages. Builtins are looked up
+in COMMANDS, so adding a command or a new spelling of one (`ls -al`,
+`cat ./file`) never makes other commands slower.
+
+The byte-level tools (hexdump, xxd, strings, tcpdump) read files through
+memoryview slices of BLOCK_SIZE bytes and emit one row at a time, so even a
+large capture is never expanded into one big string; Shell pages the output.
+"""
+
+import collections
+import fnmatch
+import itertools
+import re
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from emulator import pcap
+from emulator.overlay import Overlay
+from emulator.vfs import DIR_MODE, FILE_MODE, HOME, USER, Node
+
+
+# Binary files are read in blocks of BLOCK_SIZE; a decoded line longer than
+# MAX_LINE bytes is cut into several
+BLOCK_SIZE = 4096
+MAX_LINE = 4096
+
+
+class Fragment(str):
+    """Part of a line with no newline after it: the end of data that doesn't
+    end in one, or a piece of a line cut at MAX_LINE."""
+
+    __slots__ = ()
+
+
+def decode_line(data) -> str:
+    # Bytes that aren't UTF-8 become lone surrogates, so binary data survives
+    # a pipe or a redirect unchanged; see encode_line()
+    return data.decode('utf-8', errors='surrogateescape')
+
+
+def encode_line(line: str) -> bytes:
+    """The bytes a line stands for, with its newline unless it is a Fragment."""
+    data = line.encode('utf-8', errors='surrogateescape')
+    return data if isinstance(line, Fragment) else data + b'\n'
+
+
+def display(text: str) -> str:
+    """`text` as shown in the terminal: undecodable bytes become U+FFFD."""
+    return text.encode('utf-8', errors='surrogateescape').decode('utf-8', errors='replace')
+
+
+class CommandResult:
+    def __init__(self, stdout="", stderr="", returncode=0, cwd=None, more=False):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = returncode
+        self.cwd = cwd
+        # More output is waiting; Shell.more() returns the next page
+        self.more = more
+
+
+class UsageError(Exception):
+    pass
+
+
+class Process:
+    """What a running builtin sees: its shell, its stdin and its error stream.
+
+    `stdin` is an iterator of lines (without newlines) or None when the
+    command is not reading from a pipe.
+    """
+
+    def __init__(self, shell, stdin: Optional[Iterator[str]] = None):
+        self.shell = shell
+        self.stdin = stdin
+        self.errors: List[str] = []
+        self.status = 0
+
+    def error(self, message: str, status: int = 1):
+        self.errors.append(message)
+        self.status = status
+
+
+def parse_flags(args: List[str], allowed: str, with_value: str = '') -> Tuple[Set[str], Dict[str, str], List[str]]:
+    """Split `args` into short flags, flag values and operands.
+
+    `allowed` lists the valid single-letter flags and `with_value` those that
+    take a value (`-n 5` or `-n5`). Combined flags like `-la` are accepted.
+    """
+    flags, values, operands = set(), {}, []
+    it = iter(args)
+    for arg in it:
+        if arg == '--':
+            operands.extend(it)
+            break
+        if not arg.startswith('-') or arg == '-':
+            operands.append(arg)
+            continue
+        letters = arg[1:]
+        for i, letter in enumerate(letters):
+            if letter in with_value:
+                value = letters[i + 1:] or next(it, None)
+                if value is None:
+                    raise UsageError(f"option requires an argument -- '{letter}'")
+                values[letter] = value
+                break
+            if letter not in allowed:
+                raise UsageError(f"invalid option -- '{letter}'")
+            flags.add(letter)
+    return flags, values, operands
+
+
+def iter_lines(data: bytes) -> Iterator[str]:
+    """Yield the lines of `data` one at a time without copying the whole buffer."""
+    start, end = 0, len(data)
+    while start < end:
+        newline = data.find(b'\n', start)
+        if newline == -1:
+            newline = end
+        line = decode_line(data[start:newline])
+        yield line if newline < end else Fragment(line)
+        start = newline + 1
+
+
+def format_mode(node: Node) -> str:
+    bits = ''
+    for shift in (6, 3, 0):
+        part = (node.mode >> shift) & 0o7
+        bits += ('r' if part & 4 else '-') + ('w' if part & 2 else '-') + ('x' if part & 1 else '-')
+    return ('d' if node.is_dir else '-') + bits
+
+
+def open_file(proc: Process, name: str, command: str) -> Optional[Node]:
+    """Resolve a file operand, reporting an error and returning None on failure."""
+    _, node = proc.shell.lookup(name)
+    if node is None:
+        proc.error(f'{command}: {name}: No such file or directory')
+    elif node.is_dir:
+        proc.error(f'{command}: {name}: Is a directory')
+    elif not node.readable:
+        proc.error(f'{command}: {name}: Permission denied')
+    else:
+        return node
+    return None
+
+
+def input_lines(proc: Process, names: List[str], command: str) -> Iterator[Tuple[str, Iterator[str]]]:
+    """Yield (name, lines) for each file operand, or for stdin when there are none."""
+    if not names:
+        yield '(standard input)', proc.stdin or iter(())
+        return
+    for name in names:
+        node = open_file(proc, name, command)
+        if node is not None:
+            yield name, iter_lines(node.data)
+
+
+def ls(proc, args):
+    flags, _, operands = parse_flags(args, 'alAh1F')
+    show_all = 'a' in flags
+    show_hidden = show_all or 'A' in flags
+    long_format = 'l' in flags
+    shell = proc.shell
+
+    targets = operands or ['.']
+    for target in targets:
+        path, node = shell.lookup(target)
+        if node is None:
+            proc.error(f"ls: cannot access '{target}': No such file or directory")
+            continue
+        if not node.is_dir:
+            entries = [(target, node)]
+        else:
+            entries = [(name, child) for name, child in shell.list_dir(path, node)
+                       if show_hidden or not name.startswith('.')]
+            if show_all:
+                _, parent = shell.lookup(path + '/..')
+                entries = [('.', node), ('..', parent)] + entries
+        if len(targets) > 1 and node.is_dir:
+            yield f'{target}:'
+        if long_format:
+            if node.is_dir:
+                yield f'total {4 * len(entries)}'
+            width = max((len(str(child.size)) for _, child in entries), default=1)
+            for name, child in entries:
+                links = 2 if child.is_dir else 1
+                yield (f'{format_mode(child)} {links} {child.owner} {child.owner} '
+                       f'{child.size:>{width}} Jan 18 05:55 {name}')
+        else:
+            yield '  '.join(name + ('/' if child.is_dir and name not in ('.', '..') else '')
+                            for name, child in entries)
+
+
+def cat(proc, args):
+    _, _, operands = parse_flags(args, '')
+    for _, lines in input_lines(proc, operands, 'cat'):
+        yield from lines
+
+
+def grep(proc, args):
+    flags, _, operands = parse_flags(args, 'rRinvlcH')
+    if not operands:
+        raise UsageError('usage: grep [-rinvlc] PATTERN [FILE]...')
+    pattern, names = operands[0], operands[1:]
+    recursive = 'r' in flags or 'R' in flags
+    if recursive and not names:
+        names = ['.']
+    try:
+        regex = re.compile(pattern, re.IGNORECASE if 'i' in flags else 0)
+    except re.error:
+        regex = re.compile(re.escape(pattern), re.IGNORECASE if 'i' in flags else 0)
+
+    files = []
+    for name in names:
+        path, node = proc.shell.lookup(name)
+        if node is None:
+            proc.error(f'grep: {name}: No such file or directory', 2)
+        elif node.is_dir:
+            if not recursive:
+                proc.error(f'grep: {name}: Is a directory', 2)
+                continue
+            for child_path, child in proc.shell.walk(path):
+                if not child.is_dir:
+                    files.append(name.rstrip('/') + child_path[len(path):])
+        else:
+            files.append(name)
+    if names and not files:
+        return
+
+    show_names = recursive or len(files) > 1 or 'H' in flags
+    invert = 'v' in flags
+    matched = False
+    for name, lines in input_lines(proc, files, 'grep'):
+        count = 0
+        for number, line in enumerate(lines, 1):
+            if bool(regex.search(line)) == invert:
+                continue
+            count += 1
+            if 'l' in flags:
+                break
+            if 'c' not in flags:
+                prefix = (f'{name}:' if show_names else '') + (f'{number}:' if 'n' in flags else '')
+                yield prefix + line
+        matched = matched or count > 0
+        if 'l' in flags and count:
+            yield name
+        elif 'c' in flags:
+            yield f'{name}:{count}' if show_names else str(count)
+    if not matched and not proc.errors:
+        proc.status = 1
+
+
+def head_tail(command):
+    def run(proc, args):
+        numeric = [a for a in args if re.fullmatch(r'-\d+', a)]
+        args = [a for a in args if a not in numeric]
+        _, values, operands = parse_flags(args, '', with_value='n')
+        count = int(values.get('n', numeric[-1][1:] if numeric else 10))
+        for _, lines in input_lines(proc, operands, command):
+            if command == 'head':
+                yield from itertools.islice(lines, count)
+            elif count:
+                yield from collections.deque(lines, maxlen=count)
+    return run
+
+
+def wc(proc, args):
+    flags, _, operands = parse_flags(args, 'lwc')
+    flags = flags or {'l', 'w', 'c'}
+    for name, lines in input_lines(proc, operands, 'wc'):
+        line_count = word_count = char_count = 0
+        for line in lines:
+            line_count += 1
+            word_count += len(line.split())
+            char_count += len(line) + 1
+        counts = [n for flag, n in (('l', line_count), ('w', word_count), ('c', char_count)) if flag in flags]
+        yield ' '.join(f'{n:>7}' for n in counts) + ('' if name == '(standard input)' else f' {name}')
+
+
+def sort(proc, args):
+    flags, _, operands = parse_flags(args, 'ru')
+    lines = [line for _, file_lines in input_lines(proc, operands, 'sort') for line in file_lines]
+    lines.sort(reverse='r' in flags)
+    if 'u' in flags:
+        lines = [line for line, _ in itertools.groupby(lines)]
+    yield from lines
+
+
+def input_bytes(proc: Process, names: List[str], command: str) -> Iterator[bytes]:
+    """Yield the bytes of the file operands, or of stdin when there are none, in blocks."""
+    if not names:
+        for line in proc.stdin or ():
+            yield encode_line(line)
+        return
+    for name in names:
+        node = open_file(proc, name, command)
+        if node is not None:
+            view = memoryview(node.data)
+            for start in range(0, len(view), BLOCK_SIZE):
+                yield view[start:start + BLOCK_SIZE]
+
+
+def byte_range(blocks: Iterator[bytes], skip: int = 0, limit: Optional[int] = None) -> Iterator[bytes]:
+    """Drop the first `skip` bytes of `blocks` and stop after `limit` more."""
+    for block in blocks:
+        if skip:
+            if skip >= len(block):
+                skip -= len(block)
+                continue
+            block, skip = block[skip:], 0
+        if limit is not None:
+            block = block[:limit]
+            limit -= len(block)
+        if block:
+            yield block
+        if limit == 0:
+            return
+
+
+def rows(blocks: Iterator[bytes], width: int) -> Iterator[bytes]:
+    """Regroup `blocks` into rows of `width` bytes; only the last one may be shorter."""
+    pending = bytearray()
+    for block in blocks:
+        pending += block
+        full = len(pending) - len(pending) % width
+        for start in range(0, full, width):
+            yield bytes(pending[start:start + width])
+        del pending[:full]
+    if pending:
+        yield bytes(pending)
+
+
+def byte_lines(chunks: Iterator[bytes]) -> Iterator[str]:
+    """Turn a byte stream back into output lines, cutting lines at MAX_LINE bytes."""
+    pending = bytearray()
+    for chunk in chunks:
+        pending += chunk
+        start = 0
+        while True:
+            newline = pending.find(b'\n', start)
+            if newline == -1:
+                break
+            yield decode_line(pending[start:newline])
+            start = newline + 1
+        del pending[:start]
+        while len(pending) >= MAX_LINE:
+            yield Fragment(decode_line(pending[:MAX_LINE]))
+            del pending[:MAX_LINE]
+    if pending:
+        yield Fragment(decode_line(pending))
+
+
+def number(value: str) -> int:
+    try:
+        result = int(value, 16) if value.lower().startswith('0x') else int(value)
+    except ValueError:
+        raise UsageError(f"invalid number '{value}'")
+    if result < 0:
+        raise UsageError(f"invalid number '{value}'")
+    return result
+
+
+def hexdump(proc, args):
+    flags, values, operands = parse_flags(args, 'Cv', with_value='ns')
+    skip = number(values.get('s', '0'))
+    limit = number(values['n']) if 'n' in values else None
+    offset, previous, starred = skip, None, False
+    for row in rows(byte_range(input_bytes(proc, operands, 'hexdump'), skip, limit), 16):
+        # Repeats of the previous line are folded into one '*', as hexdump(1) does
+        if row == previous and 'v' not in flags:
+            if not starred:
+                yield '*'
+                starred = True
+        elif 'C' in flags:
+            starred = False
+            hex_part = row[:8].hex(' ') + '  ' + row[8:].hex(' ')
+            yield f'{offset:08x}  {hex_part:<48}  |{pcap.printable(row)}|'
+        else:
+            starred = False
+            words = ' '.join(f'{int.from_bytes(row[i:i + 2], "little"):04x}' for i in range(0, len(row), 2))
+            yield f'{offset:07x} {words}'
+        previous = row
+        offset += len(row)
+    if offset > skip:
+        yield f'{offset:08x}' if 'C' in flags else f'{offset:07x}'
+
+
+HEX_DIGITS = re.compile(rb'[0-9a-fA-F]')
+
+
+def xxd(proc, args):
+    args = ['-p' if arg in ('-ps', '-plain', '-postscript') else arg for arg in args]
+    flags, values, operands = parse_flags(args, 'pru', with_value='clsg')
+    if len(operands) > 2:
+        raise UsageError('usage: xxd [-p] [-r] [-c cols] [-g bytes] [-l len] [-s seek] [infile [outfile]]')
+    names, target = operands[:1], operands[1] if len(operands) > 1 else None
+    if 'r' in flags:
+        lines = byte_lines(unhex(proc, names, 'p' in flags))
+    else:
+        lines = dump(proc, names, flags, values)
+    if target is None:
+        yield from lines
+    else:
+        proc.shell.redirect(proc, lines, '>', target)
+
+
+def dump(proc: Process, names: List[str], flags: Set[str], values: Dict[str, str]) -> Iterator[str]:
+    plain = 'p' in flags
+    width = number(values.get('c', '30' if plain else '16')) or 16
+    group = number(values.get('g', '2')) or width
+    skip = number(values.get('s', '0'))
+    limit = number(values['l']) if 'l' in values else None
+    offset = skip
+    hex_width = width * 2 + (width - 1) // group
+    for row in rows(byte_range(input_bytes(proc, names, 'xxd'), skip, limit), width):
+        line = row.hex() if plain else row.hex(' ', -group)
+        if 'u' in flags:
+            line = line.upper()
+        yield line if plain else f'{offset:08x}: {line:<{hex_width}}  {pcap.printable(row)}'
+        offset += len(row)
+
+
+def unhex(proc: Process, names: List[str], plain: bool) -> Iterator[bytes]:
+    """Bytes of an xxd dump (or, with `plain`, of any run of hex digits)."""
+    for _, lines in input_lines(proc, names, 'xxd'):
+        odd = b''
+        for line in lines:
+            data = line.encode('ascii', errors='ignore')
+            if not plain:
+                # Only the hex column: after "offset:", up to the two spaces before the text
+                data = data.partition(b':')[2].lstrip(b' ').partition(b'  ')[0]
+                odd = b''
+            digits = odd + b''.join(HEX_DIGITS.findall(data))
+            even = len(digits) - len(digits) % 2
+            odd = digits[even:]
+            if even:
+                yield bytes.fromhex(digits[:even].decode('ascii'))
+
+
+def strings(proc, args):
+    _, values, operands = parse_flags(args, 'a', with_value='nt')
+    regex = re.compile(rb'[\x20-\x7e]{%d,}' % int(values.get('n', 4)))
+    radix = values.get('t')
+    if radix is not None and radix not in OFFSET_FORMATS:
+        raise UsageError(f"invalid radix '{radix}'")
+
+    def found(data):
+        for match in regex.finditer(data):
+            text = match.group().decode('ascii')
+            yield text if radix is None else f'{match.start():{OFFSET_FORMATS[radix]}} {text}'
+
+    if not operands:
+        for line in proc.stdin or ():
+            yield from found(encode_line(line))
+        return
+    for name in operands:
+        node = open_file(proc, name, 'strings')
+        if node is not None:
+            yield from found(node.data)
+
+
+OFFSET_FORMATS = {'d': '>7d', 'o': '>7o', 'x': '>7x'}
+
+
+def tcpdump(proc, args):
+    flags, values, operands = parse_flags(args, 'nxXAtqv', with_value='rc')
+    name = values.get('r')
+    if name is None:
+        proc.error("tcpdump: eth0: You don't have permission to capture on that device (use -r FILE)")
+        return
+    count = number(values['c']) if 'c' in values else None
+    try:
+        matches = pcap.compile_filter(operands)
+    except pcap.PcapError as e:
+        proc.error(f'tcpdump: {e}')
+        return
+    node = open_file(proc, name, 'tcpdump')
+    if node is None:
+        return
+    view = memoryview(node.data)
+    try:
+        info = pcap.describe(view)
+    except pcap.PcapError as e:
+        proc.error(f'tcpdump: {name}: {e}')
+        return
+    # tcpdump prints this on stderr, so it doesn't go down a pipe
+    proc.errors.append(f"reading from file {name}, link-type {info['link']}, snapshot length {info['snaplen']}")
+
+    shown = 0
+    try:
+        for packet in pcap.packets(view):
+            if count is not None and shown >= count:
+                break
+            if not matches(packet):
+                continue
+            shown += 1
+            yield packet.line('t' not in flags)
+            if 'X' in flags:
+                yield from pcap.hex_ascii(packet.ip)
+            elif 'x' in flags:
+                yield from pcap.hex_only(packet.ip)
+            elif 'A' in flags:
+                yield pcap.printable(packet.ip)
+    except pcap.PcapError as e:
+        proc.error(f'tcpdump: pcap_loop: {e}')
+
+
+def find(proc, args):
+    root = '.'
+    if args and not args[0].startswith('-'):
+        root, args = args[0], args[1:]
+    name_pattern, node_type = None, None
+    while args:
+        if args[0] == '-name' and len(args) > 1:
+            name_pattern, args = args[1], args[2:]
+        elif args[0] == '-type' and len(args) > 1:
+            node_type, args = args[1], args[2:]
+        else:
+            raise UsageError(f"unknown predicate '{args[0]}'")
+
+    path, node = proc.shell.lookup(root)
+    if node is None:
+        proc.error(f"find: '{root}': No such file or directory")
+        return
+    for child_path, child in proc.shell.walk(path):
+        name = child_path.rsplit('/', 1)[-1] or '/'
+        if name_pattern and not fnmatch.fnmatchcase(name, name_pattern):
+            continue
+        if node_type == 'f' and child.is_dir or node_type == 'd' and not child.is_dir:
+            continue
+        yield root.rstrip('/') + child_path[len(path):] if root != '/' else child_path
+
+
+def cd(proc, args):
+    target = args[0] if args else HOME
+    path, node = proc.shell.lookup(target)
+    if node is None:
+        proc.error(f'cd: {target}: No such file or directory')
+    elif not node.is_dir:
+        proc.error(f'cd: {target}: Not a directory')
+    else:
+        proc.shell.cwd = path
+    return
+    yield
+
+
+def pwd(proc, args):
+    yield proc.shell.cwd
+
+
+SYMBOLIC_MODE = re.compile(r'([ugoa]*)([+\-=])([rwx]*)')
+
+
+def apply_mode(mode: int, spec: str) -> int:
+    if re.fullmatch(r'[0-7]{1,4}', spec):
+        return int(spec, 8) & 0o777
+    for clause in spec.split(','):
+        match = SYMBOLIC_MODE.fullmatch(clause)
+        if not match:
+            raise UsageError(f"invalid mode: '{spec}'")
+        who, op, perms = match.groups()
+        shifts = [{'u': 6, 'g': 3, 'o': 0}[w] for w in (who.replace('a', 'ugo') or 'ugo')]
+        bits = sum({'r': 4, 'w': 2, 'x': 1}[p] << s for p in perms for s in shifts)
+        if op == '+':
+            mode |= bits
+        elif op == '-':
+            mode &= ~bits
+        else:
+            mask = sum(0o7 << s for s in shifts)
+            mode = (mode & ~mask) | bits
+    return mode
+
+
+def chmod(proc, args):
+    if len(args) < 2:
+        raise UsageError('usage: chmod MODE FILE...')
+    spec, names = args[0], args[1:]
+    for name in names:
+        path, node = proc.shell.lookup(name)
+        if node is None:
+            proc.error(f"chmod: cannot access '{name}': No such file or directory")
+        elif node.owner != USER:
+            proc.error(f"chmod: changing permissions of '{name}': Operation not permitted")
+        else:
+            proc.shell.set_mode(path, node, apply_mode(node.mode, spec))
+    return
+    yield
+
+
+def create_node(proc: Process, name: str, command: str, make_dir: bool, exist_ok: bool) -> bool:
+    """Create a file or directory in the session overlay, reporting errors on `proc`."""
+    shell = proc.shell
+    action = 'create directory' if make_dir else 'touch'
+    path, node = shell.lookup(name)
+    if node is not None:
+        if not exist_ok:
+            proc.error(f"{command}: cannot {action} '{name}': File exists")
+        return exist_ok
+    _, parent = shell.lookup(path.rsplit('/', 1)[0] or '/')
+    if parent is None or not parent.is_dir:
+        proc.error(f"{command}: cannot {action} '{name}': No such file or directory")
+        return False
+    if not Overlay.can_write(parent):
+        proc.error(f"{command}: cannot {action} '{name}': Permission denied")
+        return False
+    base = path.rsplit('/', 1)[-1]
+    if make_dir:
+        shell.create(path, Node(base, DIR_MODE, USER, children={}))
+    else:
+        shell.create(path, Node(base, FILE_MODE, USER, data=b''))
+    return True
+
+
+def touch(proc, args):
+    _, _, operands = parse_flags(args, 'c')
+    for name in operands:
+        create_node(proc, name, 'touch', False, True)
+    return
+    yield
+
+
+def mkdir(proc, args):
+    flags, _, operands = parse_flags(args, 'p')
+    for name in operands:
+        if 'p' not in flags:
+            create_node(proc, name, 'mkdir', True, False)
+            continue
+        parts = proc.shell.lookup(name)[0].strip('/').split('/')
+        for i in range(1, len(parts) + 1):
+            if not create_node(proc, '/' + '/'.join(parts[:i]), 'mkdir', True, True):
+                break
+    return
+    yield
+
+
+def history(proc, args):
+    for i, command in enumerate(proc.shell.history, 1):
+        yield f'{i:>5}  {command}'
+
+
+def ps(proc, args):
+    yield 'USER       PID %CPU %MEM    VSZ   RSS TTY      STAT START   TIME COMMAND'
+    for p in proc.shell.system.processes():
+        yield (f"{p.user:<8} {p.pid:>5} {p.cpu:>4} {p.mem:>4} {p.vsz:>6} "
+               f"{p.rss:>5} {p.tty:<8} {p.stat:<4} {p.start:>5} {p.time:>6} {p.command}")
+
+
+def kill(proc, args):
+    # Signals are accepted (-9, -KILL, -s TERM) but every one of them kills
+    pids, it = [], iter(args)
+    for arg in it:
+        if arg in ('-s', '-n'):
+            next(it, None)
+        elif arg == '-l':
+            yield 'HUP INT QUIT KILL TERM STOP CONT'
+            return
+        elif not arg.startswith('-'):
+            pids.append(arg)
+    if not pids:
+        raise UsageError('usage: kill [-s SIGNAL | -SIGNAL] PID...')
+    system = proc.shell.system
+    for pid in pids:
+        if not pid.isdigit():
+            proc.error(f'kill: {pid}: arguments must be process or job IDs')
+            continue
+        process = system.process(int(pid))
+        if process is None:
+            proc.error(f'kill: ({pid}) - No such process')
+        elif process.user != USER:
+            proc.error(f'kill: ({pid}) - Operation not permitted')
+        else:
+            system.kill(process.pid)
+
+
+def netstat(proc, args):
+    yield 'Active Internet connections (only servers)'
+    yield 'Proto Recv-Q Send-Q Local Address           Foreign Address         State      '
+    for s in proc.shell.system.sockets():
+        yield f"{s.proto:<5} {s.recv_q:>6} {s.send_q:>6} {s.local:<23} {s.foreign:<23} {s.state:<11}"
+
+
+def connect(command):
+    def run(proc, args):
+        target = ' '.join(args).replace('http://', '').strip()
+        port = re.split(r'[\s:]+', target)[-1] if target else ''
+        for s in proc.shell.system.sockets():
+            if s.local.rsplit(':', 1)[-1] == port and s.banner:
+                yield s.banner
+                return
+        proc.error(f'{command}: connection refused')
+    return run
+
+
+def echo(proc, args):
+    yield ' '.join(args)
+
+
+def constant(text):
+    def run(proc, args):
+        yield text
+    return run
+
+
+def silent(proc, args):
+    return
+    yield
+
+
+def denied(command):
+    def run(proc, args):
+        proc.error(f'{command}: Permission denied')
+        return
+        yield
+    return run
+
+
+def help_(proc, args):
+    yield 'Available commands:'
+    for name, description in HELP.items():
+        yield f'{name:<11} - {description}'
+
+
+HELP = {
+    'ls': 'List directory contents (-a hidden, -l long format)',
+    'cd': 'Change directory',
+    'pwd': 'Print working directory',
+    'cat': 'Display file contents',
+    'head/tail': 'Show the first/last lines of a file (-n N)',
+    'grep': 'Search file contents (-r recursive, -i, -n, -v)',
+    'find': 'Search for files (-name PATTERN, -type f|d)',
+    'wc/sort': 'Count or sort lines',
+    'strings': 'Print printable strings in a file (-n MIN, -t d|o|x offsets)',
+    'hexdump': 'Hex dump of a file (-C canonical hex+ASCII, -n LEN, -s OFFSET)',
+    'xxd': 'Hex dump (-p plain hex), or turn one back into bytes (-r, -r -p)',
+    'tcpdump': 'Read packets from a capture file (-r FILE, -X/-x/-A, -c N, filter)',
+    'chmod': 'Change file permissions',
+    'touch/mkdir': 'Create an empty file or a directory',
+    'history': 'Show recent commands',
+    'ps': 'List processes',
+    'kill': 'Stop one of your processes (kill PID)',
+    'netstat': 'List listening sockets',
+    'whoami': 'Print current user',
+    'id': 'Print user ID info',
+    'date': 'Show current date/time',
+    '|, >, >>, &&, ;': 'Pipes, redirection and command lists',
+}
+
+COMMANDS = {
+    'ls': ls,
+    'cat': cat,
+    'grep': grep,
+    'head': head_tail('head'),
+    'tail': head_tail('tail'),
+    'wc': wc,
+    'sort': sort,
+    'strings': strings,
+    'hexdump': hexdump,
+    'xxd': xxd,
+    'tcpdump': tcpdump,
+    'find': find,
+    'cd': cd,
+    'pwd': pwd,
+    'chmod': chmod,
+    'ps': ps,
+    'kill': kill,
+    'netstat': netstat,
+    'nc': connect('nc'),
+    'curl': connect('curl'),
+    'echo': echo,
+    'whoami': constant(USER),
+    'id': constant('uid=1000(user) gid=1000(user) groups=1000(user)'),
+    'date': constant('Sat Jan 18 05:55:53 IST 2025'),
+    'clear': silent,
+    'help': help_,
+    'rm': denied('rm'),
+    'mv': denied('mv'),
+    'cp': denied('cp'),
+    'mkdir': mkdir,
+    'touch': touch,
+    'history': history,
+}
@@ -0,0 +1,81 @@
+"""
+Tab completion over command names and the level filesystem.
+
+Every directory of a level gets a sorted array of its entry names, built
+once per level tree. A completion is a bisect for the prefix followed by a scan
+over the matching names only, so it costs O(log n + matches) no matter how
+large the directory or the command table is.
+"""
+
+import bisect
+import functools
+from typing import Dict, List, Tuple
+
+from emulator.commands import COMMANDS
+from emulator.vfs import FileSystem, join_path
+
+COMMAND_NAMES = sorted(COMMANDS)
+
+
+def prefix_matches(names: List[str], prefix: str) -> List[str]:
+    """Return the entries of sorted `names` starting with `prefix`."""
+    matches = []
+    for i in range(bisect.bisect_left(names, prefix), len(names)):
+        if not names[i].startswith(prefix):
+            break
+        matches.append(names[i])
+    return matches
+
+
+class CompletionIndex:
+    def __init__(self, fs: FileSystem):
+        # Directory path -> sorted entry names, directories carry a '/' suffix
+        self.dirs: Dict[str, List[str]] = {}
+        for parts, node in fs.walk([]):
+            if node.is_dir:
+                self.dirs[join_path(parts)] = sorted(
+                    name + '/' if child.is_dir else name
+                    for name, child in node.children.items())
+
+    def entries(self, path: str, prefix: str) -> List[str]:
+        return prefix_matches(self.dirs.get(path, []), prefix)
+
+
+@functools.lru_cache(maxsize=64)
+def completion_index(fs: FileSystem) -> CompletionIndex:
+    return CompletionIndex(fs)
+
+
+def split_word(partial: str) -> Tuple[str, str]:
+    """Split an input line into (everything before the last word, last word)."""
+    head, _, word = partial.rpartition(' ')
+    return (head + ' ' if head or partial.endswith(' ') else ''), word
+
+
+def complete(shell, partial: str) -> List[str]:
+    """Return the possible replacements for the last word of `partial`."""
+    head, word = split_word(partial)
+    if not head:
+        return prefix_matches(COMMAND_NAMES, word)
+
+    directory, _, prefix = word.rpartition('/')
+    if word.startswith('/') and not directory:
+        directory = '/'
+    path, node = shell.lookup(directory or '.')
+    if node is None or not node.is_dir:
+        return []
+
+    index = completion_index(shell.overlay.fs)
+    matches = set(index.entries(path, prefix))
+    added = shell.overlay.added.get(path, ())
+    if added:
+        prefix_path = path.rstrip('/') + '/'
+        for name in added:
+            if name.startswith(prefix):
+                child = shell.overlay.nodes[prefix_path + name]
+                matches.add(name + '/' if child.is_dir else name)
+    if not prefix.startswith('.'):
+        matches = {m for m in matches if not m.startswith('.')}
+
+    lead = word[:len(word) - len(prefix)]
+    return [lead + name for name in sorted(matches)]
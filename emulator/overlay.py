@@ -0,0 +1,72 @@
+"""
+Copy-on-write view of a level filesystem for one terminal session.
+
+The shared level tree is never modified. A change only records the affected
+node under its absolute path: `chmod` stores a copy of that one node, `touch`
+and `mkdir` store the new node and remember its name under the parent
+directory, and a redirect stores the one rewritten file. Unchanged
+directories and files are read straight from the shared tree, so a session
+costs memory proportional to what it changed.
+"""
+
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from emulator.vfs import FILE_MODE, USER, FileSystem, Node, join_path, split_path
+
+
+class Overlay:
+    def __init__(self, fs: FileSystem):
+        self.fs = fs
+        self.nodes: Dict[str, Node] = {}
+        self.added: Dict[str, Set[str]] = {}
+
+    def lookup(self, path: str, cwd: str) -> Tuple[str, Optional[Node]]:
+        """Return (absolute path, node) for `path`, node is None if missing."""
+        parts = split_path(path, cwd)
+        key = join_path(parts)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.fs.lookup(parts)
+        return key, node
+
+    def list_dir(self, path: str, node: Node) -> List[Tuple[str, Node]]:
+        prefix = path.rstrip('/') + '/'
+        names = set(node.children) | self.added.get(path, set())
+        entries = []
+        for name in sorted(names):
+            child = self.nodes.get(prefix + name) or node.children.get(name)
+            entries.append((name, child))
+        return entries
+
+    def walk(self, path: str) -> Iterator[Tuple[str, Node]]:
+        """Yield (absolute path, node) for `path` and everything below it."""
+        key, node = self.lookup(path, '/')
+        if node is None:
+            return
+        stack = [(key, node)]
+        while stack:
+            key, node = stack.pop()
+            yield key, node
+            if node.is_dir:
+                prefix = key.rstrip('/') + '/'
+                for name, child in reversed(self.list_dir(key, node)):
+                    stack.append((prefix + name, child))
+
+    def set_mode(self, path: str, node: Node, mode: int):
+        self.nodes[path] = Node(node.name, mode, node.owner, node.data, node.children)
+
+    def write(self, path: str, node: Optional[Node], data: bytes):
+        """Replace the contents of the file at `path`, creating it if `node` is None."""
+        if node is None:
+            self.create(path, Node(path.rsplit('/', 1)[-1], FILE_MODE, USER, data=data))
+        else:
+            self.nodes[path] = Node(node.name, node.mode, node.owner, data, None)
+
+    def create(self, path: str, node: Node):
+        parent = path.rsplit('/', 1)[0] or '/'
+        self.nodes[path] = node
+        self.added.setdefault(parent, set()).add(node.name)
+
+    @staticmethod
+    def can_write(node: Node) -> bool:
+        return node.owner == USER and bool(node.mode & 0o200)
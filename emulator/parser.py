@@ -0,0 +1,101 @@
+"""
+Parser for the small subset of shell syntax the emulator understands:
+pipes (`|`), output redirection (`>`, `>>`) and command lists (`&&`, `;`).
+
+Quoting follows shlex's POSIX rules, but operators are recognised here so
+that a quoted `'|'` stays an ordinary argument.
+"""
+
+from typing import List, Optional, Tuple
+
+OPERATORS = ('&&', '>>', '|', '>', ';')
+REDIRECTS = ('>', '>>')
+
+# (argv, (redirect operator, target) or None)
+Stage = Tuple[List[str], Optional[Tuple[str, str]]]
+# (operator joining it to the previous pipeline or None, stages)
+Pipeline = Tuple[Optional[str], List[Stage]]
+
+
+def tokenize(line: str) -> List[Tuple[str, str]]:
+    """Split a command line into ('word', text) and ('op', operator) tokens."""
+    tokens = []
+    word, in_word, i = [], False, 0
+    while i < len(line):
+        char = line[i]
+        if char in '\'"':
+            end = i + 1
+            while True:
+                if end >= len(line):
+                    raise ValueError('No closing quotation')
+                if line[end] == char:
+                    break
+                if char == '"' and line[end] == '\\' and end + 1 < len(line) and line[end + 1] in '"\\$`':
+                    end += 1
+                word.append(line[end])
+                end += 1
+            in_word, i = True, end + 1
+            continue
+        if char == '\\' and i + 1 < len(line):
+            word.append(line[i + 1])
+            in_word, i = True, i + 2
+            continue
+        operator = next((op for op in OPERATORS if line.startswith(op, i)), None)
+        if char.isspace() or operator or char == '&':
+            if in_word:
+                tokens.append(('word', ''.join(word)))
+                word, in_word = [], False
+            if operator:
+                tokens.append(('op', operator))
+                i += len(operator)
+                continue
+            if char == '&':
+                raise ValueError("syntax error near unexpected token `&'")
+            i += 1
+            continue
+        word.append(char)
+        in_word, i = True, i + 1
+    if in_word:
+        tokens.append(('word', ''.join(word)))
+    return tokens
+
+
+def parse(line: str) -> List[Pipeline]:
+    """Parse a command line into pipelines joined by `&&` or `;`."""
+    pipelines: List[Pipeline] = []
+    joiner: Optional[str] = None
+    stages: List[Stage] = []
+    argv: List[str] = []
+    redirect: Optional[Tuple[str, str]] = None
+
+    tokens = tokenize(line)
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+        i += 1
+        if kind == 'word':
+            if redirect is not None:
+                raise ValueError(f'syntax error near unexpected token `{value}\'')
+            argv.append(value)
+            continue
+        if value in REDIRECTS:
+            if i >= len(tokens) or tokens[i][0] != 'word' or not argv:
+                raise ValueError(f'syntax error near unexpected token `{value}\'')
+            redirect = (value, tokens[i][1])
+            i += 1
+            continue
+        if not argv:
+            raise ValueError(f'syntax error near unexpected token `{value}\'')
+        stages.append((argv, redirect))
+        argv, redirect = [], None
+        if value != '|':
+            pipelines.append((joiner, stages))
+            joiner, stages = value, []
+
+    if argv:
+        stages.append((argv, redirect))
+    elif stages or joiner == '&&':
+        raise ValueError('syntax error: unexpected end of command')
+    if stages:
+        pipelines.append((joiner, stages))
+    return pipelines
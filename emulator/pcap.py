@@ -0,0 +1,192 @@
+"""
+Reader for pcap capture files, as shown by the emulator's `tcpdump -r`.
+
+Records are read one at a time with struct.unpack_from over a memoryview of
+the file, and only Ethernet, IPv4, TCP, UDP and ICMP are decoded, which is
+all the network levels need. Nothing is copied but the one packet being
+described, so a large capture costs no more memory than a small one.
+"""
+
+import ipaddress
+import struct
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Tuple
+
+MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e-6), b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e-9), b'\xa1\xb2\x3c\x4d': ('>', 1e-9),
+}
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINK_NAMES = {LINKTYPE_ETHERNET: 'EN10MB (Ethernet)', LINKTYPE_RAW: 'RAW (Raw IP)'}
+ETHERTYPE_IPV4 = 0x0800
+PROTOCOLS = {1: 'ICMP', 6: 'TCP', 17: 'UDP'}
+TCP_FLAGS = ((0x01, 'F'), (0x02, 'S'), (0x04, 'R'), (0x08, 'P'), (0x20, 'U'), (0x10, '.'))
+ICMP_TYPES = {0: 'echo reply', 3: 'destination unreachable', 8: 'echo request', 11: 'time exceeded'}
+
+
+class PcapError(ValueError):
+    pass
+
+
+class Packet:
+    """One decoded record; `ip` is the captured bytes from the IP header on."""
+
+    __slots__ = ('time', 'length', 'ip', 'protocol', 'src', 'dst', 'sport', 'dport', 'summary', 'payload')
+
+    def __init__(self, time: float, length: int, ip: memoryview):
+        self.time = time
+        self.length = length
+        self.ip = ip
+        self.protocol = None
+        self.src = self.dst = None
+        self.sport = self.dport = None
+        self.summary = ''
+        self.payload = ip[:0]
+
+    def line(self, timestamp: bool = True) -> str:
+        stamp = datetime.fromtimestamp(self.time, timezone.utc).strftime('%H:%M:%S.%f ') if timestamp else ''
+        if self.src is None:
+            return stamp + self.summary
+        src = self.src if self.sport is None else f'{self.src}.{self.sport}'
+        dst = self.dst if self.dport is None else f'{self.dst}.{self.dport}'
+        return f'{stamp}IP {src} > {dst}: {self.summary}'
+
+
+def read_header(view) -> Tuple[str, float, int, int]:
+    """(byte order, timestamp unit, snapshot length, link type) of a capture."""
+    if len(view) < 24:
+        raise PcapError('truncated dump file; tried to read 24 file header bytes, only got %d' % len(view))
+    magic = bytes(view[:4])
+    if magic not in MAGIC:
+        raise PcapError('bad dump file format')
+    order, unit = MAGIC[magic]
+    _, _, _, _, snaplen, linktype = struct.unpack_from(order + 'HHiIII', view, 4)
+    if linktype not in LINK_NAMES:
+        raise PcapError(f'unsupported link-layer type {linktype}')
+    return order, unit, snaplen, linktype
+
+
+def packets(view) -> Iterator[Packet]:
+    """Decode the records of the capture in `view` one by one."""
+    order, unit, _, linktype = read_header(view)
+    offset = 24
+    record = struct.Struct(order + 'IIII')
+    while offset < len(view):
+        if offset + record.size > len(view):
+            raise PcapError('truncated dump file; record header is cut short')
+        seconds, fraction, captured, length = record.unpack_from(view, offset)
+        offset += record.size
+        if offset + captured > len(view):
+            raise PcapError(f'truncated dump file; tried to read {captured} captured bytes')
+        frame = view[offset:offset + captured]
+        offset += captured
+        yield decode(frame, linktype, seconds + fraction * unit, length)
+
+
+def decode(frame: memoryview, linktype: int, time: float, length: int) -> Packet:
+    if linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            packet = Packet(time, length, frame[:0])
+            packet.summary = f'[|ether], length {length}'
+            return packet
+        (ethertype,) = struct.unpack_from('!H', frame, 12)
+        ip = frame[14:]
+        if ethertype != ETHERTYPE_IPV4:
+            packet = Packet(time, length, ip)
+            packet.summary = f'ethertype 0x{ethertype:04x}, length {length}'
+            return packet
+    else:
+        ip = frame
+    packet = Packet(time, length, ip)
+    if len(ip) < 20 or ip[0] >> 4 != 4:
+        packet.summary = f'[|ip], length {length}'
+        return packet
+
+    header = (ip[0] & 0x0f) * 4
+    total, protocol = struct.unpack_from('!H', ip, 2)[0], ip[9]
+    packet.src = str(ipaddress.IPv4Address(bytes(ip[12:16])))
+    packet.dst = str(ipaddress.IPv4Address(bytes(ip[16:20])))
+    packet.protocol = PROTOCOLS.get(protocol, str(protocol))
+    body = ip[header:total]
+    if protocol == 6 and len(body) >= 20:
+        sport, dport, seq, ack, offset_flags, window = struct.unpack_from('!HHIIHH', body)
+        packet.sport, packet.dport = sport, dport
+        packet.payload = body[(offset_flags >> 12) * 4:]
+        flags = ''.join(letter for bit, letter in TCP_FLAGS if offset_flags & bit) or 'none'
+        size = len(packet.payload)
+        sequence = f', seq {seq}:{seq + size}' if size else f', seq {seq}' if offset_flags & 0x02 else ''
+        acknowledge = f', ack {ack}' if offset_flags & 0x10 else ''
+        packet.summary = f'Flags [{flags}]{sequence}{acknowledge}, win {window}, length {size}'
+    elif protocol == 17 and len(body) >= 8:
+        packet.sport, packet.dport, size = struct.unpack_from('!HHH', body)
+        packet.payload = body[8:size]
+        packet.summary = f'UDP, length {size - 8}'
+    elif protocol == 1 and len(body) >= 4:
+        kind = ICMP_TYPES.get(body[0], f'type {body[0]}')
+        packet.payload = body[4:]
+        packet.summary = f'ICMP {kind}, length {len(body)}'
+    else:
+        packet.summary = f'ip-proto-{protocol} {len(body)}'
+    return packet
+
+
+def compile_filter(words: List[str]):
+    """A predicate for a small tcpdump filter: primitives joined by `and`.
+
+    Primitives: tcp, udp, icmp, [src|dst] host ADDR, [src|dst] port N.
+    """
+    tests = []
+    words = [word for word in words if word != 'and']
+    i = 0
+    while i < len(words):
+        word = words[i]
+        direction = None
+        if word in ('src', 'dst'):
+            direction, i = word, i + 1
+            word = words[i] if i < len(words) else ''
+        if word in ('tcp', 'udp', 'icmp') and direction is None:
+            tests.append(lambda p, name=word.upper(): p.protocol == name)
+            i += 1
+            continue
+        if word in ('host', 'port') and i + 1 < len(words):
+            value = words[i + 1]
+            if word == 'port' and not value.isdigit():
+                raise PcapError(f"illegal port number '{value}'")
+            value = int(value) if word == 'port' else value
+            fields = {'host': ('src', 'dst'), 'port': ('sport', 'dport')}[word]
+            if direction is not None:
+                fields = (fields[0],) if direction == 'src' else (fields[1],)
+            tests.append(lambda p, fields=fields, value=value: any(getattr(p, f) == value for f in fields))
+            i += 2
+            continue
+        raise PcapError(f"syntax error in filter expression near '{word}'")
+    return lambda packet: all(test(packet) for test in tests)
+
+
+# Printable ASCII stays, every other byte becomes '.'
+PRINTABLE = bytes(b if 32 <= b < 127 else ord('.') for b in range(256))
+
+
+def printable(data) -> str:
+    return bytes(data).translate(PRINTABLE).decode('ascii')
+
+
+def hex_ascii(data: memoryview) -> Iterator[str]:
+    """tcpdump -X lines: offset, 16 bytes as 4-digit groups and their ASCII."""
+    for start in range(0, len(data), 16):
+        row = bytes(data[start:start + 16])
+        yield f'\t0x{start:04x}:  {row.hex(" ", -2):<39}  {printable(row)}'
+
+
+def hex_only(data: memoryview) -> Iterator[str]:
+    """tcpdump -x lines: offset and 16 bytes as 4-digit groups."""
+    for start in range(0, len(data), 16):
+        row = bytes(data[start:start + 16])
+        yield f'\t0x{start:04x}:  {row.hex(" ", -2)}'
+
+
+def describe(view) -> Dict:
+    """Link type and snapshot length of a capture, for the 'reading from file' notice."""
+    _, _, snaplen, linktype = read_header(view)
+    return {'link': LINK_NAMES[linktype], 'snaplen': snaplen}
@@ -0,0 +1,48 @@
+"""
+Per-user terminal sessions with LRU eviction.
+"""
+
+import collections
+import threading
+import time
+from typing import Hashable
+
+from emulator.shell import Shell
+
+
+class SessionManager:
+    """Keeps one Shell per (user, level) key.
+
+    Sessions are kept in least-recently-used order; whenever a session is
+    requested, sessions idle for longer than `idle_timeout` seconds, and the
+    oldest ones beyond `max_sessions`, are dropped.
+    """
+
+    def __init__(self, max_sessions: int = 5000, idle_timeout: float = 1800):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, level: int) -> Shell:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(key, None)
+            shell = entry[1] if entry is not None else Shell(level)
+            self._sessions[key] = (now, shell)
+            self._evict(now)
+        return shell
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self, now: float):
+        while self._sessions:
+            key, (last_used, _) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_used < self.idle_timeout:
+                break
+            del self._sessions[key]
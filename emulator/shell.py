@@ -0,0 +1,161 @@
+"""
+Command-line front end of the terminal emulator.
+"""
+
+import collections
+from typing import Iterator, List, Optional, Tuple
+
+from emulator.commands import COMMANDS, CommandResult, Process, UsageError, display, encode_line
+from emulator.completion import complete
+from emulator.overlay import Overlay
+from emulator.parser import Stage, parse
+from emulator.system import SystemView, level_system
+from emulator.vfs import HOME, Node, load_level_fs
+
+HISTORY_SIZE = 100
+# A command's output is returned in pages of at most PAGE_LINES lines or
+# about PAGE_BYTES bytes; the rest is produced only when asked for
+PAGE_LINES = 1000
+PAGE_BYTES = 64 * 1024
+
+
+class Run:
+    """A command line being executed, drained one page of output at a time."""
+
+    def __init__(self, shell: 'Shell', pipelines):
+        self.errors: List[str] = []
+        self.status = 0
+        self.held: Optional[str] = None
+        self.lines = self._lines(shell, pipelines)
+
+    def _lines(self, shell: 'Shell', pipelines) -> Iterator[str]:
+        for joiner, stages in pipelines:
+            if joiner == '&&' and self.status != 0:
+                continue
+            procs = []
+            yield from shell.start_pipeline(stages, procs)
+            for proc in procs:
+                self.errors.extend(proc.errors)
+            self.status = procs[-1].status
+
+
+class Shell:
+    """One terminal session on a level.
+
+    All sessions on a level share its filesystem; the session's own changes
+    live in an Overlay (and the processes it killed in a SystemView), and
+    only the last HISTORY_SIZE commands are kept.
+    A command's output comes back one page at a time; see more().
+    """
+
+    def __init__(self, level: int, cwd: str = HOME):
+        self.level = level
+        self.overlay = Overlay(load_level_fs(level))
+        self.system = SystemView(level_system(level))
+        self.cwd = cwd
+        self.history = collections.deque(maxlen=HISTORY_SIZE)
+        self.pending: Optional[Run] = None
+
+    def lookup(self, path: str) -> Tuple[str, Optional[Node]]:
+        return self.overlay.lookup(path, self.cwd)
+
+    def list_dir(self, path: str, node: Node) -> List[Tuple[str, Node]]:
+        return self.overlay.list_dir(path, node)
+
+    def walk(self, path: str) -> Iterator[Tuple[str, Node]]:
+        return self.overlay.walk(path)
+
+    def set_mode(self, path: str, node: Node, mode: int):
+        self.overlay.set_mode(path, node, mode)
+
+    def create(self, path: str, node: Node):
+        self.overlay.create(path, node)
+
+    def complete(self, partial: str) -> List[str]:
+        return complete(self, partial)
+
+    def execute(self, command: str) -> CommandResult:
+        if command.strip():
+            self.history.append(command)
+        self.discard()
+        try:
+            pipelines = parse(command)
+        except ValueError as e:
+            return CommandResult(stderr=f'bash: {e}', returncode=2, cwd=self.cwd)
+        self.pending = Run(self, pipelines)
+        return self.more()
+
+    def more(self) -> CommandResult:
+        """The next page of the running command's output (empty when there is none)."""
+        run = self.pending
+        if run is None:
+            return CommandResult(cwd=self.cwd)
+        output = [] if run.held is None else [run.held]
+        size = sum(len(line) + 1 for line in output)
+        run.held = None
+        for line in run.lines:
+            if len(output) >= PAGE_LINES or size >= PAGE_BYTES:
+                # The page is full and there is more: keep this line for the next one
+                run.held = line
+                break
+            output.append(line)
+            size += len(line) + 1
+        else:
+            self.pending = None
+        errors, run.errors = run.errors, []
+        more = self.pending is not None
+        return CommandResult(display('\n'.join(output)), '\n'.join(errors), 0 if more else run.status, self.cwd, more)
+
+    def discard(self):
+        """Drop the rest of the running command's output."""
+        if self.pending is not None:
+            self.pending.lines.close()
+            self.pending = None
+
+    def start_pipeline(self, stages: List[Stage], procs: List[Process]) -> Iterator[str]:
+        """Chain the stages' generators (adding their Processes to `procs`) and yield the last one's output."""
+        stdin = None
+        for argv, redirect in stages:
+            proc = Process(self, stdin)
+            procs.append(proc)
+            lines = self.spawn(proc, argv)
+            if redirect is not None:
+                self.redirect(proc, lines, *redirect)
+                stdin = iter(())
+            else:
+                stdin = lines
+        yield from stdin
+
+    def spawn(self, proc: Process, argv: List[str]) -> Iterator[str]:
+        argv = [HOME + arg[1:] if arg == '~' or arg.startswith('~/') else arg for arg in argv]
+        builtin = COMMANDS.get(argv[0])
+        if builtin is None:
+            proc.error(f'Command not found: {argv[0]}', 127)
+            return iter(())
+        return self._guard(proc, argv[0], builtin(proc, argv[1:]))
+
+    @staticmethod
+    def _guard(proc: Process, name: str, lines: Iterator[str]) -> Iterator[str]:
+        try:
+            yield from lines
+        except UsageError as e:
+            proc.error(f'{name}: {e}', 2)
+
+    def redirect(self, proc: Process, lines: Iterator[str], operator: str, target: str):
+        path, node = self.lookup(target)
+        if node is None:
+            _, parent = self.lookup(path.rsplit('/', 1)[0] or '/')
+            if parent is None or not parent.is_dir:
+                proc.error(f'bash: {target}: No such file or directory')
+                return
+            writable = Overlay.can_write(parent)
+        else:
+            writable = not node.is_dir and Overlay.can_write(node)
+        if not writable:
+            proc.error(f'bash: {target}: ' + ('Is a directory' if node is not None and node.is_dir else 'Permission denied'))
+            return
+
+        data = bytearray(node.data if node is not None and operator == '>>' else b'')
+        for line in lines:
+            data += encode_line(line)
+        self.overlay.write(path, node, bytes(data))
@@ -0,0 +1,125 @@
+"""
+Simulated process and socket tables of a level (ps, netstat, kill and the
+/get_processes and /get_network_stats endpoints).
+
+Each level's tables are built once per catalog version from its challenge
+metadata (`processes` and `sockets` in level_info.json), or from a default
+init/sshd/bash system when the level lists none. Rows are tuples in pid and
+port order, and the JSON clients poll is serialised once, with its ETag.
+
+A session never copies the tables: its SystemView only records the pids it
+killed, and the JSON it serves is derived from the shared tables and that
+set, cached until the set changes.
+"""
+
+import collections
+import functools
+import hashlib
+import json
+from typing import Dict, FrozenSet, Iterator, Optional, Tuple
+
+from catalog import catalog
+from emulator.vfs import _level_data
+
+PROCESS_FIELDS = ('user', 'pid', 'cpu', 'mem', 'vsz', 'rss', 'tty', 'stat', 'start', 'time', 'command')
+# `pid` ties a socket to its process; the banner is what nc/curl print and is never served as JSON
+SOCKET_FIELDS = ('proto', 'recv_q', 'send_q', 'local', 'foreign', 'state', 'pid', 'banner')
+SOCKET_JSON_FIELDS = SOCKET_FIELDS[:-1]
+
+ProcessRow = collections.namedtuple('ProcessRow', PROCESS_FIELDS)
+SocketRow = collections.namedtuple('SocketRow', SOCKET_FIELDS)
+
+DEFAULT_PROCESSES = (
+    {'user': 'root', 'pid': 1, 'vsz': 2384, 'rss': 668, 'stat': 'Ss', 'command': '/sbin/init'},
+    {'user': 'root', 'pid': 423, 'vsz': 2880, 'rss': 712, 'stat': 'Ss', 'command': 'sshd'},
+    {'user': 'user', 'pid': 1001, 'vsz': 8232, 'rss': 5120, 'tty': 'pts/0', 'stat': 'Ss', 'command': '-bash'},
+)
+DEFAULT_SOCKETS = (
+    {'proto': 'tcp', 'local': '0.0.0.0:22', 'foreign': '0.0.0.0:*', 'state': 'LISTEN', 'pid': 423},
+)
+PROCESS_DEFAULTS = {'cpu': 0.0, 'mem': 0.0, 'vsz': 0, 'rss': 0, 'tty': '?', 'stat': 'S', 'start': '14:30',
+                    'time': '0:00'}
+SOCKET_DEFAULTS = {'recv_q': 0, 'send_q': 0, 'foreign': '0.0.0.0:*', 'state': 'LISTEN', 'pid': None,
+                   'banner': None}
+
+
+def _row(fields: Tuple[str, ...], defaults: Dict, entry) -> Dict:
+    # Metadata may leave out columns, and may carry keys that aren't columns
+    return {field: entry[field] if field in entry else defaults[field] for field in fields}
+
+
+def _port(socket: SocketRow) -> int:
+    port = socket.local.rsplit(':', 1)[-1]
+    return int(port) if port.isdigit() else 0
+
+
+def serialise(fields: Tuple[str, ...], rows) -> Tuple[bytes, str]:
+    """Column names plus one array per row, and the ETag of that body."""
+    body = json.dumps({'fields': fields, 'rows': [row[:len(fields)] for row in rows]},
+                      separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha1(body).hexdigest()
+
+
+class SystemTable:
+    """A level's processes and sockets, shared by all of its sessions."""
+
+    def __init__(self, processes, sockets):
+        self.processes = tuple(sorted((ProcessRow(**_row(PROCESS_FIELDS, PROCESS_DEFAULTS, p)) for p in processes),
+                                      key=lambda p: p.pid))
+        self.sockets = tuple(sorted((SocketRow(**_row(SOCKET_FIELDS, SOCKET_DEFAULTS, s)) for s in sockets),
+                                    key=lambda s: (s.proto, _port(s))))
+        self.by_pid: Dict[int, ProcessRow] = {p.pid: p for p in self.processes}
+        self.processes_json = serialise(PROCESS_FIELDS, self.processes)
+        self.sockets_json = serialise(SOCKET_JSON_FIELDS, self.sockets)
+
+
+def level_system(level: int) -> SystemTable:
+    """Return the level's tables, rebuilt when the catalog changes."""
+    catalog.refresh()
+    return _level_system(level, catalog.version)
+
+
+@functools.lru_cache(maxsize=64)
+def _level_system(level: int, version: int) -> SystemTable:
+    # The data of this same catalog version, or a reload in between would be cached under the old one
+    data = _level_data(level, version)
+    return SystemTable(data['processes'] or DEFAULT_PROCESSES, data['sockets'] or DEFAULT_SOCKETS)
+
+
+class SystemView:
+    """One session's view of a level's tables: the shared rows minus what it killed."""
+
+    def __init__(self, table: SystemTable):
+        self.table = table
+        self.killed: FrozenSet[int] = frozenset()
+        self._json: Dict[str, Tuple[FrozenSet[int], Tuple[bytes, str]]] = {}
+
+    def process(self, pid: int) -> Optional[ProcessRow]:
+        return None if pid in self.killed else self.table.by_pid.get(pid)
+
+    def processes(self) -> Iterator[ProcessRow]:
+        return (p for p in self.table.processes if p.pid not in self.killed)
+
+    def sockets(self) -> Iterator[SocketRow]:
+        return (s for s in self.table.sockets if s.pid not in self.killed)
+
+    def kill(self, pid: int):
+        self.killed = self.killed | {pid}
+
+    def processes_json(self) -> Tuple[bytes, str]:
+        """(body, ETag) of the process table; the shared one until something is killed."""
+        if not self.killed:
+            return self.table.processes_json
+        return self._derived('processes', PROCESS_FIELDS, self.processes)
+
+    def sockets_json(self) -> Tuple[bytes, str]:
+        if not self.killed:
+            return self.table.sockets_json
+        return self._derived('sockets', SOCKET_JSON_FIELDS, self.sockets)
+
+    def _derived(self, name: str, fields, rows) -> Tuple[bytes, str]:
+        cached = self._json.get(name)
+        if cached is None or cached[0] is not self.killed:
+            cached = (self.killed, serialise(fields, rows()))
+            self._json[name] = cached
+        return cached[1]
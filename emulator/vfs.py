@@ -0,0 +1,181 @@
+"""
+In-memory virtual filesystem for the terminal levels.
+
+Each level gets one tree, built from the challenge data files held by the
+challenge catalog (and rebuilt when the catalog picks up an edit):
+
+* challenges/level{n}/level_info.json  - `files` keyed by absolute path,
+  optional `modes` ({path: "644"}) for files that need special permissions
+* challenges/bash_compiler/level{n}/challenge.json - `initial_files` keyed by
+  a path relative to the home directory, and `binary_files` (base64, for
+  captures and other non-text files) keyed the same way
+
+Paths are resolved by walking one dict lookup per component, so the cost of
+a lookup only depends on the depth of the path.
+"""
+
+import base64
+import functools
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from catalog import catalog
+
+HOME = '/home/user'
+USER = 'user'
+DIR_MODE = 0o755
+FILE_MODE = 0o644
+SCRIPT_MODE = 0o755
+
+
+class Node:
+    """A file (data is bytes) or a directory (children is a dict)."""
+
+    __slots__ = ('name', 'mode', 'owner', 'data', 'children')
+
+    def __init__(self, name: str, mode: int, owner: str = USER,
+                 data: Optional[bytes] = None, children: Optional[Dict[str, 'Node']] = None):
+        self.name = name
+        self.mode = mode
+        self.owner = owner
+        self.data = data
+        self.children = children
+
+    @property
+    def is_dir(self) -> bool:
+        return self.children is not None
+
+    @property
+    def size(self) -> int:
+        return 4096 if self.is_dir else len(self.data)
+
+    @property
+    def readable(self) -> bool:
+        return bool(self.mode & 0o400)
+
+    @property
+    def executable(self) -> bool:
+        return bool(self.mode & 0o100)
+
+
+def split_path(path: str, cwd: str = HOME) -> List[str]:
+    """Return the normalised components of `path` relative to `cwd`."""
+    if path == '~' or path.startswith('~/'):
+        path = HOME + path[1:]
+    parts = [] if path.startswith('/') else [p for p in cwd.split('/') if p]
+    for part in path.split('/'):
+        if part in ('', '.'):
+            continue
+        if part == '..':
+            if parts:
+                parts.pop()
+        else:
+            parts.append(part)
+    return parts
+
+
+def join_path(parts: List[str]) -> str:
+    return '/' + '/'.join(parts)
+
+
+class FileSystem:
+    def __init__(self, root: Node):
+        self.root = root
+
+    def lookup(self, parts: List[str]) -> Optional[Node]:
+        node = self.root
+        for part in parts:
+            if not node.is_dir:
+                return None
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def resolve(self, path: str, cwd: str = HOME) -> Optional[Node]:
+        return self.lookup(split_path(path, cwd))
+
+    def walk(self, parts: List[str]) -> Iterator[Tuple[List[str], Node]]:
+        """Yield (path parts, node) for `parts` and everything below it."""
+        node = self.lookup(parts)
+        if node is None:
+            return
+        stack = [(parts, node)]
+        while stack:
+            node_parts, node = stack.pop()
+            yield node_parts, node
+            if node.is_dir:
+                for name in sorted(node.children, reverse=True):
+                    stack.append((node_parts + [name], node.children[name]))
+
+    @classmethod
+    def from_files(cls, files: Dict[str, bytes], modes: Optional[Dict[str, int]] = None) -> 'FileSystem':
+        modes = modes or {}
+        root = Node('', DIR_MODE, owner='root', children={})
+        fs = cls(root)
+        fs._mkdirs(split_path(HOME, '/'))
+        for path, data in files.items():
+            parts = split_path(path, HOME)
+            parent = fs._mkdirs(parts[:-1])
+            owner = USER if join_path(parts).startswith(HOME + '/') else 'root'
+            mode = modes.get(join_path(parts))
+            if mode is None:
+                mode = SCRIPT_MODE if parts[-1].endswith('.sh') else FILE_MODE
+            parent.children[parts[-1]] = Node(parts[-1], mode, owner, data=data)
+        return fs
+
+    def _mkdirs(self, parts: List[str]) -> Node:
+        node = self.root
+        for i, part in enumerate(parts):
+            child = node.children.get(part)
+            if child is None:
+                owner = USER if join_path(parts[:i + 1]).startswith(HOME) else 'root'
+                child = Node(part, DIR_MODE, owner, children={})
+                node.children[part] = child
+            node = child
+        return node
+
+
+def level_data(level: int) -> Dict:
+    """Merge the terminal-related data of both challenge sources for a level."""
+    catalog.refresh()
+    return _level_data(level, catalog.version)
+
+
+@functools.lru_cache(maxsize=64)
+def _level_data(level: int, version: int) -> Dict:
+    info = catalog.level_info(level)
+    info = info.data if info is not None else {}
+    compiler = catalog.challenge(level)
+    compiler = compiler.data if compiler is not None else {}
+
+    files = {}
+    for name, content in compiler.get('initial_files', {}).items():
+        files[join_path(split_path(name, HOME))] = content
+    files.update(info.get('files', {}))
+    binary_files = {join_path(split_path(name, HOME)): content
+                    for name, content in compiler.get('binary_files', {}).items()}
+
+    return {
+        'files': files,
+        'binary_files': binary_files,
+        'modes': {path: int(mode, 8) for path, mode in info.get('modes', {}).items()},
+        'processes': info.get('processes', []),
+        'sockets': info.get('sockets', []),
+    }
+
+
+def load_level_fs(level: int) -> FileSystem:
+    """Return the level's shared tree, rebuilt when the catalog changes.
+
+    Sessions opened before a change keep the tree they started with.
+    """
+    catalog.refresh()
+    return _load_level_fs(level, catalog.version)
+
+
+@functools.lru_cache(maxsize=64)
+def _load_level_fs(level: int, version: int) -> FileSystem:
+    data = _level_data(level, version)
+    files = {path: content.encode('utf-8') for path, content in data['files'].items()}
+    files.update((path, base64.b64decode(content)) for path, content in data['binary_files'].items())
+    return FileSystem.from_files(files, data['modes'])
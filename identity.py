@@ -0,0 +1,51 @@
+"""
+Identity cache in front of Flask-Login's user_loader.
+
+Flask-Login loads the user on every authenticated request. The cache keeps a
+small detached snapshot of each user (id, name, level and the timing
+columns) per worker, least-recently-used first, for `ttl` seconds, so
+repeated requests from the same team don't query the database to learn who
+they are. Code that changes one of the snapshotted columns must call
+`update()` or `invalidate()`; other workers see the change once their copy
+expires.
+
+A snapshot is not bound to a database session, so views write through
+UPDATE statements or the write-behind buffer instead of assigning to
+`current_user`.
+"""
+
+from typing import Hashable, Optional
+
+from flask_login import UserMixin
+
+from ttl_cache import TTLCache
+
+
+class UserSnapshot(UserMixin):
+    FIELDS = ('id', 'username', 'current_level', 'start_time', 'submission_time',
+              'qr_scan_time', 'first_scan_time')
+    __slots__ = FIELDS
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_user(cls, user) -> 'UserSnapshot':
+        return cls(**{name: getattr(user, name) for name in cls.FIELDS})
+
+
+class IdentityCache(TTLCache):
+    """User snapshots by id; a user that doesn't exist is not cached."""
+
+    def update(self, user_id: Hashable, values: Optional[dict] = None, set_once: Optional[dict] = None):
+        """Apply a queued write to the cached snapshot; set-once fields only fill None."""
+        def change(snapshot):
+            fields = {name: getattr(snapshot, name) for name in snapshot.FIELDS}
+            fields.update(values or {})
+            for name, value in (set_once or {}).items():
+                if fields.get(name) is None:
+                    fields[name] = value
+            return type(snapshot)(**fields)
+
+        self.replace(user_id, change)
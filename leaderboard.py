@@ -0,0 +1,202 @@
+"""
+Materialised leaderboard ranking.
+
+Teams are kept in a list sorted by rank key, next to a dict of standings by
+user id, so "top K", "the page after this cursor" and "what is my rank" are
+a bisect plus a slice instead of a full query and sort per page view. The
+ranking is built from the database and then updated in place whenever a
+team's times or level change. Display strings are formatted once per update
+rather than on every view.
+
+The ranking is loaded on first use. Other workers don't see this worker's
+updates, so a ranking older than `max_age` seconds is re-read from the
+database on its next read (one query), and only counts as a change if some
+team actually moved.
+
+Rendered fragments are cached against `version`, which goes up on every
+change, so a burst of page views between two submissions renders once.
+"""
+
+import bisect
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pytz
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes; keep aware ones comparable with them
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(pytz.UTC).replace(tzinfo=None)
+    return value
+
+
+def _format(value: Optional[datetime], missing: str) -> str:
+    return value.strftime(TIME_FORMAT) if value else missing
+
+
+class Standing:
+    __slots__ = ('user_id', 'username', 'current_level', 'submission_time', 'qr_scan_time',
+                 'first_scan_time', 'formatted_submission_time', 'formatted_qr_scan_time',
+                 'formatted_first_scan_time', 'key')
+
+    def __init__(self, user_id: int, username: str, current_level: int = 1,
+                 submission_time=None, qr_scan_time=None, first_scan_time=None):
+        self.user_id = user_id
+        self.username = username
+        self.current_level = current_level or 1
+        self.submission_time = _naive_utc(submission_time)
+        self.qr_scan_time = _naive_utc(qr_scan_time)
+        self.first_scan_time = _naive_utc(first_scan_time)
+        self.formatted_submission_time = _format(self.submission_time, 'Not submitted')
+        self.formatted_qr_scan_time = _format(self.qr_scan_time, 'Not scanned')
+        self.formatted_first_scan_time = _format(self.first_scan_time, 'Not started')
+        # Ordered by first scan, teams that haven't scanned first (as SQLite orders NULLs)
+        if self.first_scan_time is None:
+            self.key = (0, 0, user_id)
+        else:
+            self.key = (1, int(self.first_scan_time.replace(tzinfo=pytz.UTC).timestamp() * 1e6), user_id)
+
+    def replace(self, **changes) -> 'Standing':
+        fields = {name: getattr(self, name) for name in
+                  ('user_id', 'username', 'current_level', 'submission_time', 'qr_scan_time', 'first_scan_time')}
+        fields.update(changes)
+        return Standing(**fields)
+
+
+def encode_cursor(key: Tuple[int, int, int]) -> str:
+    return '.'.join(str(part) for part in key)
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        parts = tuple(int(part) for part in cursor.split('.'))
+    except ValueError:
+        return None
+    return parts if len(parts) == 3 else None
+
+
+class Leaderboard:
+    def __init__(self, loader: Callable[[], Iterable[Standing]], max_age: float = 5.0):
+        self.loader = loader
+        self.max_age = max_age
+        self.version = 0
+        self._keys: List[Tuple[int, int, int]] = []
+        self._standings: Dict[int, Standing] = {}
+        self._by_key: Dict[Tuple[int, int, int], Standing] = {}
+        self._flags = 0
+        self._loaded = None
+        self._fragments = {}
+        self._lock = threading.RLock()
+        # Called with each standing that changed, by update() and rebuild()
+        self.on_change = None
+
+    def rebuild(self):
+        standings = list(self.loader())
+        with self._lock:
+            initial = self._loaded is None
+            self._loaded = time.monotonic()
+            changed = [s for s in standings if self._row(s) != self._row(self._standings.get(s.user_id))]
+            if not changed and len(standings) == len(self._standings):
+                return
+            self._standings = {s.user_id: s for s in standings}
+            self._by_key = {s.key: s for s in standings}
+            self._keys = sorted(self._by_key)
+            self._flags = sum(s.current_level for s in standings)
+            self._changed()
+            if not initial:
+                for standing in changed:
+                    self._notify(standing)
+
+    @staticmethod
+    def _row(standing: Optional[Standing]):
+        if standing is None:
+            return None
+        return standing.key, standing.username, standing.current_level, standing.submission_time, standing.qr_scan_time
+
+    def refresh(self):
+        if self._loaded is None or time.monotonic() - self._loaded >= self.max_age:
+            self.rebuild()
+
+    def _changed(self):
+        self.version += 1
+        self._fragments = {}
+
+    def update(self, user_id: int, username: Optional[str] = None, set_once: Optional[Dict] = None, **changes):
+        """Insert or move one team; `changes` are Standing fields, `set_once` ones only fill None."""
+        self.refresh()
+        with self._lock:
+            old = self._standings.get(user_id)
+            for name, value in (set_once or {}).items():
+                if old is None or getattr(old, name) is None:
+                    changes[name] = value
+            if old is None:
+                if username is None:
+                    return
+                new = Standing(user_id, username, **changes)
+            else:
+                new = old.replace(**changes)
+                index = bisect.bisect_left(self._keys, old.key)
+                del self._keys[index]
+                del self._by_key[old.key]
+                self._flags -= old.current_level
+            bisect.insort(self._keys, new.key)
+            self._by_key[new.key] = new
+            self._standings[user_id] = new
+            self._flags += new.current_level
+            self._changed()
+            self._notify(new)
+
+    def _notify(self, standing: Standing):
+        if self.on_change is not None:
+            self.on_change(standing, bisect.bisect_left(self._keys, standing.key) + 1)
+
+    def __len__(self):
+        self.refresh()
+        return len(self._keys)
+
+    @property
+    def flags(self) -> int:
+        self.refresh()
+        return self._flags
+
+    def rank(self, user_id: int) -> Optional[int]:
+        self.refresh()
+        with self._lock:
+            standing = self._standings.get(user_id)
+            if standing is None:
+                return None
+            return bisect.bisect_left(self._keys, standing.key) + 1
+
+    def top(self, k: int) -> List[Tuple[int, Standing]]:
+        return self.page(None, k)[0]
+
+    def page(self, after: Optional[str], limit: int) -> Tuple[List[Tuple[int, Standing]], Optional[str]]:
+        """Return ([(rank, standing)], cursor of the next page or None) after the `after` cursor."""
+        self.refresh()
+        with self._lock:
+            start = 0
+            key = decode_cursor(after) if after else None
+            if key is not None:
+                start = bisect.bisect_right(self._keys, key)
+            keys = self._keys[start:start + limit]
+            rows = [(start + i + 1, self._by_key[k]) for i, k in enumerate(keys)]
+            more = start + limit < len(self._keys)
+        return rows, encode_cursor(keys[-1]) if more and keys else None
+
+    def fragment(self, key, render: Callable[[], object]):
+        """Return render()'s result, cached until the ranking changes."""
+        self.refresh()
+        version = self.version
+        fragments = self._fragments
+        if key not in fragments:
+            value = render()
+            with self._lock:
+                if self.version == version:
+                    fragments[key] = value
+            return value
+        return fragments[key]
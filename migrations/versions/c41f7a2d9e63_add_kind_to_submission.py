@@ -0,0 +1,26 @@
+"""Add kind to Submission model
+
+Revision ID: c41f7a2d9e63
+Revises: b7efde345d29
+Create Date: 2025-04-20 18:12:05.417230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f7a2d9e63'
+down_revision = 'b7efde345d29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('submission', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('kind', sa.String(length=16), nullable=False, server_default='flag'))
+
+
+def downgrade():
+    with op.batch_alter_table('submission', schema=None) as batch_op:
+        batch_op.drop_column('kind')
@@ -0,0 +1,32 @@
+"""Add level time and first scan indexes
+
+Revision ID: d5a8e1f04b27
+Revises: c41f7a2d9e63
+Create Date: 2025-04-21 10:03:48.128905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8e1f04b27'
+down_revision = 'c41f7a2d9e63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('level_time', schema=None) as batch_op:
+        batch_op.create_index('ix_level_time_user_level_start', ['user_id', 'level', 'start_time'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_first_scan_time', ['first_scan_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_first_scan_time')
+
+    with op.batch_alter_table('level_time', schema=None) as batch_op:
+        batch_op.drop_index('ix_level_time_user_level_start')
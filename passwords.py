@@ -0,0 +1,78 @@
+"""
+Password hashing on a bounded worker pool.
+
+bcrypt is deliberately slow (about 250 ms at cost 12) and releases the GIL
+while it works, so hashes run on a small thread pool sized to the CPU count
+instead of on however many request threads happen to be logging in. At most
+`workers + max_queue` hashes can be running or waiting; beyond that a
+request is refused straight away with PasswordHasherBusy, which the views
+turn into a 503 with Retry-After instead of letting every worker stall.
+
+Hashes record their cost factor, so a login whose stored hash was made with
+a different `rounds` setting is transparently rehashed.
+"""
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes are already queued; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f'Password hashing saturated, retry after {retry_after}s')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = 12, workers: int = None, max_queue: int = 32):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.pending = 0
+        # Moving average of one hash, used for Retry-After
+        self.average = 0.25
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='bcrypt')
+        self._lock = threading.Lock()
+
+    def hash(self, password: str) -> bytes:
+        return self._run(lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)))
+
+    def verify(self, password: str, hashed) -> bool:
+        if isinstance(hashed, str):
+            hashed = hashed.encode('utf-8')
+        return self._run(lambda: bcrypt.checkpw(password.encode('utf-8'), hashed))
+
+    def needs_rehash(self, hashed) -> bool:
+        if isinstance(hashed, str):
+            hashed = hashed.encode('utf-8')
+        # $2b$12$<salt+hash>
+        try:
+            return int(hashed.split(b'$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.pending * self.average / self.workers))
+
+    def _run(self, fn):
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                raise PasswordHasherBusy(self.retry_after())
+            self.pending += 1
+        try:
+            return self._pool.submit(self._timed, fn).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _timed(self, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.average = 0.8 * self.average + 0.2 * (time.perf_counter() - start)
+        return result
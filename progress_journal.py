@@ -0,0 +1,156 @@
+"""
+Append-only journal of progress transitions.
+
+Every transition (flag accepted, location verified, riddle assigned, ...) is
+written as one JSON line holding the user's full state after the change, so
+replay is a last-write-wins scan with no game logic in it. Lines are buffered
+and written + fsynced in batches by a background thread; a transition is
+durable once the next batch is flushed (at most `flush_interval` seconds).
+
+When the journal grows past `compact_after` records it is folded into
+`snapshot.json` and truncated. Compaction works from the files on disk, not
+from this process's memory, so it is safe with several workers appending to
+the same journal. Writers and replay hold a shared flock while appending or
+reading and the compactor holds an exclusive one.
+"""
+
+import atexit
+import fcntl
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+PROGRESS = 'p'
+RIDDLE = 'r'
+
+
+class ProgressJournal:
+    def __init__(self, directory: str, flush_interval: float = 0.05,
+                 compact_after: int = 20000):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.compact_after = compact_after
+        self.journal_path = os.path.join(directory, 'journal.log')
+        self.snapshot_path = os.path.join(directory, 'snapshot.json')
+        os.makedirs(directory, exist_ok=True)
+
+        self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lock_fd = os.open(os.path.join(directory, 'journal.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._records_since_compaction = 0
+        self._thread = threading.Thread(target=self._run, name='progress-journal', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, event: str, kind: str, user_id, state: Optional[Dict]):
+        """Queue one transition; `state` is the full state after it, None when cleared."""
+        line = json.dumps({'e': event, 'k': kind, 'u': str(user_id), 's': state},
+                          separators=(',', ':'))
+        with self._pending_lock:
+            self._pending.append(line)
+
+    def flush(self):
+        """Write and fsync everything queued so far."""
+        with self._write_lock:
+            with self._pending_lock:
+                lines, self._pending = self._pending, []
+            if not lines:
+                return
+            data = ('\n'.join(lines) + '\n').encode('utf-8')
+            fcntl.flock(self._lock_fd, fcntl.LOCK_SH)
+            try:
+                os.write(self._fd, data)
+                os.fsync(self._fd)
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            self._records_since_compaction += len(lines)
+
+    def replay(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """Rebuild (progress, riddles) keyed by user id from snapshot + journal."""
+        # A shared flock for both reads, so no compaction can move records
+        # from the journal into the snapshot between them. The write lock
+        # keeps a flush from this process from dropping our flock midway.
+        with self._write_lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_SH)
+            try:
+                return self._replay()
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _replay(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        progress, riddles = self._read_snapshot()
+        states = {PROGRESS: progress, RIDDLE: riddles}
+        with open(self.journal_path, 'rb') as f:
+            for raw in f:
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    continue
+                target = states.get(record.get('k'))
+                if target is None:
+                    continue
+                if record['s'] is None:
+                    target.pop(record['u'], None)
+                else:
+                    target[record['u']] = record['s']
+        return progress, riddles
+
+    def compact(self):
+        """Fold the journal into the snapshot and truncate it."""
+        self.flush()
+        # Holding the write lock too: a flush from this process would
+        # otherwise downgrade our exclusive flock to a shared one.
+        with self._write_lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                progress, riddles = self._replay()
+                tmp_path = self.snapshot_path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump({'progress': progress, 'riddles': riddles}, f, separators=(',', ':'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.snapshot_path)
+                self._fsync_directory()
+                os.ftruncate(self._fd, 0)
+                os.fsync(self._fd)
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        self._records_since_compaction = 0
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        os.close(self._fd)
+        os.close(self._lock_fd)
+
+    def _read_snapshot(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return {}, {}
+        return snapshot.get('progress', {}), snapshot.get('riddles', {})
+
+    def _fsync_directory(self):
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self.flush()
+            if self._records_since_compaction >= self.compact_after:
+                self.compact()
@@ -0,0 +1,262 @@
+"""
+Storage for per-user level progress.
+
+Progress used to live in a module-level dict inside app.py, which meant every
+gunicorn worker had its own copy. The store below keeps progress in a backend
+that all workers share (SQLite by default) with a short-lived cache in front of
+it so the hot redirect paths don't hit the database on every request.
+
+Each user's riddle state (see riddles.RiddleManager.export_state) is kept in
+the same backend, next to their progress, so a riddle assigned by one worker
+can be answered on another.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class UserProgress:
+    def __init__(self, current_level=1, at_hint=False, completed_levels=None):
+        self.current_level = current_level
+        self.at_hint = at_hint
+        self.completed_levels = set(completed_levels or ())
+
+    def copy(self) -> 'UserProgress':
+        return UserProgress(self.current_level, self.at_hint, self.completed_levels)
+
+    def to_dict(self) -> Dict:
+        return {
+            'current_level': self.current_level,
+            'at_hint': self.at_hint,
+            'completed_levels': sorted(self.completed_levels)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'UserProgress':
+        return cls(data.get('current_level', 1),
+                   bool(data.get('at_hint', False)),
+                   data.get('completed_levels', ()))
+
+
+class ProgressBackend:
+    """Interface for progress storage backends."""
+
+    # Whether saved progress survives a restart of the app
+    durable = False
+
+    def load(self, user_id: str) -> Optional[UserProgress]:
+        raise NotImplementedError
+
+    def save(self, user_id: str, progress: UserProgress):
+        raise NotImplementedError
+
+    def load_riddle(self, user_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def save_riddle(self, user_id: str, state: Optional[Dict]):
+        """Store a user's exported riddle state; None removes it."""
+        raise NotImplementedError
+
+
+class MemoryProgressBackend(ProgressBackend):
+    """Process-local backend, only suitable for a single worker or for tests."""
+
+    def __init__(self):
+        self._records: Dict[str, Dict] = {}
+        self._riddles: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def load(self, user_id: str) -> Optional[UserProgress]:
+        with self._lock:
+            record = self._records.get(user_id)
+        return UserProgress.from_dict(record) if record is not None else None
+
+    def save(self, user_id: str, progress: UserProgress):
+        with self._lock:
+            self._records[user_id] = progress.to_dict()
+
+    def load_riddle(self, user_id: str) -> Optional[Dict]:
+        with self._lock:
+            record = self._riddles.get(user_id)
+        return json.loads(record) if record is not None else None
+
+    def save_riddle(self, user_id: str, state: Optional[Dict]):
+        # Stored serialised, like the SQLite backend, so callers never share a dict
+        with self._lock:
+            if state is None:
+                self._riddles.pop(user_id, None)
+            else:
+                self._riddles[user_id] = json.dumps(state)
+
+
+class SQLiteProgressBackend(ProgressBackend):
+    """Backend shared by every worker process through a single SQLite file."""
+
+    durable = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS user_progress (
+            user_id TEXT PRIMARY KEY,
+            current_level INTEGER NOT NULL,
+            at_hint INTEGER NOT NULL,
+            completed_levels TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """
+    RIDDLE_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS user_riddles (
+            user_id TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(self.SCHEMA)
+            conn.execute(self.RIDDLE_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and per process; connections must never
+        # cross a fork, so the pid is checked as well.
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def load(self, user_id: str) -> Optional[UserProgress]:
+        row = self._connect().execute(
+            'SELECT current_level, at_hint, completed_levels FROM user_progress WHERE user_id = ?',
+            (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return UserProgress(row[0], bool(row[1]), json.loads(row[2]))
+
+    def save(self, user_id: str, progress: UserProgress):
+        self._connect().execute(
+            """
+            INSERT INTO user_progress (user_id, current_level, at_hint, completed_levels, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                current_level = excluded.current_level,
+                at_hint = excluded.at_hint,
+                completed_levels = excluded.completed_levels,
+                updated_at = excluded.updated_at
+            """,
+            (user_id, progress.current_level, int(progress.at_hint),
+             json.dumps(sorted(progress.completed_levels)), time.time())
+        )
+
+    def load_riddle(self, user_id: str) -> Optional[Dict]:
+        row = self._connect().execute(
+            'SELECT state FROM user_riddles WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def save_riddle(self, user_id: str, state: Optional[Dict]):
+        if state is None:
+            self._connect().execute('DELETE FROM user_riddles WHERE user_id = ?', (user_id,))
+            return
+        self._connect().execute(
+            """
+            INSERT INTO user_riddles (user_id, state, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                state = excluded.state,
+                updated_at = excluded.updated_at
+            """,
+            (user_id, json.dumps(state), time.time())
+        )
+
+
+class ProgressStore:
+    """Read-through cache in front of a backend.
+
+    Entries expire after `ttl` seconds, so another worker's write becomes
+    visible here within that window. Writes made by this worker update the
+    cache immediately.
+    """
+
+    def __init__(self, backend: ProgressBackend, ttl: float = 1.0):
+        self.backend = backend
+        self.ttl = ttl
+        self._cache: Dict[str, Tuple[float, UserProgress]] = {}
+        self._riddles: Dict[str, Tuple[float, Optional[Dict]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id) -> UserProgress:
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1].copy()
+
+        progress = self.backend.load(key)
+        if progress is None:
+            progress = UserProgress()
+        with self._lock:
+            self._cache[key] = (now + self.ttl, progress)
+        return progress.copy()
+
+    def save(self, user_id, progress: UserProgress):
+        key = str(user_id)
+        self.backend.save(key, progress)
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl, progress.copy())
+
+    def get_riddle(self, user_id) -> Optional[Dict]:
+        """The user's exported riddle state, cached like progress; treat it as read-only."""
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._riddles.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        state = self.backend.load_riddle(key)
+        with self._lock:
+            self._riddles[key] = (now + self.ttl, state)
+        return state
+
+    def save_riddle(self, user_id, state: Optional[Dict]):
+        key = str(user_id)
+        self.backend.save_riddle(key, state)
+        with self._lock:
+            self._riddles[key] = (time.monotonic() + self.ttl, state)
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+                self._riddles.clear()
+            else:
+                self._cache.pop(str(user_id), None)
+                self._riddles.pop(str(user_id), None)
+
+
+def create_progress_store(config) -> ProgressStore:
+    """Build the progress store described by the Flask config."""
+    backend_name = config.get('PROGRESS_BACKEND', 'sqlite')
+    if backend_name == 'memory':
+        backend = MemoryProgressBackend()
+    elif backend_name == 'sqlite':
+        backend = SQLiteProgressBackend(config['PROGRESS_DB_PATH'])
+    else:
+        raise ValueError(f'Unknown progress backend: {backend_name}')
+    return ProgressStore(backend, ttl=config.get('PROGRESS_CACHE_TTL', 1.0))
@@ -1,5 +1,5 @@
 import random
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 # Database of riddles with their answers and hints
 RIDDLES: List[Dict[str, str]] = [
@@ -81,55 +81,108 @@ RIDDLES: List[Dict[str, str]] = [
 ]
 
 class RiddleManager:
-    def __init__(self):
+    def __init__(self, store=None):
+        # Where riddle state lives: anything with get_riddle(user_id) and
+        # save_riddle(user_id, exported), such as the shared ProgressStore.
+        # Without one it stays in this process, in user_riddles.
+        self.store = store
         self.user_riddles: Dict[str, Dict] = {}  # Maps user_id to their current riddle
-        
+        # Called as on_change(event, user_id) after a riddle is assigned or cleared
+        self.on_change: Optional[Callable[[str, str], None]] = None
+
     def assign_riddle(self, user_id: str, level: int) -> Dict[str, str]:
         """Assign a random riddle to a user for a specific level."""
         # Get riddles not yet used by this user
-        used_riddles = self.user_riddles.get(user_id, {}).get('used_riddles', set())
+        used_riddles = set(self._load(user_id).get('used_riddles', ()))
         #reset used_riddles if all exahauted
         if len(used_riddles) >= len(RIDDLES):
             used_riddles.clear()
         #get available riddles
         available_riddles = [r for i, r in enumerate(RIDDLES) if i not in used_riddles]
         #slect new riddle 
-        if available_riddles:
-            riddle = random.choice(available_riddles)
-            riddle_index = RIDDLES.index(riddle)
-            # Store the riddle for this user
-            self.user_riddles[user_id] = {
-                'current_riddle': riddle,
-                'level': level,
-                'used_riddles': used_riddles | {riddle_index}
-        }
-        
+        riddle = random.choice(available_riddles)
+        riddle_index = RIDDLES.index(riddle)
+        # Store the riddle for this user
+        self._save(user_id, {
+            'current_riddle': riddle,
+            'level': level,
+            'used_riddles': used_riddles | {riddle_index}
+        })
+        self._notify('riddle_assigned', user_id)
+
         return {
             'riddle': riddle['riddle'],
             'hint': riddle['hint']
         }
-        return None # if any unexpected error occures
-    
+
+    def current_riddle(self, user_id: str, level: Optional[int] = None) -> Optional[Dict[str, str]]:
+        """The user's current riddle, if they have one (for `level`, when given)."""
+        state = self._load(user_id)
+        if 'current_riddle' not in state or (level is not None and state['level'] != level):
+            return None
+        return state['current_riddle']
+
     def check_answer(self, user_id: str, answer: str) -> bool:
         """Check if the provided answer matches the user's current riddle."""
-        if user_id not in self.user_riddles:
+        current_riddle = self.current_riddle(user_id)
+        if current_riddle is None:
             return False
-            
-        current_riddle = self.user_riddles[user_id]['current_riddle']
         return answer.lower().strip() == current_riddle['answer'].lower()
     
     def get_hint(self, user_id: str) -> str:
         """Get the hint for the user's current riddle."""
-        if user_id not in self.user_riddles:
+        current_riddle = self.current_riddle(user_id)
+        if current_riddle is None:
             return "No riddle assigned"
-            
-        return self.user_riddles[user_id]['current_riddle']['hint']
+        return current_riddle['hint']
     
     def clear_riddle(self, user_id: str):
         """Clear the current riddle for a user (called after level completion)."""
-        if user_id in self.user_riddles:
-            used_riddles = self.user_riddles[user_id].get('used_riddles', set())
-            self.user_riddles[user_id] = {'used_riddles': used_riddles}
+        state = self._load(user_id)
+        if state:
+            self._save(user_id, {'used_riddles': state.get('used_riddles', set())})
+            self._notify('riddle_cleared', user_id)
+
+    def export_state(self, user_id: str) -> Optional[Dict]:
+        """Return a JSON-serialisable copy of a user's riddle state."""
+        state = self._load(user_id)
+        return self._export(state) if state else None
+
+    def restore_state(self, user_id: str, exported: Dict):
+        """Load state produced by export_state, e.g. when replaying a journal."""
+        self._save(user_id, self._import(exported))
+
+    def _load(self, user_id: str) -> Dict:
+        if self.store is None:
+            return self.user_riddles.get(user_id, {})
+        exported = self.store.get_riddle(user_id)
+        return self._import(exported) if exported is not None else {}
+
+    def _save(self, user_id: str, state: Dict):
+        if self.store is None:
+            self.user_riddles[user_id] = state
+        else:
+            self.store.save_riddle(user_id, self._export(state))
+
+    @staticmethod
+    def _export(state: Dict) -> Dict:
+        exported = {'used_riddles': sorted(state.get('used_riddles', ()))}
+        if 'current_riddle' in state:
+            exported['riddle_index'] = RIDDLES.index(state['current_riddle'])
+            exported['level'] = state['level']
+        return exported
+
+    @staticmethod
+    def _import(exported: Dict) -> Dict:
+        state = {'used_riddles': set(exported.get('used_riddles', ()))}
+        if 'riddle_index' in exported:
+            state['current_riddle'] = RIDDLES[exported['riddle_index']]
+            state['level'] = exported['level']
+        return state
+
+    def _notify(self, event: str, user_id: str):
+        if self.on_change is not None:
+            self.on_change(event, user_id)
 
 # Create a global instance of the riddle manager
 riddle_manager = RiddleManager()
@@ -0,0 +1,60 @@
+// Level timers that tick in the browser (see timing.py)
+//
+//   const timers = await LevelTimers.load();
+//   const id = timers.start(level, text => element.textContent = text);
+//
+// One request to /level_times returns every level's start and end as Unix
+// epochs together with the server's clock. After that the display is
+// updated locally, corrected for the offset between the two clocks, so the
+// page never polls the server for the time again.
+class LevelTimers {
+    constructor(state) {
+        this.levels = state.levels;
+        this.offset = state.server_time - Date.now() / 1000;
+    }
+
+    static async load() {
+        const response = await fetch('/level_times');
+        if (!response.ok) {
+            throw new Error('Could not load level timers');
+        }
+        return new LevelTimers(await response.json());
+    }
+
+    now() {
+        return Date.now() / 1000 + this.offset;
+    }
+
+    elapsed(level) {
+        const timer = this.levels[level];
+        if (!timer || timer.start === null) {
+            return null;
+        }
+        return Math.max(0, Math.floor((timer.end ?? this.now()) - timer.start));
+    }
+
+    // Same format as format_duration() in app.py
+    static format(seconds) {
+        const hours = Math.floor(seconds / 3600);
+        const minutes = Math.floor((seconds % 3600) / 60);
+        const rest = seconds % 60;
+        if (hours > 0) {
+            return `${hours}h ${minutes}m ${rest}s`;
+        }
+        if (minutes > 0) {
+            return `${minutes}m ${rest}s`;
+        }
+        return `${rest}s`;
+    }
+
+    text(level) {
+        const seconds = this.elapsed(level);
+        return seconds === null ? 'Not started' : LevelTimers.format(seconds);
+    }
+
+    start(level, render, interval = 1000) {
+        const tick = () => render(this.text(level));
+        tick();
+        return setInterval(tick, interval);
+    }
+}
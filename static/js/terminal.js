@@ -0,0 +1,80 @@
+// Client for a persistent terminal channel (see terminal_channel.py)
+//
+//   const channel = await TerminalChannel.open(level, {
+//       command: reply => ..., complete: reply => ..., timer: tick => ...
+//   });
+//   channel.send('ls -al');
+//   channel.complete('cat he');
+//   channel.more();  // next page of a reply that came with more: true
+//
+// Replies arrive on one EventSource stream. Without EventSource every
+// message is posted with ?sync=1 and the reply is taken from the response.
+class TerminalChannel {
+    constructor(info, handlers) {
+        this.info = info;
+        this.handlers = handlers;
+        this.cwd = info.cwd;
+        this.nextId = 1;
+        this.stream = null;
+
+        if (window.EventSource) {
+            this.stream = new EventSource(info.events);
+            ['command', 'complete', 'timer'].forEach(type => {
+                this.stream.addEventListener(type, e => this.dispatch(type, JSON.parse(e.data)));
+            });
+            this.stream.addEventListener('close', () => this.stream.close());
+        }
+    }
+
+    static async open(level, handlers) {
+        const response = await fetch(`/terminal/${level}/channel`, { method: 'POST' });
+        const info = await response.json();
+        if (!response.ok) {
+            throw new Error(info.error || 'Could not open terminal');
+        }
+        return new TerminalChannel(info, handlers);
+    }
+
+    dispatch(type, data) {
+        if (data.cwd) {
+            this.cwd = data.cwd;
+        }
+        const handler = this.handlers[type];
+        if (handler) {
+            handler(data);
+        }
+    }
+
+    async post(message) {
+        message.id = this.nextId++;
+        const url = this.stream ? this.info.send : `${this.info.send}?sync=1`;
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(message)
+        });
+        if (!this.stream) {
+            // A page fetched with more() is a command reply
+            this.dispatch(message.type === 'more' ? 'command' : message.type, await response.json());
+        }
+    }
+
+    send(command) {
+        return this.post({ type: 'command', command: command });
+    }
+
+    more() {
+        return this.post({ type: 'more' });
+    }
+
+    complete(partial) {
+        return this.post({ type: 'complete', partial: partial });
+    }
+
+    close() {
+        if (this.stream) {
+            this.stream.close();
+        }
+        return this.post({ type: 'close' });
+    }
+}
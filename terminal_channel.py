@@ -0,0 +1,124 @@
+"""
+Persistent terminal channels.
+
+A logged-in player opens a channel once per level terminal and gets back an
+unguessable token. After that, commands are posted to the channel by token,
+so they skip the session cookie, the user lookup and the cwd round-trip: the
+emulator session and its cwd stay on the server. Replies, completions and
+timer ticks are multiplexed onto one Server-Sent Events stream per channel.
+"""
+
+import collections
+import json
+import queue
+import secrets
+import threading
+import time
+from typing import Optional, Tuple
+
+
+class Channel:
+    def __init__(self, user_id: int, level: int, started_at=None, max_events: int = 256):
+        self.token = secrets.token_urlsafe(24)
+        self.user_id = user_id
+        self.level = level
+        # Start of the level, used for the timer events
+        self.started_at = started_at
+        self.events = queue.Queue(maxsize=max_events)
+        self.closed = False
+
+    def push(self, event: str, data: dict, event_id=None):
+        """Queue an event for the stream, dropping the oldest if nobody reads it."""
+        while True:
+            try:
+                self.events.put_nowait((event, data, event_id))
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def next_event(self, timeout: float) -> Optional[Tuple[str, dict, object]]:
+        try:
+            return self.events.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.closed = True
+        self.push('close', {})
+
+
+def format_event(event: str, data: dict, event_id=None) -> str:
+    """Frame one Server-Sent Event."""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append('data: ' + json.dumps(data, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+class ChannelRegistry:
+    """Open channels by token, at most one per (user, level).
+
+    Opening a new channel for the same terminal closes the old one. Channels
+    unused for `idle_timeout` seconds, and the oldest beyond `max_channels`,
+    are closed whenever a channel is opened or looked up.
+    """
+
+    def __init__(self, max_channels: int = 5000, idle_timeout: float = 1800):
+        self.max_channels = max_channels
+        self.idle_timeout = idle_timeout
+        self._channels = collections.OrderedDict()
+        self._by_terminal = {}
+        self._lock = threading.Lock()
+
+    def open(self, user_id: int, level: int, started_at=None) -> Channel:
+        channel = Channel(user_id, level, started_at)
+        now = time.monotonic()
+        with self._lock:
+            previous = self._by_terminal.get((user_id, level))
+            if previous is not None:
+                self._remove(previous)
+            self._channels[channel.token] = (now, channel)
+            self._by_terminal[(user_id, level)] = channel.token
+            self._evict(now)
+        return channel
+
+    def get(self, token: str) -> Optional[Channel]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._channels.pop(token, None)
+            if entry is not None:
+                self._channels[token] = (now, entry[1])
+            self._evict(now)
+        return entry[1] if entry is not None else None
+
+    def close(self, token: str):
+        with self._lock:
+            self._remove(token)
+
+    def close_user(self, user_id: int):
+        """Close every channel of a user, e.g. when they log out."""
+        with self._lock:
+            for token in [token for (owner, _), token in self._by_terminal.items() if owner == user_id]:
+                self._remove(token)
+
+    def __len__(self):
+        return len(self._channels)
+
+    def _remove(self, token: str):
+        entry = self._channels.pop(token, None)
+        if entry is not None:
+            channel = entry[1]
+            if self._by_terminal.get((channel.user_id, channel.level)) == token:
+                del self._by_terminal[(channel.user_id, channel.level)]
+            channel.close()
+
+    def _evict(self, now: float):
+        while self._channels:
+            token, (last_used, _) = next(iter(self._channels.items()))
+            if len(self._channels) <= self.max_channels and now - last_used < self.idle_timeout:
+                break
+            self._remove(token)
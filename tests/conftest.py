@@ -0,0 +1,34 @@
+"""Shared setup: the app runs on a throwaway database with in-memory progress."""
+
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Read by app.py at import, so set before any test module imports it
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'test.db')
+os.environ['PROGRESS_BACKEND'] = 'memory'
+os.environ['PROGRESS_JOURNAL_DIR'] = os.path.join(WORKDIR, 'journal')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+
+@pytest.fixture
+def username():
+    return 'team-' + uuid.uuid4().hex[:8]
+
+
+@pytest.fixture
+def client(username):
+    """A test client logged in as a freshly registered team."""
+    import app as quicksnatch
+    with quicksnatch.app.app_context():
+        quicksnatch.db.create_all()
+    client = quicksnatch.app.test_client()
+    client.post('/register', data={'username': username, 'password': 'pw', 'confirm_password': 'pw'})
+    client.post('/login', data={'username': username, 'password': 'pw'})
+    return client
@@ -0,0 +1,74 @@
+"""check-headers on malformed ELF files: every problem ends up in `errors`."""
+
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binary_tools import analyze, parse_headers  # noqa: E402
+from binary_tools.headers import describe  # noqa: E402
+
+EHDR = '<HHIQQQIHHHHHH'
+PHDR = '<IIQQQQQQ'
+
+
+def elf64(phentsize=56, phnum=1, size=None):
+    """A little-endian ELF64 header followed by `phnum` LOAD segments of `phentsize` bytes."""
+    ident = b'\x7fELF' + bytes([2, 1, 1, 0, 0]) + b'\x00' * 7
+    header = ident + struct.pack(EHDR, 2, 62, 1, 0x401000, 64, 0, 0, 64, phentsize, phnum, 64, 0, 0)
+    segment = struct.pack(PHDR, 1, 5, 0, 0x400000, 0x400000, 0x1000, 0x1000, 0x1000)
+    data = header + (segment + b'\x00' * max(0, phentsize - len(segment))) * phnum
+    return data if size is None else data[:size]
+
+
+def test_valid_header():
+    headers = parse_headers(elf64())
+    assert headers['errors'] == []
+    assert headers['header']['machine'] == 'x86-64'
+    assert headers['program_headers'][0]['type'] == 'LOAD'
+    assert headers['program_headers'][0]['flags'] == 'r-x'
+
+
+def test_oversized_entry_size_past_the_end():
+    # The table of 56-byte structs fits, but entries 4096 bytes apart don't
+    data = elf64(phnum=3)
+    data = data[:54] + struct.pack('<H', 4096) + data[56:]
+    headers = parse_headers(data)
+    assert 'program_headers' not in headers
+    assert any('Program header table' in error for error in headers['errors'])
+
+
+def test_entry_size_smaller_than_the_struct():
+    headers = parse_headers(elf64(phentsize=8, phnum=2))
+    assert any('entry size 8' in error for error in headers['errors'])
+
+
+def test_truncated_header():
+    headers = parse_headers(elf64(size=40))
+    assert headers['class'] == 'ELF64'
+    assert 'header' not in headers
+    assert headers['errors']
+
+
+def test_truncated_table():
+    headers = parse_headers(elf64(phnum=2, size=64 + 56 + 10))
+    assert 'program_headers' not in headers
+    assert headers['errors']
+
+
+def test_analyze_reports_instead_of_raising():
+    data = elf64(phnum=3)
+    data = data[:54] + struct.pack('<H', 0xffff) + data[56:]
+    panel, = analyze('check-headers', data)
+    assert 'Warning: Program header table' in panel['content']
+
+
+def test_invalid_header_keeps_only_the_identification():
+    # Valid identification bytes followed by text rather than a header
+    data = elf64()[:16] + b'flag{not_a_header_at_all}' * 4
+    headers = parse_headers(data)
+    assert headers['class'] == 'ELF64'
+    assert 'header' not in headers and 'program_headers' not in headers
+    assert headers['errors'] == [headers['errors'][0]] and 'truncated or invalid' in headers['errors'][0]
+    assert describe(headers)[-1].startswith('Warning: ELF header is truncated or invalid')
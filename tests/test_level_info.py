@@ -0,0 +1,34 @@
+"""Served level info never carries the flag or the emulator's fixtures."""
+
+import json
+
+import app as quicksnatch
+from catalog import PRIVATE_FIELDS, LEVEL_INFO, catalog
+from emulator.vfs import level_data
+
+
+def test_level_info_is_public_only(client):
+    for level in (2, 4, 5):
+        response = client.get(f'/challenges/level{level}/level_info.json')
+        assert response.status_code == 200
+        served = json.loads(response.data)
+        assert served['title'] == catalog.level_info(level).data['title']
+        assert not PRIVATE_FIELDS[LEVEL_INFO] & set(served)
+        assert b'flag{' not in response.data
+
+    state = client.get('/api/state')
+    assert b'flag{' not in state.data
+
+
+def test_emulator_keeps_fixtures():
+    assert '/home/user/secret.txt' in level_data(2)['files']
+    assert level_data(5)['sockets']
+
+
+def test_player_state_reuses_public_info(client, username):
+    with quicksnatch.app.test_request_context():
+        user = quicksnatch.User.query.filter_by(username=username).first()
+        state = quicksnatch.player_state(user.id)
+    entry = catalog.level_info(state['level'])
+    assert state['level_info'] is entry.public
+    assert json.loads(client.get('/api/state').data)['level_info'] == entry.public
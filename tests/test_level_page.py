@@ -0,0 +1,14 @@
+"""The cached level page revalidates: a repeat GET with its ETag is a 304."""
+
+
+def test_level_page_revalidates(client):
+    # The first view shows the login's flashed message and isn't cached
+    client.get('/level/1')
+    first = client.get('/level/1')
+    assert first.status_code == 200
+    assert 'X-Server-Time' in first.headers
+
+    second = client.get('/level/1', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert 'X-Server-Time' in second.headers
@@ -0,0 +1,15 @@
+"""A busy hasher skips the opportunistic rehash instead of failing the login."""
+
+import app as quicksnatch
+from passwords import PasswordHasherBusy
+
+
+def test_login_succeeds_when_rehash_is_refused(client, username, monkeypatch):
+    def busy(password):
+        raise PasswordHasherBusy(1)
+
+    monkeypatch.setattr(quicksnatch.passwords, 'needs_rehash', lambda hashed: True)
+    monkeypatch.setattr(quicksnatch.passwords, 'hash', busy)
+    response = quicksnatch.app.test_client().post('/login', data={'username': username, 'password': 'pw'})
+    assert response.status_code == 302
+    assert '/level/' in response.headers['Location']
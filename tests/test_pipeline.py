@@ -0,0 +1,34 @@
+"""Binary data passes through pipes and redirects byte for byte."""
+
+from emulator.shell import Shell
+
+
+def data(shell, name):
+    return shell.lookup(name)[1].data
+
+
+def test_cat_copies_a_binary_file():
+    shell = Shell(4)
+    assert shell.execute('cat capture.pcap > copy.pcap').stderr == ''
+    assert data(shell, 'copy.pcap') == data(shell, 'capture.pcap')
+
+    result = shell.execute('tcpdump -r copy.pcap')
+    assert 'bad dump file format' not in result.stderr
+    assert result.stdout
+
+
+def test_binary_output_is_shown_with_replacement_characters():
+    stdout = Shell(4).execute('cat capture.pcap').stdout
+    assert '�' in stdout
+    stdout.encode('utf-8')
+
+
+def test_xxd_reverse_round_trips():
+    shell = Shell(4)
+    original = data(shell, 'capture.pcap')
+    for dump in ('xxd capture.pcap | xxd -r > back.pcap', 'xxd -p capture.pcap | xxd -r -p > back.pcap'):
+        assert shell.execute(dump).stderr == ''
+        assert data(shell, 'back.pcap') == original
+
+    first = shell.execute('xxd capture.pcap | xxd -r | xxd').stdout.split('\n')[0]
+    assert first.startswith('00000000: d4c3 b2a1')
@@ -0,0 +1,43 @@
+"""Replay never reads the snapshot and journal halfway through a compaction."""
+
+import fcntl
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from progress_journal import PROGRESS, ProgressJournal  # noqa: E402
+
+
+def test_replay_waits_for_compaction():
+    directory = tempfile.mkdtemp()
+    journal = ProgressJournal(directory)
+    journal.append('flag', PROGRESS, 1, {'current_level': 2})
+    journal.flush()
+
+    # Stand in for another worker's compaction holding the exclusive lock
+    lock_fd = os.open(os.path.join(directory, 'journal.lock'), os.O_RDWR)
+    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+    results = []
+    reader = threading.Thread(target=lambda: results.append(journal.replay()))
+    reader.start()
+    reader.join(timeout=0.2)
+    assert reader.is_alive()
+
+    fcntl.flock(lock_fd, fcntl.LOCK_UN)
+    os.close(lock_fd)
+    reader.join(timeout=5)
+    assert results == [({'1': {'current_level': 2}}, {})]
+    journal.close()
+
+
+def test_compaction_keeps_every_record():
+    journal = ProgressJournal(tempfile.mkdtemp())
+    journal.append('flag', PROGRESS, 1, {'current_level': 2})
+    journal.compact()
+    journal.append('flag', PROGRESS, 2, {'current_level': 3})
+    journal.flush()
+    assert journal.replay()[0] == {'1': {'current_level': 2}, '2': {'current_level': 3}}
+    journal.close()
@@ -0,0 +1,34 @@
+"""Riddle state is shared through the progress backend, not one worker's memory."""
+
+import os
+import tempfile
+
+from progress_store import ProgressStore, SQLiteProgressBackend
+from riddles import RIDDLES, RiddleManager
+
+
+def worker(path):
+    """The riddle manager of one worker process, with its own cache and connection."""
+    return RiddleManager(ProgressStore(SQLiteProgressBackend(path)))
+
+
+def test_riddle_assigned_on_one_worker_is_answered_on_another():
+    path = os.path.join(tempfile.mkdtemp(), 'progress.db')
+    first, second = worker(path), worker(path)
+
+    assigned = first.assign_riddle(7, 3)
+    riddle = next(r for r in RIDDLES if r['riddle'] == assigned['riddle'])
+    assert second.current_riddle(7, 3) == riddle
+    assert second.check_answer(7, riddle['answer'])
+
+    second.clear_riddle(7)
+    second.store.invalidate()
+    first.store.invalidate()
+    assert first.current_riddle(7) is None
+    assert first.export_state(7) == {'used_riddles': [RIDDLES.index(riddle)]}
+
+
+def test_wrong_answer_without_a_riddle_reassigns_one(client):
+    response = client.post('/level/1/complete', data={'answer': 'nothing'})
+    assert response.status_code == 200
+    assert b'Incorrect answer' in response.data
@@ -0,0 +1,10 @@
+"""Terminal channel tokens stop working when their user logs out."""
+
+
+def test_logout_closes_terminal_channels(client):
+    channel = client.post('/terminal/1/channel').get_json()
+    assert client.post(channel['send'], json={'command': 'pwd'}).status_code == 202
+
+    client.get('/logout')
+    assert client.post(channel['send'], json={'command': 'pwd'}).status_code == 404
+    assert client.get(channel['events']).status_code == 404
@@ -0,0 +1,26 @@
+"""The TTL-LRU cache behind the identity cache and the level timers."""
+
+from ttl_cache import TTLCache
+
+
+def test_expiry_eviction_and_replace(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr('ttl_cache.time.monotonic', lambda: clock[0])
+    loads = []
+    cache = TTLCache(lambda key: loads.append(key) or (None if key == 'missing' else key * 2),
+                     max_entries=2, ttl=10)
+
+    assert cache.get(1) == 2 and cache.get(1) == 2 and loads == [1]
+    assert cache.get('missing') is None and len(cache) == 1
+
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)  # evicts 2, the least recently used
+    assert len(cache) == 2
+    cache.get(2)
+    assert loads == [1, 'missing', 2, 3, 2]
+
+    cache.replace(2, lambda value: value + 1)
+    assert cache.get(2) == 5
+    clock[0] = 11
+    assert cache.get(2) == 4
@@ -0,0 +1,84 @@
+"""Durability of the write-behind buffer: coalescing, flush on exit, retries."""
+
+from datetime import datetime
+
+import app as quicksnatch
+import write_behind
+from write_behind import WriteBehind
+
+EARLY, LATE, LATER = datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 10), datetime(2024, 1, 1, 11)
+
+
+class Recorder:
+    """A flush function that can be told to fail."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    def __call__(self, pending):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('database is locked')
+        self.batches.append(pending)
+
+
+def test_writes_to_a_user_are_coalesced():
+    recorder = Recorder()
+    writes = WriteBehind(recorder, interval=60)
+    writes.put(1, {'qr_scan_time': EARLY}, {'first_scan_time': EARLY})
+    writes.put(1, {'qr_scan_time': LATE}, {'first_scan_time': LATE})
+    writes.put(2, {'qr_scan_time': LATER})
+    assert len(writes) == 2
+
+    writes.close()
+    assert recorder.batches == [{
+        1: {'qr_scan_time': (LATE, False), 'first_scan_time': (EARLY, True)},
+        2: {'qr_scan_time': (LATER, False)},
+    }]
+
+
+def test_set_once_columns_never_overwrite_the_database(client, username):
+    with quicksnatch.app.app_context():
+        user = quicksnatch.User.query.filter_by(username=username).first()
+        user.first_scan_time = EARLY
+        quicksnatch.db.session.commit()
+        user_id = user.id
+
+    writes = WriteBehind(quicksnatch.flush_user_writes, interval=60)
+    writes.put(user_id, {'qr_scan_time': LATE}, {'first_scan_time': LATE, 'submission_time': LATE})
+    assert writes.flush()
+
+    with quicksnatch.app.app_context():
+        user = quicksnatch.db.session.get(quicksnatch.User, user_id)
+        assert (user.first_scan_time, user.submission_time, user.qr_scan_time) == (EARLY, LATE, LATE)
+    writes.close()
+
+
+def test_exit_flushes_queued_writes(monkeypatch):
+    hooks = []
+    monkeypatch.setattr(write_behind.atexit, 'register', hooks.append)
+    recorder = Recorder()
+    writes = WriteBehind(recorder, interval=60)
+    writes.put(1, {'qr_scan_time': EARLY})
+    assert hooks == [writes.close]
+
+    hooks[0]()
+    assert recorder.batches == [{1: {'qr_scan_time': (EARLY, False)}}]
+    # Writes after close() are not left behind either
+    writes.put(1, {'qr_scan_time': LATE})
+    assert recorder.batches[-1] == {1: {'qr_scan_time': (LATE, False)}}
+
+
+def test_failed_flush_is_retried():
+    recorder = Recorder(failures=1)
+    writes = WriteBehind(recorder, interval=60)
+    writes.put(1, {'qr_scan_time': EARLY}, {'first_scan_time': EARLY})
+    assert not writes.flush()
+    assert len(writes) == 1
+
+    # Newer values queued before the retry win; the first set-once value stays
+    writes.put(1, {'qr_scan_time': LATE}, {'first_scan_time': LATE})
+    assert writes.flush()
+    assert recorder.batches == [{1: {'qr_scan_time': (LATE, False), 'first_scan_time': (EARLY, True)}}]
+    writes.close()
@@ -0,0 +1,56 @@
+"""
+Level timers, loaded per user in one query and cached per worker.
+
+Every LevelTime row of a user is read at once (the latest start of each
+level wins), kept for `ttl` seconds and updated in place when this worker
+starts a timer, so showing or polling a timer costs no query. Clients get
+the start and end as Unix epochs together with the server's clock and tick
+the display themselves (static/js/level_timer.js).
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Optional
+
+import pytz
+
+from ttl_cache import TTLCache
+
+
+def as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """SQLite hands back naive datetimes; they were stored as UTC."""
+    if moment is None or moment.tzinfo is not None:
+        return moment
+    return pytz.UTC.localize(moment)
+
+
+class LevelTimer:
+    __slots__ = ('level', 'start_time', 'end_time')
+
+    def __init__(self, level: int, start_time: datetime, end_time: Optional[datetime] = None):
+        self.level = level
+        self.start_time = as_utc(start_time)
+        self.end_time = as_utc(end_time)
+
+    @property
+    def running(self) -> bool:
+        return self.end_time is None
+
+    def elapsed(self, now: Optional[datetime] = None) -> timedelta:
+        return (self.end_time or now or datetime.now(pytz.UTC)) - self.start_time
+
+    def to_dict(self, now: Optional[datetime] = None) -> Dict:
+        return {
+            'level': self.level,
+            'start': self.start_time.timestamp(),
+            'end': self.end_time.timestamp() if self.end_time else None,
+            'elapsed': int(self.elapsed(now).total_seconds()),
+        }
+
+
+class LevelTimes(TTLCache):
+    """Timers of a user by level; don't modify a returned dict."""
+
+    def started(self, user_id: Hashable, timer: LevelTimer):
+        """Record a timer this worker has just inserted."""
+        # Copy on write, readers may be iterating the old dict
+        self.replace(user_id, lambda timers: {**timers, timer.level: timer})
@@ -0,0 +1,57 @@
+"""
+Per-worker read-through cache: entries live for `ttl` seconds and at most
+`max_entries` are kept, least recently used evicted first.
+
+Shared by the identity cache (identity.py) and the level timers (timing.py).
+"""
+
+import collections
+import threading
+import time
+from typing import Callable, Hashable, Optional
+
+
+class TTLCache:
+    def __init__(self, loader: Callable[[Hashable], Optional[object]],
+                 max_entries: int = 10000, ttl: float = 30.0):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        """The cached value of `key`, loaded on a miss; None from the loader is not cached."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = self.loader(key)
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def replace(self, key: Hashable, change: Callable[[object], object]):
+        """Swap a cached value for `change(value)`, keeping its age; no-op when not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], change(entry[1]))
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,167 @@
+"""
+Write-behind buffers: per-user column writes (scan and submission times) and
+append-only event rows (submission attempts).
+
+Views queue a write and answer straight away; a background thread flushes
+everything queued since its last run in one transaction every `interval`
+seconds. Writes to the same user are coalesced: a plain column keeps the
+newest value, a set-once column (first scan, first submission) keeps the
+first value queued and is written with COALESCE so it never overwrites a
+value already in the database.
+
+Durability: a queued write is only in this worker's memory until the next
+flush, so a crash (SIGKILL, OOM, power loss) loses at most the last
+`interval` seconds of timestamps. A normal exit flushes first (atexit, which
+runs on Ctrl-C and on gunicorn's graceful worker shutdown). A failed flush
+keeps the writes queued and retries on the next run. Player progress itself
+does not depend on this buffer; it is journaled separately
+(progress_journal.py).
+"""
+
+import atexit
+import logging
+import threading
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# key -> column -> (value, set_once)
+Pending = Dict[Hashable, Dict[str, Tuple[object, bool]]]
+
+
+def merge(into: Pending, key: Hashable, columns: Dict[str, Tuple[object, bool]]):
+    """Coalesce `columns` into the pending writes of `key`."""
+    current = into.setdefault(key, {})
+    for column, (value, set_once) in columns.items():
+        if set_once and column in current:
+            continue
+        current[column] = (value, set_once)
+
+
+class WriteBehind:
+    def __init__(self, flush: Callable[[Pending], None], interval: float = 0.25, max_pending: int = 10000):
+        self._write = flush
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: Pending = {}
+        self._lock = threading.Lock()
+        # Serialises flushes so a retry can't overtake newer writes
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, key: Hashable, values: Optional[Dict] = None, set_once: Optional[Dict] = None):
+        columns = {column: (value, True) for column, value in (set_once or {}).items()}
+        columns.update((column, (value, False)) for column, value in (values or {}).items())
+        with self._lock:
+            merge(self._pending, key, columns)
+            full = len(self._pending) >= self.max_pending
+        if full or self._closed:
+            # Back-pressure when the database falls behind, or after close()
+            self.flush()
+
+    def flush(self) -> bool:
+        """Write everything queued so far; returns False if the write failed."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return True
+            try:
+                self._write(pending)
+                return True
+            except Exception:
+                logger.exception('Write-behind flush of %d users failed, retrying', len(pending))
+                with self._lock:
+                    # Newer writes queued meanwhile win over the failed ones
+                    for key, columns in pending.items():
+                        newer = self._pending.pop(key, {})
+                        merge(self._pending, key, columns)
+                        for column, (value, set_once) in newer.items():
+                            merge(self._pending, key, {column: (value, set_once)})
+                return False
+
+    def __len__(self):
+        return len(self._pending)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self.flush()
+
+
+class BatchAppender:
+    """Append-only rows (e.g. an event log) inserted in batches by a background thread.
+
+    append() only adds to a bounded in-memory queue. When the queue is full
+    the row is dropped and counted in `dropped` rather than slowing the
+    request down; the same durability rules as WriteBehind apply.
+    """
+
+    def __init__(self, write: Callable[[list], None], interval: float = 0.25, max_queue: int = 10000,
+                 name: str = 'appender'):
+        self._write = write
+        self.interval = interval
+        self.max_queue = max_queue
+        self.name = name
+        self.appended = 0
+        self.dropped = 0
+        self.written = 0
+        self._queue = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, row: Dict) -> bool:
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._queue.append(row)
+            self.appended += 1
+        return True
+
+    def flush(self) -> bool:
+        with self._flush_lock:
+            with self._lock:
+                rows, self._queue = self._queue, []
+            if not rows:
+                return True
+            try:
+                self._write(rows)
+                self.written += len(rows)
+                return True
+            except Exception:
+                logger.exception('%s: insert of %d rows failed, retrying', self.name, len(rows))
+                with self._lock:
+                    # Keep the oldest rows in order, drop what no longer fits
+                    queue = rows + self._queue
+                    self.dropped += max(0, len(queue) - self.max_queue)
+                    self._queue = queue[:self.max_queue]
+                return False
+
+    def stats(self) -> Dict[str, int]:
+        return {'appended': self.appended, 'written': self.written, 'dropped': self.dropped,
+                'queued': len(self._queue)}
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self.flush()